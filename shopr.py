@@ -4,17 +4,26 @@
 import sys
 import asyncio
 import os
-import sentry_sdk
 from shopr import main
+from shopr.profiling import run_profiled
+from shopr.tracing import init_sentry
 
 if __name__ == "__main__":
-    # Initialize Sentry for error tracking
-    # Set SENTRY_DSN environment variable to enable Sentry integration
-    sentry_dsn = os.environ.get("SENTRY_DSN")
-    if sentry_dsn:
-        sentry_sdk.init(
-            dsn=sentry_dsn,
-            environment=os.environ.get("SENTRY_ENVIRONMENT", "production"),
-        )
+    # Initialize Sentry for error tracking and performance tracing
+    # Set SENTRY_DSN environment variable to enable Sentry integration, or
+    # SHOPR_TRACES_FILE to write traces to a local file without it. Runs
+    # are only traced to Sentry if SENTRY_TRACES_SAMPLE_RATE is set.
+    traces_sample_rate = os.environ.get("SENTRY_TRACES_SAMPLE_RATE")
+    init_sentry(
+        dsn=os.environ.get("SENTRY_DSN"),
+        environment=os.environ.get("SENTRY_ENVIRONMENT", "production"),
+        traces_sample_rate=float(traces_sample_rate) if traces_sample_rate else None,
+        traces_file=os.environ.get("SHOPR_TRACES_FILE"),
+    )
 
-    asyncio.run(main())
+    # Profile the run, writing the profiles to a timestamped directory
+    if "--profile" in sys.argv:
+        sys.argv.remove("--profile")
+        run_profiled(main())
+    else:
+        asyncio.run(main())
@@ -0,0 +1,466 @@
+"""Benchmarks for the scoring and training hot paths."""
+
+import argparse
+import json
+import logging
+import platform
+import random
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from .elo import HAS_NUMPY
+from .fake_trello import FakeBoard, FakeTrello
+from .main import (
+    Prefs,
+    Scores,
+    lookup,
+    lookup_candidates,
+    lookup_many,
+    make_scores,
+    run,
+    singularize,
+    train,
+    update,
+)
+from .trello import Checklist, ChecklistItem, TrelloClient
+
+
+# Where `bench --save-baseline` stores results for later comparison
+BASELINE_PATH = Path(".shopr-bench.json")
+TABLE_SIZES = (1_000, 10_000, 100_000)
+CHECKLIST_SIZES = (20, 100, 500)
+QUICK_TABLE_SIZES = (1_000,)
+QUICK_CHECKLIST_SIZES = (20, 100)
+# Names looked up or updated per measurement
+NAMES_PER_RUN = 1_000
+# Fraction by which ops/sec may drop below the baseline before it counts
+# as a regression
+DEFAULT_TOLERANCE = 0.2
+SEED = 1234
+# Board size and network conditions for `bench --e2e`
+DEFAULT_RECIPES = 20
+DEFAULT_LATENCY = 0.05
+DEFAULT_JITTER = 0.02
+
+# Item vocabulary, mostly Norwegian with some English, like real lists
+NB_WORDS = [
+    "melk", "egg", "brød", "ost", "smør", "kylling", "laks", "torsk",
+    "gulrot", "løk", "hvitløk", "tomat", "potet", "eple", "banan", "pære",
+    "sitron", "agurk", "paprika", "brokkoli", "spinat", "ris", "mel",
+    "sukker", "salt", "pepper", "kanel", "yoghurt", "fløte", "rømme",
+    "skinke", "bacon", "pølse", "kjøttdeig", "biff", "lam", "reke",
+    "tunfisk", "mais", "bønne", "ert", "sopp", "salat", "kål", "selleri",
+    "ingefær", "chili", "honning", "havre", "gryn",
+]
+EN_WORDS = [
+    "milk", "bread", "cheese", "butter", "chicken", "salmon", "carrot",
+    "onion", "garlic", "tomato", "potato", "apple", "lemon", "cucumber",
+    "pepper", "rice", "pasta", "flour", "sugar", "cream", "ham", "sausage",
+    "beef", "shrimp", "tuna", "corn", "bean", "mushroom", "lettuce",
+    "cabbage", "ginger", "honey", "oat", "noodle", "tortilla", "avocado",
+]
+# Second halves of Norwegian compounds, e.g. "kyllingfilet"
+NB_COMPOUND_ENDS = [
+    "filet", "saus", "suppe", "pålegg", "deig", "biter", "strimler", "mix",
+    "krem", "juice", "pulver", "salat",
+]
+NB_PLURALS = ["", "", "er", "ar", "r"]
+EN_PLURALS = ["", "", "s", "es"]
+DESCRIPTORS = [
+    "fresh", "frozen", "organic", "large", "chopped", "lett", "hel",
+    "fersk", "frossen", "økologisk", "revet", "ekstra",
+]
+QUANTITIES = ["", "", "", "2 ", "500 g ", "1 l ", "400g ", "3 pk "]
+
+
+class Corpus:
+    """Generator of synthetic shopping list item names."""
+
+    def __init__(self, seed: int = SEED):
+        """Initialize the generator.
+
+        Args:
+            seed: Random seed, so every run sees the same items
+        """
+        self.rng = random.Random(seed)
+        compounds = [
+            f"{word}{end}" for word in NB_WORDS for end in NB_COMPOUND_ENDS
+        ]
+        self.nb_words = NB_WORDS + compounds
+
+    def word(self) -> str:
+        """Generate one inflected word."""
+        if self.rng.random() < 0.7:
+            return self.rng.choice(self.nb_words) + self.rng.choice(NB_PLURALS)
+        return self.rng.choice(EN_WORDS) + self.rng.choice(EN_PLURALS)
+
+    def name(self) -> str:
+        """Generate an item name of one to three words."""
+        words = [self.word() for _ in range(self.rng.choice((1, 1, 2, 2, 3)))]
+        if self.rng.random() < 0.2:
+            words.insert(0, self.rng.choice(DESCRIPTORS))
+        name = self.rng.choice(QUANTITIES) + " ".join(words)
+        return name.capitalize() if self.rng.random() < 0.5 else name
+
+    def names(self, count: int) -> list[str]:
+        """Generate several item names."""
+        return [self.name() for _ in range(count)]
+
+    def scores(self, size: int) -> Scores:
+        """Train a score table up to `size` keys.
+
+        Args:
+            size: Number of keys in the table
+
+        Returns:
+            Score table
+        """
+        scores = make_scores()
+        while len(scores) < size:
+            update(scores, self.name(), self.rng.uniform(500.0, 1500.0))
+        return scores
+
+    def checklist(self, size: int) -> Checklist:
+        """Generate a checklist of `size` items."""
+        return Checklist(
+            id="bench",
+            checkItems=[
+                ChecklistItem(id=f"item{i}", idChecklist="bench", name=name, pos=i)
+                for i, name in enumerate(self.names(size))
+            ],
+        )
+
+    def board(self, recipes: int) -> FakeBoard:
+        """Generate a board for an end-to-end run.
+
+        A quarter of the recipes are selected, with a card to populate
+        from them, and a tenth as many cards each are marked for
+        training and ordering.
+
+        Args:
+            recipes: Number of recipe cards
+
+        Returns:
+            Board with available and selected recipe lists and a list of
+            shopping lists
+        """
+        board = FakeBoard()
+        available = board.add_list("Recipes")
+        selected = board.add_list("Selected recipes")
+        shopping = board.add_list("Shopping lists")
+
+        for i in range(recipes):
+            id_list = selected if i < max(1, recipes // 4) else available
+            card = board.add_card(f"Recipe {i}", id_list)
+            board.add_checklist(card.id, self.names(self.rng.randint(5, 15)))
+
+        for label in ("train", "order"):
+            for i in range(max(1, recipes // 10)):
+                card = board.add_card(f"Shopping list {label} {i}", shopping, [label])
+                board.add_checklist(card.id, self.names(self.rng.randint(20, 40)))
+
+        board.add_card("Shopping list", shopping, ["populate"])
+        return board
+
+
+def measure(
+    run: Callable[[], Any],
+    ops: int,
+    repeat: int = 3,
+) -> dict[str, float]:
+    """Time a benchmark and record its peak memory.
+
+    Args:
+        run: Function running the benchmark once
+        ops: Operations performed by one call of `run`
+        repeat: Timed calls, of which the fastest counts
+
+    Returns:
+        Operations per second and peak traced memory in bytes
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+
+    # Measured separately, since tracing allocations slows everything down
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"ops_per_sec": ops / best, "peak_bytes": peak}
+
+
+def clear_candidate_caches() -> None:
+    """Forget memoized candidates, so normalization is measured cold."""
+    lookup_candidates.cache_clear()
+    singularize.cache_clear()
+
+
+def run_benchmarks(
+    table_sizes: tuple[int, ...] = TABLE_SIZES,
+    checklist_sizes: tuple[int, ...] = CHECKLIST_SIZES,
+    report: Callable[[str, dict[str, float]], None] | None = None,
+) -> dict[str, dict[str, float]]:
+    """Benchmark candidate extraction, lookups, updates and training.
+
+    Args:
+        table_sizes: Score table sizes (in keys) to benchmark against
+        checklist_sizes: Checklist sizes (in items) for batch lookups and
+            training
+        report: Called with each result as soon as it is measured
+
+    Returns:
+        Results by benchmark name
+    """
+    results: dict[str, dict[str, float]] = {}
+
+    def record(name: str, result: dict[str, float]) -> None:
+        results[name] = result
+        if report is not None:
+            report(name, result)
+
+    corpus = Corpus()
+    names = corpus.names(NAMES_PER_RUN)
+
+    def normalize() -> None:
+        clear_candidate_caches()
+        for name in names:
+            lookup_candidates(name)
+
+    record("lookup_candidates[cold]", measure(normalize, len(names)))
+
+    def normalize_cached() -> None:
+        for name in names:
+            lookup_candidates(name)
+
+    record("lookup_candidates[cached]", measure(normalize_cached, len(names)))
+
+    engines = ("python", "numpy") if HAS_NUMPY else ("python",)
+    for size in table_sizes:
+        scores = corpus.scores(size)
+        checklists = {items: corpus.checklist(items) for items in checklist_sizes}
+
+        def lookup_each() -> None:
+            for name in names:
+                lookup(scores, name)
+
+        record(f"lookup[keys={size}]", measure(lookup_each, len(names)))
+
+        for items, checklist in checklists.items():
+            item_names = [item.name for item in checklist.checkItems]
+            record(
+                f"lookup_many[keys={size},items={items}]",
+                measure(lambda: lookup_many(scores, item_names), 1),
+            )
+
+        def update_each() -> None:
+            for name in names:
+                update(scores, name, 1000.0)
+
+        record(f"update[keys={size}]", measure(update_each, len(names)))
+
+        for engine in engines:
+            for items, checklist in checklists.items():
+                record(
+                    f"train[{engine},keys={size},items={items}]",
+                    measure(lambda: train(checklist, scores, engine), 1, repeat=1),
+                )
+
+    return results
+
+
+async def run_end_to_end(
+    board: FakeBoard,
+    latency: float = DEFAULT_LATENCY,
+    jitter: float = DEFAULT_JITTER,
+    error_rate: float = 0.0,
+) -> dict[str, Any]:
+    """Time a full run against a fake Trello board.
+
+    Args:
+        board: Board to run against; changed by the run
+        latency: Seconds every request takes at least
+        jitter: Most extra seconds added at random to a request
+        error_rate: Fraction of requests answered with 429
+
+    Returns:
+        Wall-clock seconds, requests made, 429s received, retries,
+        requests by route and routes resolved inside batches
+    """
+    fake = FakeTrello(board, latency=latency, jitter=jitter, error_rate=error_rate)
+    with tempfile.TemporaryDirectory() as directory:
+        prefs = Prefs(board.prefs(
+            cacheDir=None, scoresFile=str(Path(directory) / "scores.json")
+        ))
+        async with TrelloClient(prefs.key, prefs.token, transport=fake) as client:
+            start = time.perf_counter()
+            await run(client, prefs)
+            seconds = time.perf_counter() - start
+
+    return {
+        "seconds": seconds,
+        "requests": fake.requests.total(),
+        "rate_limited": fake.rate_limited,
+        "retries": client.scheduler.retries,
+        "routes": dict(fake.requests),
+        "batched": dict(fake.batched),
+    }
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> list[str]:
+    """Find benchmarks that got slower than the baseline.
+
+    Args:
+        results: Results of this run
+        baseline: Stored results to compare with
+        tolerance: Fraction ops/sec may drop by before it counts
+
+    Returns:
+        Names of the benchmarks that regressed
+    """
+    return [
+        name
+        for name, result in results.items()
+        if name in baseline
+        and result["ops_per_sec"] < baseline[name]["ops_per_sec"] * (1 - tolerance)
+    ]
+
+
+def format_result(
+    name: str,
+    result: dict[str, float],
+    baseline: dict[str, float] | None = None,
+) -> str:
+    """Format a result as a line of the report."""
+    line = (
+        f"{name:<45} {result['ops_per_sec']:>14,.1f} ops/s"
+        f" {result['peak_bytes'] / 1e6:>9.2f} MB peak"
+    )
+    if baseline is not None:
+        change = result["ops_per_sec"] / baseline["ops_per_sec"] - 1
+        line += f" {change:>+8.1%}"
+    return line
+
+
+async def bench(args: list[str]) -> int:
+    """Run the benchmarks from the command line.
+
+    Args:
+        args: Command line arguments after "bench"
+
+    Returns:
+        Exit status: 1 if anything regressed against the baseline
+    """
+    parser = argparse.ArgumentParser(prog="shopr.py bench")
+    parser.add_argument(
+        "--quick",
+        action="store_true",
+        help="only benchmark the smallest table and checklists",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=BASELINE_PATH,
+        help="baseline results file to compare with or save to",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store this run's results as the new baseline",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="fraction ops/sec may drop below the baseline (default 0.2)",
+    )
+    parser.add_argument(
+        "--e2e",
+        action="store_true",
+        help="time a full run against a fake Trello board instead",
+    )
+    parser.add_argument(
+        "--recipes",
+        type=int,
+        default=DEFAULT_RECIPES,
+        help=f"recipe cards on the fake board (default {DEFAULT_RECIPES})",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=DEFAULT_LATENCY,
+        help=f"seconds per fake request (default {DEFAULT_LATENCY})",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=DEFAULT_JITTER,
+        help=f"most random seconds added per request (default {DEFAULT_JITTER})",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="fraction of fake requests answered with 429 (default 0)",
+    )
+    options = parser.parse_args(args)
+
+    # Training logs every checklist, which would drown out the report
+    logging.getLogger("shopr:trelloClient").setLevel(logging.WARNING)
+
+    if options.e2e:
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+        result = await run_end_to_end(
+            Corpus().board(options.recipes),
+            options.latency,
+            options.jitter,
+            options.error_rate,
+        )
+        print(
+            f"{result['seconds']:.2f}s, {result['requests']} requests,"
+            f" {result['rate_limited']} rate limited, {result['retries']} retries"
+        )
+        for route, count in sorted(result["routes"].items()):
+            print(f"{route:<60} {count:>6}")
+        for route, count in sorted(result["batched"].items()):
+            print(f"{route + ' (batched)':<60} {count:>6}")
+        return 0
+
+    baseline: dict[str, dict[str, float]] = {}
+    if options.baseline.exists() and not options.save_baseline:
+        baseline = json.loads(options.baseline.read_text())["results"]
+
+    def report(name: str, result: dict[str, float]) -> None:
+        print(format_result(name, result, baseline.get(name)), flush=True)
+
+    if options.quick:
+        results = run_benchmarks(QUICK_TABLE_SIZES, QUICK_CHECKLIST_SIZES, report)
+    else:
+        results = run_benchmarks(report=report)
+
+    if options.save_baseline:
+        options.baseline.write_text(json.dumps({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }, indent=2))
+        print(f"Saved baseline to {options.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, options.tolerance)
+    for name in regressions:
+        print(f"Regression: {name}")
+    return 1 if regressions else 0
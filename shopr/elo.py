@@ -1,5 +1,16 @@
 """Simple ELO ranking implementation."""
 
+from collections.abc import Sequence
+from typing import Any
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an optional dependency
+    np = None
+
+
+HAS_NUMPY = np is not None
+
 
 class EloRank:
     """Simple ELO ranking system."""
@@ -41,3 +52,50 @@ class EloRank:
             New rating
         """
         return current + self.k_factor * (actual - expected)
+
+    def pairwise_changes(
+        self,
+        ratings: Sequence[float],
+        positions: Sequence[float],
+    ) -> Any:
+        """Get the rating change of every player against every other player.
+
+        Vectorized with numpy. Entry [a, b] equals
+        ``update_rating(get_expected(a, b), actual, 0.0)`` where a player
+        at a lower position loses; players at equal positions are not
+        compared and get 0. numpy's SIMD ``power`` can differ from the C
+        library's ``pow`` in the last bit, so results match the scalar
+        methods to within rounding rather than exactly.
+
+        Args:
+            ratings: Rating per player
+            positions: Position per player
+
+        Returns:
+            numpy array of shape (n, n)
+        """
+        if np is None:
+            raise ImportError("numpy is required for pairwise_changes")
+
+        ratings_arr = np.asarray(ratings, dtype=np.float64)
+        positions_arr = np.asarray(positions, dtype=np.float64)
+        n = len(ratings_arr)
+        changes = np.zeros((n, n))
+        if n < 2:
+            return changes
+
+        rows, cols = np.triu_indices(n, 1)
+        exponents = (ratings_arr[cols] - ratings_arr[rows]) / 400
+        row_expected = 1 / (1 + np.power(10.0, exponents))
+        col_expected = 1 / (1 + np.power(10.0, -exponents))
+
+        row_actual = (positions_arr[rows] >= positions_arr[cols]).astype(np.float64)
+        compared = positions_arr[rows] != positions_arr[cols]
+
+        changes[rows, cols] = np.where(
+            compared, self.k_factor * (row_actual - row_expected), 0.0
+        )
+        changes[cols, rows] = np.where(
+            compared, self.k_factor * ((1 - row_actual) - col_expected), 0.0
+        )
+        return changes
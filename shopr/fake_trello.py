@@ -0,0 +1,496 @@
+"""In-process fake of the Trello API, for end-to-end load testing.
+
+FakeTrello is an httpx transport: a TrelloClient created with it answers
+every request from an in-memory board instead of the network, after a
+configurable delay and with Trello's rate limiting (or extra 429s)
+injected, so whole runs can be timed without touching a real board.
+"""
+
+import asyncio
+import itertools
+import json
+import math
+import random
+import re
+import time
+from collections import Counter, deque
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from typing import Any
+
+import httpx
+
+from .scheduler import TOKEN_RATE_LIMIT, TOKEN_RATE_WINDOW
+from .trello import Card, Checklist, ChecklistItem
+
+
+# Position Trello gives an item added without one, past the last item
+POS_STEP = 16384
+# Actions Trello returns when no limit is given
+DEFAULT_ACTIONS_LIMIT = 50
+NOT_FOUND = "The requested resource was not found."
+
+# Query parameters, or IDs taken from a request path
+Params = dict[str, str]
+
+
+class FakeTrelloError(Exception):
+    """A request the fake answers with an error status."""
+
+    def __init__(self, status_code: int, message: str):
+        """Initialize the error.
+
+        Args:
+            status_code: HTTP status to respond with
+            message: Response body
+        """
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+def project(data: dict[str, Any], fields: str | None) -> dict[str, Any]:
+    """Keep only the requested fields of an object, like Trello does.
+
+    Args:
+        data: Full object
+        fields: Comma-separated field names, "all" or None for everything
+
+    Returns:
+        Object with its ID and the requested fields
+    """
+    if fields is None or fields == "all":
+        return data
+    keep = {"id", *fields.split(",")}
+    return {key: value for key, value in data.items() if key in keep}
+
+
+class FakeBoard:
+    """In-memory Trello board with lists, labelled cards and checklists."""
+
+    def __init__(self, id: str = "board"):
+        """Initialize an empty board.
+
+        Args:
+            id: Board ID
+        """
+        self.id = id
+        self.lists: dict[str, dict[str, Any]] = {}
+        self.labels: dict[str, dict[str, Any]] = {}
+        self.cards: dict[str, Card] = {}
+        self.checklists: dict[str, Checklist] = {}
+        # Oldest first; IDs increase, so they compare like Trello's
+        self.actions: list[dict[str, Any]] = []
+        self.last_activity = self._now()
+        self._ids = itertools.count(1)
+
+    @staticmethod
+    def _now() -> str:
+        """Get the current time the way Trello formats it."""
+        return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+    def new_id(self) -> str:
+        """Create an ID that sorts after every earlier one."""
+        return f"{next(self._ids):024x}"
+
+    def add_list(self, name: str) -> str:
+        """Add a list and return its ID."""
+        id = self.new_id()
+        self.lists[id] = {"id": id, "name": name, "idBoard": self.id}
+        return id
+
+    def label(self, name: str) -> dict[str, Any]:
+        """Get the label with a name, creating it if needed."""
+        if name not in self.labels:
+            self.labels[name] = {"id": self.new_id(), "name": name}
+        return self.labels[name]
+
+    def add_card(
+        self,
+        name: str,
+        id_list: str,
+        labels: Iterable[str] = (),
+    ) -> Card:
+        """Add a card.
+
+        Args:
+            name: Card name
+            id_list: List to add it to
+            labels: Names of the labels it carries
+
+        Returns:
+            The new card
+        """
+        card = Card(
+            id=self.new_id(),
+            name=name,
+            idList=id_list,
+            labels=[dict(self.label(label)) for label in labels],
+        )
+        self.cards[card.id] = card
+        return card
+
+    def add_checklist(
+        self,
+        id_card: str,
+        names: Iterable[str] = (),
+    ) -> Checklist:
+        """Add a checklist to a card.
+
+        Args:
+            id_card: Card to add it to
+            names: Names of its items, in order
+
+        Returns:
+            The new checklist
+        """
+        checklist = Checklist(id=self.new_id(), idCard=id_card)
+        for pos, name in enumerate(names, 1):
+            checklist.checkItems.append(ChecklistItem(
+                id=self.new_id(),
+                idChecklist=checklist.id,
+                name=name,
+                pos=pos * POS_STEP,
+            ))
+        self.checklists[checklist.id] = checklist
+        self.cards[id_card].idChecklists.append(checklist.id)
+        return checklist
+
+    def record(self, type: str, id_card: str) -> None:
+        """Log a change to a card in the actions feed."""
+        self.actions.append(
+            {"id": self.new_id(), "type": type, "data": {"card": {"id": id_card}}}
+        )
+        self.last_activity = self._now()
+
+    def prefs(self, **overrides: Any) -> dict[str, Any]:
+        """Get .trello.json settings pointing shopr at this board.
+
+        The lists are the first two added, as available and selected
+        recipes, and the labels are named after the phases.
+
+        Args:
+            overrides: Settings to add or replace
+
+        Returns:
+            Preferences data
+        """
+        available, selected = list(self.lists)[:2]
+        return {
+            "key": "fake_key",
+            "token": "fake_token",
+            "board": self.id,
+            "trainLabel": "train",
+            "orderLabel": "order",
+            "populateLabel": "populate",
+            "availableList": available,
+            "selectedList": selected,
+            **overrides,
+        }
+
+
+def route_pattern(route: str) -> re.Pattern[str]:
+    """Compile a route like "/1/cards/{card}" into a regex capturing its IDs."""
+    return re.compile(re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", route) + "$")
+
+
+def checklist_json(checklist: Checklist, params: Params) -> dict[str, Any]:
+    """Serialize a checklist with its items sorted by position."""
+    data = project(checklist.model_dump(exclude={"checkItems"}), params.get("fields"))
+    if params.get("checkItems", "all") != "none":
+        data["checkItems"] = [
+            project(item.model_dump(), params.get("checkItem_fields"))
+            for item in sorted(checklist.checkItems, key=lambda item: item.pos)
+        ]
+    return data
+
+
+class FakeTrello(httpx.AsyncBaseTransport):
+    """httpx transport serving the Trello API routes shopr uses from a FakeBoard.
+
+    Every request is delayed by `latency` plus up to `jitter` seconds and
+    counted by route. Requests beyond `rate_limit` per `rate_window`
+    seconds, and a random `error_rate` fraction of the rest, are answered
+    with 429 and a Retry-After header.
+    """
+
+    ROUTES = (
+        ("GET", "/1/batch", "batch"),
+        ("GET", "/1/boards/{board}", "get_board"),
+        ("GET", "/1/boards/{board}/cards", "get_board_cards"),
+        ("GET", "/1/boards/{board}/checklists", "get_board_checklists"),
+        ("GET", "/1/boards/{board}/lists", "get_board_lists"),
+        ("GET", "/1/boards/{board}/actions", "get_board_actions"),
+        ("GET", "/1/cards/{card}", "get_card"),
+        ("PUT", "/1/cards/{card}", "update_card"),
+        ("DELETE", "/1/cards/{card}/idLabels/{label}", "remove_label"),
+        ("POST", "/1/cards/{card}/checklists", "create_checklist"),
+        ("PUT", "/1/cards/{card}/checklist/{checklist}/checkItem/{item}", "update_item"),
+        ("GET", "/1/checklists/{checklist}", "get_checklist"),
+        ("PUT", "/1/checklists/{checklist}", "update_checklist"),
+        ("POST", "/1/checklists/{checklist}/checkItems", "add_item"),
+        ("GET", "/1/lists/{list}/cards", "get_list_cards"),
+    )
+
+    def __init__(
+        self,
+        board: FakeBoard,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        rate_limit: int | None = TOKEN_RATE_LIMIT,
+        rate_window: float = TOKEN_RATE_WINDOW,
+        error_rate: float = 0.0,
+        retry_after: float = 1.0,
+        seed: int = 0,
+    ):
+        """Initialize the fake.
+
+        Args:
+            board: Board to serve
+            latency: Seconds every request takes at least
+            jitter: Most extra seconds added at random to a request
+            rate_limit: Requests allowed per `rate_window`, or None for
+                no limit; Trello's own per-token limit by default
+            rate_window: Seconds the rate limit applies over
+            error_rate: Fraction of requests answered with 429 regardless
+                of the rate limit
+            retry_after: Seconds the injected 429s ask clients to wait
+            seed: Random seed for jitter and injected errors
+        """
+        self.board = board
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        # Requests received and routes resolved inside batches, by route
+        self.requests: Counter[str] = Counter()
+        self.batched: Counter[str] = Counter()
+        self.rate_limited = 0
+        self._started: deque[float] = deque()
+        self._routes = [
+            (method, route, route_pattern(route), handler)
+            for method, route, handler in self.ROUTES
+        ]
+
+    def _match(self, method: str, path: str) -> tuple[str, str, dict[str, str]]:
+        """Find the route and handler for a request.
+
+        Returns:
+            Route template, handler name and the IDs in the path
+        """
+        for route_method, route, pattern, handler in self._routes:
+            match = pattern.match(path)
+            if route_method == method and match is not None:
+                return route, handler, match.groupdict()
+        raise FakeTrelloError(404, f"Cannot {method} {path}")
+
+    def _throttle(self) -> float | None:
+        """Decide whether to reject a request with 429.
+
+        Returns:
+            Seconds the client should wait, or None to serve the request
+        """
+        now = time.monotonic()
+        while self._started and self._started[0] <= now - self.rate_window:
+            self._started.popleft()
+        if self.rate_limit is not None and len(self._started) >= self.rate_limit:
+            return self._started[0] + self.rate_window - now
+        if self.error_rate and self.rng.random() < self.error_rate:
+            return self.retry_after
+        self._started.append(now)
+        return None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Answer a request from the board."""
+        method = request.method
+        params = dict(request.url.params)
+        data = json.loads(request.content) if request.content else {}
+
+        delay = self.latency + self.rng.uniform(0.0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        try:
+            route, handler, ids = self._match(method, request.url.path)
+            self.requests[f"{method} {route}"] += 1
+            wait = self._throttle()
+            if wait is not None:
+                self.rate_limited += 1
+                return httpx.Response(
+                    429,
+                    headers={"Retry-After": f"{math.ceil(wait * 1000) / 1000}"},
+                    json={
+                        "error": "API_TOKEN_LIMIT_EXCEEDED",
+                        "message": "Rate limit exceeded",
+                    },
+                )
+            body = getattr(self, handler)(ids, params, data)
+        except FakeTrelloError as error:
+            return httpx.Response(error.status_code, text=error.message)
+        return httpx.Response(200, json=body)
+
+    def batch(self, ids: Params, params: Params, data: Any) -> Any:
+        """Resolve up to ten GET routes in one request."""
+        results = []
+        for url in params.get("urls", "").split(","):
+            route_url = httpx.URL(url)
+            try:
+                route, handler, route_ids = self._match("GET", f"/1{route_url.path}")
+                self.batched[f"GET {route}"] += 1
+                results.append(
+                    {"200": getattr(self, handler)(route_ids, dict(route_url.params), None)}
+                )
+            except FakeTrelloError as error:
+                results.append({str(error.status_code): error.message})
+        return results
+
+    def _card(self, id: str) -> Card:
+        """Get a card, or fail with 404."""
+        if id not in self.board.cards:
+            raise FakeTrelloError(404, NOT_FOUND)
+        return self.board.cards[id]
+
+    def _checklist(self, id: str) -> Checklist:
+        """Get a checklist, or fail with 404."""
+        if id not in self.board.checklists:
+            raise FakeTrelloError(404, NOT_FOUND)
+        return self.board.checklists[id]
+
+    def _check_board(self, id: str) -> None:
+        """Fail with 404 unless the ID is the served board's."""
+        if id != self.board.id:
+            raise FakeTrelloError(404, NOT_FOUND)
+
+    def _card_json(self, card: Card, params: Params) -> dict[str, Any]:
+        """Serialize a card, with its checklists nested if asked for."""
+        data = project(card.model_dump(exclude={"checklists"}), params.get("fields"))
+        if params.get("checklists", "none") == "all":
+            nested = {
+                "fields": params.get("checklist_fields"),
+                "checkItem_fields": params.get("checkItem_fields"),
+            }
+            data["checklists"] = [
+                checklist_json(self.board.checklists[id], nested)
+                for id in card.idChecklists
+            ]
+        return data
+
+    def get_board(self, ids: Params, params: Params, data: Any) -> Any:
+        """Get the board itself."""
+        self._check_board(ids["board"])
+        board = {
+            "id": self.board.id,
+            "name": "Fake board",
+            "dateLastActivity": self.board.last_activity,
+        }
+        return project(board, params.get("fields"))
+
+    def get_board_cards(self, ids: Params, params: Params, data: Any) -> Any:
+        """Get every card on the board."""
+        self._check_board(ids["board"])
+        return [self._card_json(card, params) for card in self.board.cards.values()]
+
+    def get_board_checklists(self, ids: Params, params: Params, data: Any) -> Any:
+        """Get every checklist on the board."""
+        self._check_board(ids["board"])
+        return [
+            checklist_json(checklist, params)
+            for checklist in self.board.checklists.values()
+        ]
+
+    def get_board_lists(self, ids: Params, params: Params, data: Any) -> Any:
+        """Get every list on the board."""
+        self._check_board(ids["board"])
+        return list(self.board.lists.values())
+
+    def get_board_actions(self, ids: Params, params: Params, data: Any) -> Any:
+        """Get the board's actions, newest first."""
+        self._check_board(ids["board"])
+        types = set(params["filter"].split(",")) if "filter" in params else None
+        since = params.get("since")
+        before = params.get("before")
+        actions = [
+            project(action, params.get("fields"))
+            for action in reversed(self.board.actions)
+            if (types is None or action["type"] in types)
+            and (since is None or action["id"] > since)
+            and (before is None or action["id"] < before)
+        ]
+        return actions[:int(params.get("limit", DEFAULT_ACTIONS_LIMIT))]
+
+    def get_card(self, ids: Params, params: Params, data: Any) -> Any:
+        """Get a card."""
+        return self._card_json(self._card(ids["card"]), params)
+
+    def update_card(self, ids: Params, params: Params, data: Any) -> Any:
+        """Update a card, e.g. to move it to another list."""
+        card = self._card(ids["card"])
+        if "idList" in data:
+            card.idList = data["idList"]
+        if "name" in data:
+            card.name = data["name"]
+        self.board.record("updateCard", card.id)
+        return self._card_json(card, {})
+
+    def remove_label(self, ids: Params, params: Params, data: Any) -> Any:
+        """Remove a label from a card."""
+        card = self._card(ids["card"])
+        card.labels = [label for label in card.labels if label["id"] != ids["label"]]
+        self.board.record("removeLabelFromCard", card.id)
+        return {"_value": None}
+
+    def create_checklist(self, ids: Params, params: Params, data: Any) -> Any:
+        """Add an empty checklist to a card."""
+        checklist = self.board.add_checklist(self._card(ids["card"]).id)
+        self.board.record("addChecklistToCard", checklist.idCard)
+        return checklist_json(checklist, {})
+
+    def update_item(self, ids: Params, params: Params, data: Any) -> Any:
+        """Rename, move or check off a checklist item."""
+        checklist = self._checklist(ids["checklist"])
+        for item in checklist.checkItems:
+            if item.id == ids["item"]:
+                break
+        else:
+            raise FakeTrelloError(404, NOT_FOUND)
+        for field in ("name", "pos", "state"):
+            if field in data:
+                setattr(item, field, data[field])
+        self.board.record("updateCheckItem", checklist.idCard)
+        return item.model_dump()
+
+    def get_checklist(self, ids: Params, params: Params, data: Any) -> Any:
+        """Get a checklist."""
+        return checklist_json(self._checklist(ids["checklist"]), params)
+
+    def update_checklist(self, ids: Params, params: Params, data: Any) -> Any:
+        """Update a checklist. Its items are changed one by one instead."""
+        checklist = self._checklist(ids["checklist"])
+        self.board.record("updateChecklist", checklist.idCard)
+        return checklist_json(checklist, {"checkItems": "none"})
+
+    def add_item(self, ids: Params, params: Params, data: Any) -> Any:
+        """Add an item to a checklist, at the bottom unless given a position."""
+        checklist = self._checklist(ids["checklist"])
+        pos = data.get("pos")
+        if pos is None:
+            pos = max((item.pos for item in checklist.checkItems), default=0) + POS_STEP
+        item = ChecklistItem(
+            id=self.board.new_id(), idChecklist=checklist.id, name=data["name"], pos=pos
+        )
+        checklist.checkItems.append(item)
+        self.board.record("createCheckItem", checklist.idCard)
+        return item.model_dump()
+
+    def get_list_cards(self, ids: Params, params: Params, data: Any) -> Any:
+        """Get the cards in a list."""
+        if ids["list"] not in self.board.lists:
+            raise FakeTrelloError(404, NOT_FOUND)
+        return [
+            self._card_json(card, params)
+            for card in self.board.cards.values()
+            if card.idList == ids["list"]
+        ]
@@ -1,20 +1,33 @@
 """Main shopr application logic."""
 
 import asyncio
+import functools
 import json
 import logging
 import re
 import sys
+from array import array
 from collections import defaultdict
+from collections.abc import Awaitable, Iterable, Iterator, Mapping, MutableMapping
 from pathlib import Path
-from typing import Any
+from typing import Any, TypeVar
 
+import httpx
+import sentry_sdk
 import simplemma
 
-from .elo import EloRank
+from .elo import HAS_NUMPY, EloRank
+from .metrics import write_prometheus
+from .store import JsonScoreStore, copy_scores, open_score_store
+from .tracing import span
 from .trello import (
+    DEFAULT_KEEPALIVE_EXPIRY,
+    DEFAULT_MAX_CONNECTIONS,
+    BoardSnapshot,
+    Card,
     Checklist,
     ChecklistItem,
+    ResponseCache,
     TrelloClient,
 )
 
@@ -29,6 +42,24 @@ logger = logging.getLogger("shopr:trelloClient")
 
 # Constants
 DEFAULT_SCORE = 1000.0
+# Where learned scores are kept between runs; a .json file, or a SQLite
+# database for any other suffix
+SCORES_PATH = Path("scores.json")
+# Where Trello responses are cached between runs
+DEFAULT_CACHE_DIR = ".shopr-cache"
+# Where `serve` listens for Trello webhook callbacks
+DEFAULT_WEBHOOK_HOST = "127.0.0.1"
+DEFAULT_WEBHOOK_PORT = 8787
+# Seconds between reads of the board actions feed in `sync --watch`
+DEFAULT_POLL_INTERVAL = 60.0
+# Training engines: the pairwise loop, or vectorized with numpy
+ELO_ENGINES = ("python", "numpy")
+# Maximum number of Trello requests a phase keeps in flight at once
+DEFAULT_CONCURRENCY = 8
+# Added to scores to get checklist positions, avoiding negative pos values
+POS_OFFSET = 100000
+# Spacing between items moved past the last item that stays in place
+POS_STEP = 1024
 UNSORTED_TAG = " [unsorted]"
 UNSORTED_RE = re.compile(r"\[unsorted\]")
 
@@ -43,6 +74,9 @@ UNIT_RE = re.compile(
     r")\b"
 )
 
+# Number of distinct names/words whose normalized form is memoized
+CANDIDATE_CACHE_SIZE = 16384
+
 # Item names are mostly Norwegian (Bokmål) with occasional English.
 LEMMA_LANGS = ("nb", "en")
 
@@ -61,16 +95,337 @@ STOPWORDS = {
 }
 
 
-# Type alias for scores
-Scores = defaultdict[str, float]
+T = TypeVar("T")
+
+
+# A full key as the IDs of its words, in the key's (sorted) word order
+KeyIds = tuple[int, ...]
+
+
+class WordTable:
+    """Interned words of a score table, each given a small integer ID."""
+
+    def __init__(self) -> None:
+        """Initialize an empty table."""
+        self.ids: dict[str, int] = {}
+        self.words: list[str] = []
+
+    def intern(self, word: str) -> int:
+        """Get the ID of a word, assigning one if it is new."""
+        id = self.ids.get(word)
+        if id is None:
+            id = self.ids[word] = len(self.words)
+            self.words.append(word)
+        return id
+
+    def key_ids(self, key: str, create: bool = False) -> KeyIds | None:
+        """Translate a comma-joined key into word IDs.
+
+        Args:
+            key: Key as stored in the score table
+            create: Intern words not seen before instead of giving up
+
+        Returns:
+            Word IDs, or None if the key has a word not in the table
+        """
+        if create:
+            return tuple(self.intern(word) for word in key.split(","))
+
+        ids = []
+        for word in key.split(","):
+            id = self.ids.get(word)
+            if id is None:
+                return None
+            ids.append(id)
+        return tuple(ids)
+
+    def key(self, ids: KeyIds) -> str:
+        """Translate word IDs back into a comma-joined key."""
+        return ",".join([self.words[id] for id in ids])
+
+
+class ScoreIndex:
+    """Word index over the multi-word keys of a score table.
+
+    Maps each word ID to the full keys containing it, so the best-overlap
+    fallback in `lookup` only examines keys sharing at least one word
+    with the query instead of scanning the whole table.
+    """
+
+    def __init__(
+        self,
+        words: WordTable,
+        slots: dict[KeyIds, int],
+        sequence: array,
+    ) -> None:
+        """Initialize an empty index.
+
+        Args:
+            words: Word table the keys' word IDs come from
+            slots: Slot per key of the score table
+            sequence: Insertion sequence per slot, used to break similarity
+                ties the same way a scan in table order would
+        """
+        self.words = words
+        self.slots = slots
+        self.sequence = sequence
+        # Lists rather than sets: most words appear in only a few keys, and
+        # keys are only ever removed when deleted from the table
+        self.word_keys: defaultdict[int, list[KeyIds]] = defaultdict(list)
+
+    def add(self, key: KeyIds) -> None:
+        """Index a newly inserted key."""
+        if len(key) < 2:
+            return
+
+        for word in set(key):
+            self.word_keys[word].append(key)
+
+    def remove(self, key: KeyIds) -> None:
+        """Drop a deleted key from the index."""
+        if len(key) < 2:
+            return
+
+        for word in set(key):
+            keys = self.word_keys[word]
+            keys.remove(key)
+            if not keys:
+                del self.word_keys[word]
+
+    def clear(self) -> None:
+        """Drop all keys from the index."""
+        self.word_keys.clear()
+
+    def best_overlap(self, query_words: set[str]) -> str | None:
+        """Find the indexed key most similar to the query words.
+
+        Args:
+            query_words: Candidate words of the item being looked up
+
+        Returns:
+            Key with the highest Jaccard similarity, or None if no key
+            shares a word with the query. Ties go to the earliest key.
+        """
+        # Count the query words each key shares; words the table has never
+        # seen can't overlap, but still count towards the union
+        overlaps: defaultdict[KeyIds, int] = defaultdict(int)
+        for word in query_words:
+            id = self.words.ids.get(word)
+            if id is None:
+                continue
+            for key in self.word_keys.get(id, ()):
+                overlaps[key] += 1
+
+        best_key = None
+        best_similarity = 0.0
+        best_order = 0
+        for key, overlap in overlaps.items():
+            similarity = overlap / (len(query_words) + len(set(key)) - overlap)
+            order = self.sequence[self.slots[key]]
+            if similarity > best_similarity or (
+                similarity == best_similarity and order < best_order
+            ):
+                best_similarity = similarity
+                best_key = key
+                best_order = order
+
+        return self.words.key(best_key) if best_key is not None else None
+
+
+class Scores(MutableMapping[str, float]):
+    """Score table defaulting to DEFAULT_SCORE, with a word index kept in sync.
+
+    Behaves like a `defaultdict` of comma-joined keys, but stores each key
+    as a tuple of interned word IDs and the scores in a flat array, which
+    the word index shares. With the index, a table takes somewhat more
+    memory than a dict of strings, not less.
+
+    Keys set or deleted since the table was loaded are tracked in `changed`
+    and `removed`, so a store only has to write those.
+    """
+
+    def __init__(self, data: Mapping[str, float] | None = None):
+        """Initialize the table.
+
+        Args:
+            data: Initial scores
+        """
+        self.words = WordTable()
+        # Slot in `score_array` and `sequence` per key, in insertion order
+        self.slots: dict[KeyIds, int] = {}
+        self.score_array = array("d")
+        self.sequence = array("q")
+        self._next_sequence = 0
+        self._free_slots: list[int] = []
+        self.index = ScoreIndex(self.words, self.slots, self.sequence)
+        self.changed: set[str] = set()
+        self.removed: set[str] = set()
+        if data:
+            self.update(data)
+
+    @classmethod
+    def from_saved(cls, data: Mapping[str, float]) -> "Scores":
+        """Create a table from stored scores, with no changes tracked.
+
+        Builds the interned structures in one pass instead of setting each
+        key, so loading doesn't hold every key in `changed` as well.
+
+        Args:
+            data: Scores as stored
+        """
+        scores = cls()
+        key_ids = scores.words.key_ids
+        for slot, key in enumerate(data):
+            ids = key_ids(key, create=True)
+            scores.slots[ids] = slot
+            scores.index.add(ids)
+        scores.score_array.extend(data.values())
+        scores.sequence.extend(range(len(scores.slots)))
+        scores._next_sequence = len(scores.slots)
+        return scores
+
+    def _slot(self, key: str) -> int | None:
+        """Get the slot of a key's score, if it has one."""
+        ids = self.words.key_ids(key)
+        return self.slots.get(ids) if ids is not None else None
+
+    def __getitem__(self, key: str) -> float:
+        """Get a score, setting missing keys to DEFAULT_SCORE like a defaultdict."""
+        slot = self._slot(key)
+        if slot is None:
+            self[key] = DEFAULT_SCORE
+            return DEFAULT_SCORE
+        return self.score_array[slot]
+
+    def __setitem__(self, key: str, value: float) -> None:
+        """Set a score, indexing the key if it is new."""
+        ids = self.words.key_ids(key, create=True)
+        slot = self.slots.get(ids)
+        if slot is not None:
+            self.score_array[slot] = value
+        else:
+            if self._free_slots:
+                slot = self._free_slots.pop()
+                self.score_array[slot] = value
+                self.sequence[slot] = self._next_sequence
+            else:
+                slot = len(self.score_array)
+                self.score_array.append(value)
+                self.sequence.append(self._next_sequence)
+            self._next_sequence += 1
+            self.slots[ids] = slot
+            self.index.add(ids)
+        self.changed.add(key)
+        self.removed.discard(key)
+
+    def __delitem__(self, key: str) -> None:
+        """Delete a score and its index entry."""
+        ids = self.words.key_ids(key)
+        if ids is None or ids not in self.slots:
+            raise KeyError(key)
+
+        self.index.remove(ids)
+        self._free_slots.append(self.slots.pop(ids))
+        self.changed.discard(key)
+        self.removed.add(key)
+
+    def __contains__(self, key: object) -> bool:
+        """Check for a score without setting a default."""
+        return isinstance(key, str) and self._slot(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over keys in insertion order."""
+        return (self.words.key(ids) for ids in self.slots)
+
+    def __len__(self) -> int:
+        """Get the number of scores."""
+        return len(self.slots)
+
+    def __repr__(self) -> str:
+        """Show the scores as a dict."""
+        return f"Scores({dict(self)!r})"
+
+    def get(self, key: str, default: float | None = None) -> float | None:  # type: ignore[override]
+        """Get a score, or `default` without setting it if missing."""
+        slot = self._slot(key)
+        return self.score_array[slot] if slot is not None else default
+
+    def items(self) -> Iterator[tuple[str, float]]:  # type: ignore[override]
+        """Iterate over keys and scores in insertion order."""
+        return (
+            (self.words.key(ids), self.score_array[slot])
+            for ids, slot in self.slots.items()
+        )
+
+    def setdefault(self, key: str, default: float) -> float:  # type: ignore[override]
+        """Get a score, setting it to `default` if missing."""
+        slot = self._slot(key)
+        if slot is None:
+            self[key] = default
+            return default
+        return self.score_array[slot]
+
+    def pop(self, key: str, *args: float) -> float:  # type: ignore[override]
+        """Remove a score and its index entry."""
+        slot = self._slot(key)
+        if slot is None:
+            if args:
+                return args[0]
+            raise KeyError(key)
+
+        value = self.score_array[slot]
+        del self[key]
+        return value
+
+    def popitem(self) -> tuple[str, float]:
+        """Remove the last inserted score and its index entry."""
+        if not self.slots:
+            raise KeyError("popitem(): scores are empty")
+
+        key = self.words.key(next(reversed(self.slots)))
+        return key, self.pop(key)
+
+    def clear(self) -> None:
+        """Remove all scores."""
+        self.removed.update(self)
+        self.changed.clear()
+        self.slots.clear()
+        # Emptied in place, since the index shares them
+        del self.score_array[:]
+        del self.sequence[:]
+        self._free_slots.clear()
+        self.index.clear()
+
+    def mark_saved(self) -> None:
+        """Forget the tracked changes once they have been stored."""
+        self.changed.clear()
+        self.removed.clear()
+
+    def copy(self) -> "Scores":
+        """Copy the table along with its index and tracked changes.
+
+        The interned structures are duplicated as they are, rather than
+        re-interning every key.
+        """
+        copy = Scores()
+        copy.words.ids = self.words.ids.copy()
+        copy.words.words = self.words.words.copy()
+        copy.slots.update(self.slots)
+        copy.score_array.extend(self.score_array)
+        copy.sequence.extend(self.sequence)
+        copy._next_sequence = self._next_sequence
+        copy._free_slots = self._free_slots.copy()
+        copy.index.word_keys.update(
+            (word, keys.copy()) for word, keys in self.index.word_keys.items()
+        )
+        copy.changed = set(self.changed)
+        copy.removed = set(self.removed)
+        return copy
 
 
 def make_scores(data: dict[str, float] | None = None) -> Scores:
-    """Create a scores defaultdict with DEFAULT_SCORE as default."""
-    scores: Scores = defaultdict(lambda: DEFAULT_SCORE)
-    if data:
-        scores.update(data)
-    return scores
+    """Create a scores table with DEFAULT_SCORE as default."""
+    return Scores(data)
 
 
 class Prefs:
@@ -86,7 +441,61 @@ class Prefs:
         self.populate_label: str = data["populateLabel"]
         self.available_list: str = data["availableList"]
         self.selected_list: str = data["selectedList"]
+        self.max_connections: int = data.get("maxConnections", DEFAULT_MAX_CONNECTIONS)
+        self.http2: bool = data.get("http2", False)
+        self.concurrency: int = data.get("concurrency", DEFAULT_CONCURRENCY)
+        self.elo_engine: str = data.get("eloEngine", "python")
+        self.cache_dir: str | None = data.get("cacheDir", DEFAULT_CACHE_DIR)
+        self.webhook_host: str = data.get("webhookHost", DEFAULT_WEBHOOK_HOST)
+        self.webhook_port: int = data.get("webhookPort", DEFAULT_WEBHOOK_PORT)
+        self.webhook_secret: str | None = data.get("webhookSecret")
+        self.webhook_callback_url: str | None = data.get("webhookCallbackUrl")
+        self.poll_interval: float = data.get("pollInterval", DEFAULT_POLL_INTERVAL)
+        self.scores_path = Path(data.get("scoresFile", SCORES_PATH))
+        prometheus_file = data.get("prometheusFile")
+        self.prometheus_file = Path(prometheus_file) if prometheus_file else None
+
+
+async def gather_limited(
+    awaitables: Iterable[Awaitable[T]],
+    limit: int = DEFAULT_CONCURRENCY,
+) -> list[T]:
+    """Await all awaitables concurrently, keeping at most `limit` in flight.
+
+    Args:
+        awaitables: Awaitables to run
+        limit: Maximum number running at the same time
+
+    Returns:
+        Results in the same order as the awaitables
+    """
+    semaphore = asyncio.Semaphore(limit)
 
+    async def run_one(awaitable: Awaitable[T]) -> T:
+        async with semaphore:
+            return await awaitable
+
+    async with asyncio.TaskGroup() as group:
+        tasks = [group.create_task(run_one(awaitable)) for awaitable in awaitables]
+
+    return [task.result() for task in tasks]
+
+
+def describe_error(error: BaseException) -> str:
+    """Describe an error for the log, including every error a group wraps.
+
+    Failures in `gather_limited` arrive as an ExceptionGroup, whose own
+    message only says how many sub-exceptions it holds.
+
+    Args:
+        error: Error to describe
+
+    Returns:
+        The error's message, or its sub-exceptions' messages joined by "; "
+    """
+    if isinstance(error, BaseExceptionGroup):
+        return "; ".join(describe_error(inner) for inner in error.exceptions)
+    return str(error)
 
 
 def create_client(prefs: Prefs) -> TrelloClient:
@@ -98,61 +507,98 @@ def create_client(prefs: Prefs) -> TrelloClient:
     Returns:
         TrelloClient instance
     """
-    return TrelloClient(key=prefs.key, token=prefs.token)
+    limits = httpx.Limits(
+        max_connections=prefs.max_connections,
+        max_keepalive_connections=prefs.max_connections,
+        keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY,
+    )
+    response_cache = ResponseCache(prefs.cache_dir) if prefs.cache_dir else None
+    return TrelloClient(
+        key=prefs.key,
+        token=prefs.token,
+        limits=limits,
+        http2=prefs.http2,
+        response_cache=response_cache,
+    )
+
+
+async def load_checklists(
+    client: TrelloClient,
+    id_checklists: list[str],
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> list[Checklist]:
+    """Get checklists, concurrently fetching any the client has not cached.
+
+    Args:
+        client: Trello client
+        id_checklists: Checklist IDs to get
+        concurrency: Maximum number of checklist fetches in flight
+
+    Returns:
+        Checklists in the same order as the IDs
+    """
+    return await gather_limited(
+        (client.get_checklist(id_checklist) for id_checklist in id_checklists),
+        concurrency,
+    )
 
 
 async def get_train_set(
     client: TrelloClient,
     prefs: Prefs,
+    snapshot: BoardSnapshot | None = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
 ) -> list[Checklist]:
     """Get list of checklists to train on.
 
     Args:
         client: Trello client
         prefs: Preferences
+        snapshot: Board snapshot (fetched if not given)
+        concurrency: Maximum number of checklist fetches in flight
 
     Returns:
         List of checklists marked for training
     """
-    cards = await client.get_board_cards(prefs.board)
-    train_checklist_ids: list[str] = []
+    if snapshot is None:
+        snapshot = await client.get_board_snapshot(prefs.board)
 
-    for card in cards:
-        # Check if card has the train label
-        has_train_label = any(
-            label.get("name") == prefs.train_label
-            for label in card.labels
-        )
-        if has_train_label:
-            train_checklist_ids.extend(card.idChecklists)
-
-    train_checklists: list[Checklist] = []
-    for checklist_id in train_checklist_ids:
-        checklist = await client.get_checklist(checklist_id)
-        train_checklists.append(checklist)
+    train_checklist_ids: list[str] = []
+    for card in snapshot.cards_with_label(prefs.train_label):
+        train_checklist_ids.extend(card.idChecklists)
 
-    return train_checklists
+    with span("shopr.get_train_set", f"{len(train_checklist_ids)} checklists"):
+        return await load_checklists(client, train_checklist_ids, concurrency)
 
 
 async def reset_label(
     client: TrelloClient,
     label_name: str,
-    id_cards: list[str],
+    cards: list[Card],
+    concurrency: int = DEFAULT_CONCURRENCY,
 ) -> None:
     """Remove label from cards.
 
+    Uses the labels already loaded on the cards, so no card is refetched.
+
     Args:
         client: Trello client
         label_name: Name of label to remove
-        id_cards: List of card IDs
+        cards: Cards to remove the label from
+        concurrency: Maximum number of removals in flight
     """
-    for id_card in id_cards:
-        card = await client.get_card(id_card)
-        for label in card.labels:
-            if label.get("name") == label_name:
-                await client.remove_label(card.id, label["id"])
+    await gather_limited(
+        (
+            client.remove_label(card.id, label["id"])
+            for card in cards
+            for label in card.labels
+            if label.get("name") == label_name
+        ),
+        concurrency,
+    )
 
 
+@functools.lru_cache(maxsize=CANDIDATE_CACHE_SIZE)
 def singularize(word: str) -> str:
     """Lemmatize a word so inflected forms resolve to the same candidate.
 
@@ -168,14 +614,18 @@ def singularize(word: str) -> str:
     return simplemma.lemmatize(word, lang=LEMMA_LANGS)
 
 
-def lookup_candidates(name: str) -> list[str]:
+@functools.lru_cache(maxsize=CANDIDATE_CACHE_SIZE)
+def lookup_candidates(name: str) -> tuple[str, ...]:
     """Strip useless characters and return candidate identifiers.
 
+    Results are memoized, since the same names recur across checklists
+    and are looked up several times per run.
+
     Args:
         name: Item name
 
     Returns:
-        List of candidate identifiers
+        Sorted tuple of candidate identifiers
     """
     # Remove unsorted tag
     stripped = name.lower().replace("[unsorted]", "")
@@ -190,11 +640,23 @@ def lookup_candidates(name: str) -> list[str]:
     words = [word for word in stripped.split(" ") if word]
     words = [singularize(word) for word in words if word not in STOPWORDS]
 
-    candidates = sorted(words)
+    candidates = tuple(sorted(words))
     logger.debug(f"Lookup {name} => {candidates}")
     return candidates
 
 
+def candidate_cache_info() -> dict[str, dict[str, int]]:
+    """Get hit/miss statistics for the candidate extraction caches.
+
+    Returns:
+        Cache statistics (hits, misses, maxsize, currsize) per function
+    """
+    return {
+        "singularize": singularize.cache_info()._asdict(),
+        "lookup_candidates": lookup_candidates.cache_info()._asdict(),
+    }
+
+
 def lookup(scores: Scores, name: str) -> float:
     """Look up score for an item name.
 
@@ -205,35 +667,67 @@ def lookup(scores: Scores, name: str) -> float:
     Returns:
         Score for the item
     """
-    candidates = lookup_candidates(name)
-    if not candidates:
-        return DEFAULT_SCORE
+    return lookup_many(scores, [name])[0][0]
 
-    full_key = ",".join(candidates)
-    if full_key in scores:
-        return scores[full_key]
 
+def lookup_many(scores: Scores, names: Iterable[str]) -> list[tuple[float, bool]]:
+    """Look up scores for several item names at once.
+
+    All names are normalized first and exact hits resolved directly. The
+    remaining misses are deduplicated by their candidates, so names that
+    normalize alike (e.g. "Eggs" and "eggs 2") share one best-overlap
+    search.
+
+    Args:
+        scores: Score storage
+        names: Item names
+
+    Returns:
+        Tuple of (score, whether the item's full key has a score of its
+        own) per name, in the same order
+    """
+    all_candidates = [lookup_candidates(name) for name in names]
+
+    results: dict[tuple[str, ...], tuple[float, bool]] = {}
+    misses: list[tuple[str, ...]] = []
+    for candidates in all_candidates:
+        if candidates in results:
+            continue
+
+        full_key = ",".join(candidates)
+        score = scores.get(full_key)
+        if not candidates:
+            results[candidates] = (DEFAULT_SCORE, score is not None)
+        elif score is not None:
+            results[candidates] = (score, True)
+        else:
+            # Placeholder until the misses are resolved below
+            results[candidates] = (DEFAULT_SCORE, False)
+            misses.append(candidates)
+
+    for candidates in misses:
+        results[candidates] = (partial_score(scores, candidates), False)
+
+    return [results[candidates] for candidates in all_candidates]
+
+
+def partial_score(scores: Scores, candidates: tuple[str, ...]) -> float:
+    """Get the score of the closest known item for candidates without one.
+
+    Args:
+        scores: Score storage
+        candidates: Candidate words of an item whose full key has no score
+
+    Returns:
+        Score of the best match, or DEFAULT_SCORE if nothing matches
+    """
     # No exact match. Look for the known item whose words overlap the most
     # (by Jaccard similarity) rather than just any single shared word - a
     # single shared word (e.g. "chicken" in both "chicken broth" and
     # "chicken thighs") is a weak, bleed-prone signal on its own.
-    query_words = set(candidates)
-    best_key = None
-    best_similarity = 0.0
-    for key in scores:
-        if "," not in key:
-            continue
-        key_words = set(key.split(","))
-        overlap = query_words & key_words
-        if not overlap:
-            continue
-        similarity = len(overlap) / len(query_words | key_words)
-        if similarity > best_similarity:
-            best_similarity = similarity
-            best_key = key
-
+    best_key = scores.index.best_overlap(set(candidates))
     if best_key is not None:
-        logger.debug(f"Lookup {name} => best overlap candidate {best_key}")
+        logger.debug(f"Lookup {candidates} => best overlap candidate {best_key}")
         return scores[best_key]
 
     # Last resort: fall back to the longest single word with a score.
@@ -242,7 +736,7 @@ def lookup(scores: Scores, name: str) -> float:
         return DEFAULT_SCORE
 
     candidate = max(scored_words, key=len)
-    logger.debug(f"Lookup {name} => final candidate {candidate}")
+    logger.debug(f"Lookup {candidates} => final candidate {candidate}")
     return scores[candidate]
 
 
@@ -257,72 +751,219 @@ def update(scores: Scores, name: str, score: float) -> None:
     candidates = lookup_candidates(name)
     # Save score for all words in the item, as well as the full string
     full_key = ",".join(candidates)
-    for candidate in [full_key] + candidates:
+    for candidate in (full_key, *candidates):
         scores[candidate] = score
 
 
+def needs_unsorted_tag(name: str, exact: bool) -> bool:
+    """Check whether an item should be tagged as unsorted.
+
+    Items whose full key has no score of its own are only placed by a
+    partial match, so they are tagged for the user to sort by hand.
+
+    Args:
+        name: Item name
+        exact: Whether the item's full key has a score, as reported by
+            `lookup_many`
+
+    Returns:
+        True if the item has no exact score and is not tagged yet
+    """
+    return not exact and not UNSORTED_RE.search(name)
+
+
+def longest_increasing_run(values: list[float]) -> set[int]:
+    """Find a longest strictly increasing subsequence.
+
+    Args:
+        values: Sequence to search
+
+    Returns:
+        Indices of the subsequence's elements
+    """
+    # tails[k] is the index ending the best subsequence of length k + 1
+    tails: list[int] = []
+    previous: list[int | None] = [None] * len(values)
+    for i, value in enumerate(values):
+        low, high = 0, len(tails)
+        while low < high:
+            middle = (low + high) // 2
+            if values[tails[middle]] < value:
+                low = middle + 1
+            else:
+                high = middle
+        previous[i] = tails[low - 1] if low > 0 else None
+        if low == len(tails):
+            tails.append(i)
+        else:
+            tails[low] = i
+
+    kept: set[int] = set()
+    index = tails[-1] if tails else None
+    while index is not None:
+        kept.add(index)
+        index = previous[index]
+    return kept
+
+
+def plan_moves(
+    items: list[ChecklistItem],
+    ideal: dict[str, float],
+) -> dict[str, float]:
+    """Plan the fewest position changes that put items in score order.
+
+    Items are sorted by their ideal position (ties keep their current
+    order). The longest run of items that is already in that order stays
+    in place; every other item moves into the gap between its new
+    neighbours, at its ideal position when that fits.
+
+    Args:
+        items: Checklist items
+        ideal: Ideal position per item ID
+
+    Returns:
+        New position per item ID, for the items that need to move
+    """
+    target = sorted(items, key=lambda item: (ideal[item.id], item.pos))
+    kept = longest_increasing_run([item.pos for item in target])
+
+    moves: dict[str, float] = {}
+    start = 0
+    while start < len(target):
+        if start in kept:
+            start += 1
+            continue
+
+        # Collect the run of moved items between two kept neighbours
+        end = start
+        while end < len(target) and end not in kept:
+            end += 1
+        run = target[start:end]
+        low = target[start - 1].pos if start > 0 else 0
+        high = target[end].pos if end < len(target) else None
+
+        wanted = [ideal[item.id] for item in run]
+        upper = float("inf") if high is None else high
+        fits = all(a < b for a, b in zip([low, *wanted], [*wanted, upper]))
+        for offset, item in enumerate(run, start=1):
+            if fits:
+                pos = wanted[offset - 1]
+            elif high is None:
+                pos = low + POS_STEP * offset
+            else:
+                pos = low + (high - low) * offset / (len(run) + 1)
+            moves[item.id] = pos
+
+        start = end
+
+    return moves
+
+
+async def order_card(
+    client: TrelloClient,
+    scores: Scores,
+    card: Card,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> None:
+    """Order the checklists on one card according to scores.
+
+    Args:
+        client: Trello client
+        scores: Score storage
+        card: Card to order
+        concurrency: Maximum number of item updates in flight
+    """
+    checklists = await load_checklists(client, card.idChecklists, concurrency)
+
+    writes: list[Awaitable[dict[str, Any]]] = []
+    for checklist in checklists:
+        looked_up = lookup_many(scores, [item.name for item in checklist.checkItems])
+        ideal = {
+            item.id: int(score + POS_OFFSET)
+            for item, (score, _) in zip(checklist.checkItems, looked_up)
+        }
+        moves = plan_moves(checklist.checkItems, ideal)
+        logger.debug(
+            f"Moving {len(moves)} of {len(checklist.checkItems)} items"
+        )
+
+        for checklist_item, (_, exact) in zip(checklist.checkItems, looked_up):
+            needs_tag = needs_unsorted_tag(checklist_item.name, exact)
+            if checklist_item.id not in moves and not needs_tag:
+                continue
+
+            new_name = checklist_item.name
+            if needs_tag:
+                new_name = f"{checklist_item.name}{UNSORTED_TAG}"
+
+            # Create updated checklist item
+            updated_item = ChecklistItem(
+                id=checklist_item.id,
+                idChecklist=checklist_item.idChecklist,
+                name=new_name,
+                pos=moves.get(checklist_item.id, checklist_item.pos),
+                state=checklist_item.state,
+            )
+
+            writes.append(
+                client.update_checklist_item(
+                    card.id,
+                    checklist.id,
+                    checklist_item.id,
+                    updated_item,
+                )
+            )
+
+    await gather_limited(writes, concurrency)
+
+
 async def order_list(
     client: TrelloClient,
     scores: Scores,
     prefs: Prefs,
-) -> None:
+    snapshot: BoardSnapshot | None = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> list[Card]:
     """Order list according to scores.
 
+    Cards are ordered concurrently. A card that fails to order is logged
+    and keeps its label, without affecting the other cards.
+
     Args:
         client: Trello client
         scores: Score storage
         prefs: Preferences
-    """
-    cards = await client.get_board_cards(prefs.board)
+        snapshot: Board snapshot (fetched if not given)
+        concurrency: Maximum number of cards, and of item updates per
+            card, in flight
 
-    for card in cards:
-        # Check if card has the order label
-        has_order_label = any(
-            label.get("name") == prefs.order_label
-            for label in card.labels
-        )
-        if not has_order_label:
-            continue
+    Returns:
+        Cards that failed to order
+    """
+    if snapshot is None:
+        snapshot = await client.get_board_snapshot(prefs.board)
 
+    async def order_one(card: Card) -> bool:
         logger.info(f"Ordering {card.name}")
+        try:
+            with span("shopr.order_card", card.name):
+                await order_card(client, scores, card, concurrency)
+        except Exception as error:
+            logger.error(f"Ordering {card.name} failed: {describe_error(error)}")
+            return False
+        logger.info(f"Ordering {card.name} done")
+        return True
 
-        for id_checklist in card.idChecklists:
-            checklist = await client.get_checklist(id_checklist)
-
-            for checklist_item in checklist.checkItems:
-                logger.debug(f"Processing item: {checklist_item.name}")
-                # Avoid negative pos values
-                pos = int(lookup(scores, checklist_item.name) + 100000)
-
-                if checklist_item.pos != pos:
-                    # Determine if item should have unsorted tag
-                    candidates = lookup_candidates(checklist_item.name)
-                    full_key = ",".join(candidates)
-                    has_score = full_key in scores
-                    has_unsorted_tag = bool(UNSORTED_RE.search(checklist_item.name))
-
-                    new_name = checklist_item.name
-                    if not has_score and not has_unsorted_tag:
-                        new_name = f"{checklist_item.name}{UNSORTED_TAG}"
-
-                    # Create updated checklist item
-                    updated_item = ChecklistItem(
-                        id=checklist_item.id,
-                        idChecklist=checklist_item.idChecklist,
-                        name=new_name,
-                        pos=pos,
-                        state=checklist_item.state,
-                    )
-
-                    await client.update_checklist_item(
-                        card.id,
-                        id_checklist,
-                        checklist_item.id,
-                        updated_item,
-                    )
+    cards = snapshot.cards_with_label(prefs.order_label)
+    ordered = await gather_limited((order_one(card) for card in cards), concurrency)
 
-        logger.info(f"Ordering {card.name} done")
-        await reset_label(client, prefs.order_label, [card.id])
+    await reset_label(
+        client,
+        prefs.order_label,
+        [card for card, ok in zip(cards, ordered) if ok],
+        concurrency,
+    )
+    return [card for card, ok in zip(cards, ordered) if not ok]
 
 
 def parse_item_quantity(item_name: str) -> tuple[str, int]:
@@ -364,30 +1005,32 @@ def format_item_with_quantity(base_name: str, quantity: int) -> str:
 
 async def populate_shopping_list(
     client: TrelloClient,
+    scores: Scores,
     prefs: Prefs,
+    snapshot: BoardSnapshot | None = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
 ) -> None:
     """Populate shopping list from selected recipes.
 
+    Items are inserted already in score order, tagged like `order_list`
+    would tag them, so the new list needs no reordering.
+
     Args:
         client: Trello client
+        scores: Score storage
         prefs: Preferences
+        snapshot: Board snapshot (fetched if not given)
+        concurrency: Maximum number of requests in flight
     """
-    # Get all cards on the board
-    cards = await client.get_board_cards(prefs.board)
+    if snapshot is None:
+        snapshot = await client.get_board_snapshot(prefs.board)
 
     # Find cards with the populate label
-    for card in cards:
-        has_populate_label = any(
-            label.get("name") == prefs.populate_label
-            for label in card.labels
-        )
-        if not has_populate_label:
-            continue
-
+    for card in snapshot.cards_with_label(prefs.populate_label):
         logger.info(f"Populating shopping list from {card.name}")
 
         # Get cards from the selected recipes list
-        selected_recipes = await client.get_list_cards(prefs.selected_list)
+        selected_recipes = snapshot.list_cards(prefs.selected_list)
         logger.info(f"Found {len(selected_recipes)} selected recipes")
 
         # Keep track of items and their quantities to merge duplicates
@@ -404,14 +1047,21 @@ async def populate_shopping_list(
             # Use the first existing checklist
             target_checklist_id = card.idChecklists[0]
 
+        # Get the checklists of all recipe cards at once; they are reused
+        # when resetting checkmarks below
+        recipe_checklists = await gather_limited(
+            (
+                load_checklists(client, recipe_card.idChecklists, concurrency)
+                for recipe_card in selected_recipes
+            ),
+            concurrency,
+        )
+
         # For each recipe card in the selected list
-        for recipe_card in selected_recipes:
+        for recipe_card, checklists in zip(selected_recipes, recipe_checklists):
             logger.info(f"Processing recipe: {recipe_card.name}")
 
-            # Get all checklists on the recipe card
-            for id_checklist in recipe_card.idChecklists:
-                checklist = await client.get_checklist(id_checklist)
-
+            for checklist in checklists:
                 # Copy each item from the recipe checklist to the populate card's checklist
                 for checklist_item in checklist.checkItems:
                     # Skip checked items (treated as optional/not needed)
@@ -435,38 +1085,64 @@ async def populate_shopping_list(
                         item_data[base_name_lower] = (base_name, quantity)
                         logger.debug(f"Added item: {checklist_item.name}")
 
-        # Add all items with their merged quantities to the checklist
-        for original_name, total_quantity in item_data.values():
-            # Preserve the original casing of the first occurrence
-            formatted_name = format_item_with_quantity(original_name, total_quantity)
-            await client.add_checklist_item(
-                target_checklist_id,
-                formatted_name
+        # Add all items with their merged quantities to the checklist,
+        # positioned by score
+        # Preserve the original casing of the first occurrence
+        formatted_names = [
+            format_item_with_quantity(original_name, total_quantity)
+            for original_name, total_quantity in item_data.values()
+        ]
+        new_items: list[tuple[int, str]] = []
+        for formatted_name, (score, exact) in zip(
+            formatted_names, lookup_many(scores, formatted_names)
+        ):
+            if needs_unsorted_tag(formatted_name, exact):
+                formatted_name = f"{formatted_name}{UNSORTED_TAG}"
+            new_items.append((int(score + POS_OFFSET), formatted_name))
+
+        # Give equally scored items distinct positions, so their order is
+        # settled and a later order_list has nothing to move
+        new_items.sort(key=lambda new_item: new_item[0])
+        insertions: list[Awaitable[ChecklistItem]] = []
+        previous_pos: int | None = None
+        for pos, formatted_name in new_items:
+            if previous_pos is not None and pos <= previous_pos:
+                pos = previous_pos + 1
+            previous_pos = pos
+            insertions.append(
+                client.add_checklist_item(target_checklist_id, formatted_name, pos)
             )
             logger.debug(f"Added merged item: {formatted_name}")
 
-        # Move recipe cards back to the available recipes list
-        for recipe_card in selected_recipes:
-            # Reset all checkmarks before moving back to available pool
-            for id_checklist in recipe_card.idChecklists:
-                checklist = await client.get_checklist(id_checklist)
-                for checklist_item in checklist.checkItems:
-                    if checklist_item.state == "complete":
-                        # Reset checked items to incomplete
-                        checklist_item.state = "incomplete"
-                        await client.update_checklist_item(
-                            recipe_card.id,
-                            id_checklist,
-                            checklist_item.id,
-                            checklist_item,
-                        )
-                        logger.debug(f"Reset checkmark for item: {checklist_item.name}")
+        await gather_limited(insertions, concurrency)
 
-            await client.move_card_to_list(recipe_card.id, prefs.available_list)
+        # Move recipe cards back to the available recipes list
+        for recipe_card, checklists in zip(selected_recipes, recipe_checklists):
+            with span("shopr.populate_recipe", recipe_card.name):
+                # Reset all checkmarks before moving back to available pool
+                for checklist in checklists:
+                    for checklist_item in checklist.checkItems:
+                        if checklist_item.state == "complete":
+                            # Reset checked items to incomplete
+                            checklist_item.state = "incomplete"
+                            await client.update_checklist_item(
+                                recipe_card.id,
+                                checklist.id,
+                                checklist_item.id,
+                                checklist_item,
+                            )
+                            logger.debug(
+                                f"Reset checkmark for item: {checklist_item.name}"
+                            )
+
+                await client.move_card_to_list(recipe_card.id, prefs.available_list)
+                # Keep the snapshot current, so a later populate card does
+                # not use the same recipes again
+                recipe_card.idList = prefs.available_list
             logger.info(f"Moved recipe {recipe_card.name} back to available list")
 
         # Remove the populate label when done
-        await reset_label(client, prefs.populate_label, [card.id])
+        await reset_label(client, prefs.populate_label, [card])
         logger.info(f"Populating {card.name} done")
 
 
@@ -485,28 +1161,21 @@ async def list_board_lists(client: TrelloClient, prefs: Prefs) -> None:
         logger.error(f"Error fetching board lists: {error}")
 
 
-def train(checklist: Checklist, old_scores: Scores) -> Scores:
-    """Train scores using ELO ranking.
+def python_deltas(
+    elo: EloRank,
+    items: list[ChecklistItem],
+    starting_scores: dict[str, float],
+) -> defaultdict[str, float]:
+    """Sum each item's rating change over all pairs, one pair at a time.
 
     Args:
-        checklist: Checklist to train on
-        old_scores: Previous scores
+        elo: ELO ranking system
+        items: Checklist items in checklist order
+        starting_scores: Starting rating per item name
 
     Returns:
-        Updated scores
+        Total rating change per item name
     """
-    logger.info(f"Training on {len(checklist.checkItems)} items")
-
-    # Create new scores dict from old scores
-    scores = make_scores(dict(old_scores))
-
-    # Create ELO ranking system
-    elo = EloRank()
-
-    # Snapshot starting ratings so every comparison in this round is judged
-    # against the same baseline, regardless of the items' iteration order.
-    items = checklist.checkItems
-    starting_scores = {item.name: lookup(scores, item.name) for item in items}
     deltas: defaultdict[str, float] = defaultdict(float)
 
     # Process each unordered pair of items exactly once
@@ -530,14 +1199,241 @@ def train(checklist: Checklist, old_scores: Scores) -> Scores:
             deltas[current.name] += elo.update_rating(current_expected, current_actual, 0.0)
             deltas[compare.name] += elo.update_rating(compare_expected, compare_actual, 0.0)
 
+    return deltas
+
+
+def numpy_deltas(
+    elo: EloRank,
+    items: list[ChecklistItem],
+    starting_scores: dict[str, float],
+) -> defaultdict[str, float]:
+    """Sum each item's rating change over all pairs with array operations.
+
+    Agrees with `python_deltas` to within floating-point rounding, not
+    bit for bit: numpy computes the powers and sums the changes in a
+    different order than the pairwise loop.
+
+    Args:
+        elo: ELO ranking system
+        items: Checklist items in checklist order
+        starting_scores: Starting rating per item name
+
+    Returns:
+        Total rating change per item name
+    """
+    names = [item.name for item in items]
+    changes = elo.pairwise_changes(
+        [starting_scores[name] for name in names],
+        [item.pos for item in items],
+    )
+    deltas: defaultdict[str, float] = defaultdict(float)
+    # Items sharing a name share one total
+    for name, total in zip(names, changes.sum(axis=1).tolist()):
+        deltas[name] += total
+
+    return deltas
+
+
+def train(
+    checklist: Checklist,
+    old_scores: Scores,
+    engine: str = "python",
+) -> Scores:
+    """Train scores using ELO ranking.
+
+    Args:
+        checklist: Checklist to train on
+        old_scores: Previous scores
+        engine: "python" for the pairwise loop, or "numpy" for the
+            vectorized engine (falls back to "python" without numpy),
+            whose scores match to within floating-point rounding
+
+    Returns:
+        Updated scores
+    """
+    if engine not in ELO_ENGINES:
+        raise ValueError(f"Unknown training engine: {engine}")
+    if engine == "numpy" and not HAS_NUMPY:
+        logger.warning("numpy is not installed, training with the python engine")
+        engine = "python"
+
+    logger.info(f"Training on {len(checklist.checkItems)} items")
+
+    # Create new scores dict from old scores
+    scores = old_scores.copy()
+
+    # Create ELO ranking system
+    elo = EloRank()
+
+    # Snapshot starting ratings so every comparison in this round is judged
+    # against the same baseline, regardless of the items' iteration order.
+    items = checklist.checkItems
+    names = [item.name for item in items]
+    starting_scores = {
+        name: score for name, (score, _) in zip(names, lookup_many(scores, names))
+    }
+    if engine == "numpy":
+        deltas = numpy_deltas(elo, items, starting_scores)
+    else:
+        deltas = python_deltas(elo, items, starting_scores)
+
     for item in items:
         update(scores, item.name, starting_scores[item.name] + deltas[item.name])
 
     return scores
 
 
+def load_scores(path: Path = SCORES_PATH) -> Scores:
+    """Load scores saved by an earlier run.
+
+    Args:
+        path: Scores file, JSON or SQLite depending on its suffix
+
+    Returns:
+        Saved scores, or an empty table if there are none yet
+    """
+    store = open_score_store(path)
+    try:
+        return Scores.from_saved(store.load())
+    finally:
+        store.close()
+
+
+def save_scores(scores: Scores, path: Path = SCORES_PATH) -> None:
+    """Save the scores changed since they were loaded.
+
+    Args:
+        scores: Score storage
+        path: Scores file, JSON or SQLite depending on its suffix
+    """
+    store = open_score_store(path)
+    try:
+        store.save(scores, scores.changed, scores.removed)
+    finally:
+        store.close()
+    scores.mark_saved()
+
+
+async def train_phase(
+    client: TrelloClient,
+    scores: Scores,
+    prefs: Prefs,
+    snapshot: BoardSnapshot | None = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    scores_path: Path = SCORES_PATH,
+) -> Scores:
+    """Train on the cards marked for training, save and reset their labels.
+
+    Args:
+        client: Trello client
+        scores: Score storage
+        prefs: Preferences
+        snapshot: Board snapshot (fetched if not given)
+        concurrency: Maximum number of requests in flight
+        scores_path: Where the trained scores are saved
+
+    Returns:
+        Trained scores
+    """
+    if snapshot is None:
+        snapshot = await client.get_board_snapshot(prefs.board)
+
+    # Get training data
+    checklists = await get_train_set(client, prefs, snapshot, concurrency)
+
+    # Train on all checklists
+    for checklist in checklists:
+        with span("shopr.train", checklist.id):
+            scores = train(checklist, scores, prefs.elo_engine)
+
+    save_scores(scores, scores_path)
+
+    # Reset training labels
+    await reset_label(
+        client,
+        prefs.train_label,
+        snapshot.cards_with_label(prefs.train_label),
+        concurrency,
+    )
+
+    return scores
+
+
+async def run_phases(
+    client: TrelloClient,
+    scores: Scores,
+    prefs: Prefs,
+    snapshot: BoardSnapshot,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    scores_path: Path = SCORES_PATH,
+) -> tuple[Scores, list[Card]]:
+    """Run the train, order and populate phases on the cards in a snapshot.
+
+    Args:
+        client: Trello client
+        scores: Score storage
+        prefs: Preferences
+        snapshot: Cards to process, including the selected recipes if any
+            card is marked for populating
+        concurrency: Maximum number of requests in flight
+        scores_path: Where the trained scores are saved
+
+    Returns:
+        Trained scores, and the cards that failed to order
+    """
+    with client.metrics.phase("train"):
+        scores = await train_phase(
+            client, scores, prefs, snapshot, concurrency, scores_path
+        )
+
+    # Order lists
+    with client.metrics.phase("order"):
+        failed = await order_list(client, scores, prefs, snapshot, concurrency)
+
+    # Populate shopping list
+    with client.metrics.phase("populate"):
+        await populate_shopping_list(client, scores, prefs, snapshot, concurrency)
+
+    return scores, failed
+
+
+async def run(client: TrelloClient, prefs: Prefs) -> None:
+    """Run the train, order and populate phases once.
+
+    The run is a Sentry transaction, with spans for its phases, cards,
+    recipes and requests. It ends by logging the client's metrics as
+    JSON, and writing them to `prefs.prometheus_file` if set.
+
+    Args:
+        client: Trello client
+        prefs: Preferences
+    """
+    # Traced as one transaction when Sentry is set up to sample it
+    with sentry_sdk.start_transaction(op="shopr.run", name="run"):
+        # Fetch the board once and share it between all phases
+        with client.metrics.phase("snapshot"):
+            snapshot = await client.get_board_snapshot(prefs.board)
+
+        scores = load_scores(prefs.scores_path)
+        await run_phases(
+            client, scores, prefs, snapshot, prefs.concurrency, prefs.scores_path
+        )
+
+    logger.debug(f"Candidate cache: {candidate_cache_info()}")
+    stats = client.stats()
+    logger.info(f"Run metrics: {json.dumps(stats)}")
+    if prefs.prometheus_file is not None:
+        write_prometheus(stats, prefs.prometheus_file)
+
+
 async def main() -> None:
     """Main entry point."""
+    if "bench" in sys.argv[1:]:
+        # Imported here since the benchmarks themselves build on this module
+        from .bench import bench
+
+        sys.exit(await bench(sys.argv[sys.argv.index("bench") + 1:]))
+
     # Load preferences
     prefs_path = Path(".trello.json")
     if not prefs_path.exists():
@@ -547,45 +1443,68 @@ async def main() -> None:
     prefs_data = json.loads(prefs_path.read_text())
     prefs = Prefs(prefs_data)
 
-    # Create client
-    client = create_client(prefs)
+    for flag in ("--import-scores", "--export-scores"):
+        if flag not in sys.argv:
+            continue
 
-    # Check for command line arguments
-    if "--list-ids" in sys.argv:
-        await list_board_lists(client, prefs)
+        # JSON stays the format for moving scores in and out of any store
+        args = sys.argv[sys.argv.index(flag) + 1:]
+        if not args:
+            logger.error(f"Usage: shopr.py {flag} <file.json>")
+            sys.exit(1)
+
+        store = open_score_store(prefs.scores_path)
+        json_store = JsonScoreStore(args[0])
+        try:
+            if flag == "--import-scores":
+                count = copy_scores(json_store, store)
+            else:
+                count = copy_scores(store, json_store)
+        finally:
+            store.close()
+        logger.info(f"Copied {count} scores")
         return
 
-    # Get training data
-    checklists = await get_train_set(client, prefs)
+    if "send-webhook" in sys.argv[1:]:
+        # Stand-in for Trello when trying out `serve` locally
+        from .serve import callback_url, send_stub_webhook
 
-    # Load or initialize scores
-    scores_path = Path("scores.json")
-    if scores_path.exists():
-        scores_data = json.loads(scores_path.read_text())
-        scores = make_scores(scores_data)
-    else:
-        scores = make_scores()
+        args = sys.argv[sys.argv.index("send-webhook") + 1:]
+        if len(args) != 2:
+            logger.error("Usage: shopr.py send-webhook <card-id> <label-name>")
+            sys.exit(1)
 
-    # Train on all checklists
-    for checklist in checklists:
-        scores = train(checklist, scores)
+        status = await send_stub_webhook(
+            callback_url(prefs), args[0], args[1], prefs.webhook_secret
+        )
+        logger.info(f"Receiver answered {status}")
+        return
 
-    # Save scores
-    scores_path.write_text(json.dumps(dict(scores), indent=2))
+    # The client keeps one pooled connection for the whole run
+    async with create_client(prefs) as client:
+        # Check for command line arguments
+        if "--list-ids" in sys.argv:
+            await list_board_lists(client, prefs)
+            return
 
-    # Reset training labels
-    await reset_label(
-        client,
-        prefs.train_label,
-        [c.idCard for c in checklists]
-    )
+        if "sync" in sys.argv[1:]:
+            # Imported here since syncing itself builds on this module
+            from .sync import poll, sync
 
-    # Order lists
-    await order_list(client, scores, prefs)
+            if "--watch" in sys.argv:
+                await poll(client, prefs)
+            else:
+                await sync(client, prefs, scores_path=prefs.scores_path)
+            return
 
-    # Populate shopping list
-    await populate_shopping_list(client, prefs)
+        if "serve" in sys.argv[1:]:
+            # Imported here since the watcher itself builds on this module
+            from .serve import serve
+
+            await serve(client, prefs)
+            return
 
+        await run(client, prefs)
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,275 @@
+"""Per-phase and per-endpoint metrics for a run."""
+
+import os
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from . import profiling
+from .tracing import span
+
+
+# Upper bounds (in seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def endpoint(method: str, url: str) -> str:
+    """Name the endpoint a request goes to, with IDs left out.
+
+    Trello paths alternate between resource names and IDs after the
+    version, e.g. "/1/cards/{id}/checklist/{id}/checkItem/{id}".
+
+    Args:
+        method: HTTP method
+        url: Request URL
+
+    Returns:
+        Method and path template, e.g. "GET /1/boards/{id}/cards"
+    """
+    parts = httpx.URL(url).path.split("/")[2:]
+    path = "/".join(part if i % 2 == 0 else "{id}" for i, part in enumerate(parts))
+    return f"{method.upper()} /1/{path}"
+
+
+class Histogram:
+    """Distribution of observed values over fixed buckets."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        """Initialize an empty histogram.
+
+        Args:
+            buckets: Upper bounds of the buckets, in increasing order
+        """
+        self.buckets = buckets
+        # One count per bucket plus one for values above the last bound
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Add a value to the distribution."""
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> dict[str, int]:
+        """Get the number of values at or below each bound, by bound."""
+        total = 0
+        result: dict[str, int] = {}
+        for bound, count in zip((*map(str, self.buckets), "+Inf"), self.counts):
+            total += count
+            result[bound] = total
+        return result
+
+
+class EndpointMetrics:
+    """Requests made to one endpoint."""
+
+    def __init__(self) -> None:
+        """Initialize with nothing recorded."""
+        self.statuses: Counter[int] = Counter()
+        self.latency = Histogram()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.cache_hits = 0
+
+    def summary(self) -> dict[str, Any]:
+        """Get the endpoint's numbers as plain data."""
+        return {
+            "requests": self.latency.count,
+            "statuses": {str(status): count for status, count in self.statuses.items()},
+            "seconds": self.latency.sum,
+            "latency_buckets": self.latency.cumulative(),
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "cache_hits": self.cache_hits,
+        }
+
+
+class Metrics:
+    """Phase durations and request accounting for a client's runs."""
+
+    def __init__(self) -> None:
+        """Initialize with nothing recorded."""
+        self.phases: dict[str, float] = {}
+        self.phase_requests: Counter[str] = Counter()
+        self.endpoints: dict[str, EndpointMetrics] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time, trace and profile a phase, and count the requests made during it.
+
+        Args:
+            name: Phase name; time spent in repeated phases adds up
+        """
+        start = time.perf_counter()
+        try:
+            with span("shopr.phase", name), profiling.phase(name):
+                yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def _endpoint(self, method: str, url: str) -> EndpointMetrics:
+        """Get the metrics of the endpoint a request goes to."""
+        name = endpoint(method, url)
+        if name not in self.endpoints:
+            self.endpoints[name] = EndpointMetrics()
+        return self.endpoints[name]
+
+    def record_request(
+        self,
+        method: str,
+        url: str,
+        status_code: int,
+        seconds: float,
+        bytes_sent: int,
+        bytes_received: int,
+    ) -> None:
+        """Record a request sent to Trello.
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            status_code: Status of the final response
+            seconds: Time until the final response, including retries
+            bytes_sent: Size of the request body
+            bytes_received: Size of the response body on the wire
+        """
+        metrics = self._endpoint(method, url)
+        metrics.statuses[status_code] += 1
+        metrics.latency.observe(seconds)
+        metrics.bytes_sent += bytes_sent
+        metrics.bytes_received += bytes_received
+
+        phase = profiling.current_phase.get()
+        if phase != profiling.NO_PHASE:
+            self.phase_requests[phase] += 1
+
+    def record_cache_hit(self, method: str, url: str) -> None:
+        """Record a request answered from the response cache."""
+        self._endpoint(method, url).cache_hits += 1
+
+    def summary(self) -> dict[str, Any]:
+        """Get everything recorded as plain data, ready for JSON."""
+        return {
+            "phases": {
+                name: {"seconds": seconds, "requests": self.phase_requests[name]}
+                for name, seconds in self.phases.items()
+            },
+            "endpoints": {
+                name: metrics.summary() for name, metrics in sorted(self.endpoints.items())
+            },
+        }
+
+
+def label(**labels: str) -> str:
+    """Format Prometheus labels, e.g. '{phase="train"}'."""
+    pairs = []
+    for name, value in labels.items():
+        value = value.replace("\\", "\\\\").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def prometheus_text(stats: dict[str, Any]) -> str:
+    """Format run statistics in the Prometheus text exposition format.
+
+    Args:
+        stats: Statistics from `TrelloClient.stats`
+
+    Returns:
+        Metrics text, e.g. for node_exporter's textfile collector
+    """
+    lines = [
+        "# HELP shopr_phase_seconds_total Time spent in each phase.",
+        "# TYPE shopr_phase_seconds_total counter",
+    ]
+    for name, phase in stats["phases"].items():
+        lines.append(f"shopr_phase_seconds_total{label(phase=name)} {phase['seconds']}")
+    lines += [
+        "# HELP shopr_phase_requests_total Trello requests made in each phase.",
+        "# TYPE shopr_phase_requests_total counter",
+    ]
+    for name, phase in stats["phases"].items():
+        lines.append(f"shopr_phase_requests_total{label(phase=name)} {phase['requests']}")
+
+    lines += [
+        "# HELP shopr_requests_total Trello requests by endpoint and final status.",
+        "# TYPE shopr_requests_total counter",
+    ]
+    for name, metrics in stats["endpoints"].items():
+        for status, count in metrics["statuses"].items():
+            lines.append(
+                f"shopr_requests_total{label(endpoint=name, status=status)} {count}"
+            )
+
+    lines += [
+        "# HELP shopr_request_duration_seconds Trello request latency, including retries.",
+        "# TYPE shopr_request_duration_seconds histogram",
+    ]
+    for name, metrics in stats["endpoints"].items():
+        for bound, count in metrics["latency_buckets"].items():
+            lines.append(
+                f"shopr_request_duration_seconds_bucket{label(endpoint=name, le=bound)}"
+                f" {count}"
+            )
+        lines.append(
+            f"shopr_request_duration_seconds_sum{label(endpoint=name)} {metrics['seconds']}"
+        )
+        lines.append(
+            f"shopr_request_duration_seconds_count{label(endpoint=name)}"
+            f" {metrics['requests']}"
+        )
+
+    lines += [
+        "# HELP shopr_request_bytes_total Bytes sent to and received from Trello.",
+        "# TYPE shopr_request_bytes_total counter",
+    ]
+    for name, metrics in stats["endpoints"].items():
+        for direction in ("sent", "received"):
+            lines.append(
+                f"shopr_request_bytes_total{label(endpoint=name, direction=direction)}"
+                f" {metrics[f'bytes_{direction}']}"
+            )
+
+    lines += [
+        "# HELP shopr_retries_total Requests retried after a 429 or server error.",
+        "# TYPE shopr_retries_total counter",
+        f"shopr_retries_total {stats['retries']}",
+        "# HELP shopr_cache_hits_total Lookups answered from a cache.",
+        "# TYPE shopr_cache_hits_total counter",
+    ]
+    for cache, cache_stats in stats["caches"].items():
+        lines.append(f"shopr_cache_hits_total{label(cache=cache)} {cache_stats['hits']}")
+    lines += [
+        "# HELP shopr_cache_misses_total Lookups a cache could not answer.",
+        "# TYPE shopr_cache_misses_total counter",
+    ]
+    for cache, cache_stats in stats["caches"].items():
+        lines.append(
+            f"shopr_cache_misses_total{label(cache=cache)} {cache_stats['misses']}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(stats: dict[str, Any], path: Path) -> None:
+    """Write run statistics to a Prometheus text file.
+
+    Args:
+        stats: Statistics from `TrelloClient.stats`
+        path: File to write
+    """
+    # Write to a temporary file first so a scrape never sees half the metrics
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(prometheus_text(stats))
+    os.replace(temporary, path)
@@ -0,0 +1,258 @@
+"""Profiling mode: CPU, asyncio task and memory profiles of a run."""
+
+import asyncio
+import cProfile
+import json
+import logging
+import pstats
+import time
+import tracemalloc
+from collections.abc import Callable, Coroutine, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+
+logger = logging.getLogger("shopr:profiling")
+
+# Where `--profile` writes a directory per run
+PROFILE_DIR = Path(".shopr-profiles")
+# Functions listed in the CPU profile summary
+TOP_FUNCTIONS = 50
+# Allocation sites listed per phase
+TOP_ALLOCATIONS = 25
+# Phase name for tasks started outside any phase
+NO_PHASE = "-"
+
+# The profiler of the run in progress, if it is being profiled
+active_profiler: "Profiler | None" = None
+# Phase the running task is in, so tasks and requests are attributed to
+# the phase that started them
+current_phase: ContextVar[str] = ContextVar("current_phase", default=NO_PHASE)
+
+
+class TaskStats:
+    """Running and waiting times of tasks running one coroutine function."""
+
+    def __init__(self) -> None:
+        """Initialize with no tasks recorded."""
+        self.count = 0
+        self.wall = 0.0
+        self.running = 0.0
+        self.max_waiting = 0.0
+
+    def record(self, wall: float, running: float) -> None:
+        """Record a finished task.
+
+        Args:
+            wall: Seconds from creating the task until it finished
+            running: Seconds the task spent running rather than suspended
+        """
+        self.count += 1
+        self.wall += wall
+        self.running += running
+        self.max_waiting = max(self.max_waiting, wall - running)
+
+    def summary(self) -> dict[str, float]:
+        """Get the totals as plain data."""
+        return {
+            "count": self.count,
+            "wall": self.wall,
+            "running": self.running,
+            "waiting": self.wall - self.running,
+            "max_waiting": self.max_waiting,
+        }
+
+
+class TimedCoroutine(Coroutine[Any, Any, Any]):
+    """Coroutine wrapper timing each step a task runs it for.
+
+    Whatever time the task was alive but not running a step, it was
+    waiting: for I/O, a lock, the rate limiter or a free event loop.
+    """
+
+    def __init__(self, coro: Coroutine[Any, Any, Any], stats: TaskStats):
+        """Wrap a coroutine.
+
+        Args:
+            coro: Coroutine the task runs
+            stats: Where the task's times are recorded when it finishes
+        """
+        self._coro = coro
+        self._stats = stats
+        self._created = time.perf_counter()
+        self._running = 0.0
+        self.__qualname__ = getattr(coro, "__qualname__", type(coro).__qualname__)
+
+    def _step(self, method: Callable[..., Any], *args: Any) -> Any:
+        """Run the coroutine up to its next suspension, timing it."""
+        start = time.perf_counter()
+        done = True
+        try:
+            result = method(*args)
+            done = False
+            return result
+        finally:
+            now = time.perf_counter()
+            self._running += now - start
+            # StopIteration or an exception ends the task
+            if done:
+                self._stats.record(now - self._created, self._running)
+
+    def send(self, value: Any) -> Any:
+        """Resume the coroutine with a value."""
+        return self._step(self._coro.send, value)
+
+    def throw(self, *args: Any) -> Any:
+        """Resume the coroutine by raising an exception in it."""
+        return self._step(self._coro.throw, *args)
+
+    def close(self) -> None:
+        """Close the coroutine."""
+        self._coro.close()
+
+    def __await__(self) -> Any:
+        """Await the coroutine directly, untimed."""
+        return self._coro.__await__()
+
+
+class Profiler:
+    """Collects CPU, task and allocation profiles and writes them out."""
+
+    def __init__(self, directory: Path):
+        """Initialize the profiler.
+
+        Args:
+            directory: Where the profiles are written
+        """
+        self.directory = directory
+        self.cpu = cProfile.Profile()
+        self.tasks: dict[tuple[str, str], TaskStats] = {}
+        self.phases: list[dict[str, Any]] = []
+        self.allocations: list[tuple[str, list[tracemalloc.Statistic]]] = []
+
+    def start(self) -> None:
+        """Start profiling the CPU."""
+        self.cpu.enable()
+
+    def stop(self) -> None:
+        """Stop profiling the CPU."""
+        self.cpu.disable()
+
+    def task_factory(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        coro: Coroutine[Any, Any, Any],
+        **kwargs: Any,
+    ) -> asyncio.Task[Any]:
+        """Create a task whose running and waiting times are recorded."""
+        key = (current_phase.get(), getattr(coro, "__qualname__", repr(coro)))
+        if key not in self.tasks:
+            self.tasks[key] = TaskStats()
+        return asyncio.Task(TimedCoroutine(coro, self.tasks[key]), loop=loop, **kwargs)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Record a phase's time and the memory it allocated."""
+        # Allocations are only traced within phases, so the snapshot at the
+        # end holds just what the phase allocated and kept. Comparing
+        # snapshots of the whole heap instead takes seconds per phase once
+        # the lemmatizer's dictionaries are loaded.
+        tracemalloc.start()
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            self.phases.append({
+                "phase": name,
+                "seconds": time.perf_counter() - start,
+                "cpu_seconds": time.process_time() - cpu_start,
+            })
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            self.allocations.append(
+                (name, snapshot.statistics("lineno")[:TOP_ALLOCATIONS])
+            )
+
+    def write(self) -> None:
+        """Write every profile to the directory.
+
+        Writes cpu.prof (for pstats or snakeviz) with a cpu.txt summary,
+        tasks.json, memory.txt and phases.json.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self.cpu.dump_stats(self.directory / "cpu.prof")
+        with (self.directory / "cpu.txt").open("w") as file:
+            stats = pstats.Stats(self.cpu, stream=file)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCTIONS)
+
+        tasks = [
+            {"phase": phase, "coroutine": name, **stats.summary()}
+            for (phase, name), stats in self.tasks.items()
+        ]
+        tasks.sort(key=lambda task: task["waiting"], reverse=True)
+        (self.directory / "tasks.json").write_text(json.dumps(tasks, indent=2))
+
+        lines: list[str] = []
+        for name, allocations in self.allocations:
+            lines.append(f"== {name}: largest allocations still live at its end ==")
+            lines.extend(str(stat) for stat in allocations)
+            lines.append("")
+        (self.directory / "memory.txt").write_text("\n".join(lines))
+
+        (self.directory / "phases.json").write_text(json.dumps(self.phases, indent=2))
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Enter a phase of the run, profiling it if the run is being profiled.
+
+    Args:
+        name: Phase name, set as `current_phase` until the phase ends
+    """
+    token = current_phase.set(name)
+    try:
+        if active_profiler is None:
+            yield
+            return
+
+        with active_profiler.phase(name):
+            yield
+    finally:
+        current_phase.reset(token)
+
+
+def run_profiled(main: Coroutine[Any, Any, Any], root: Path = PROFILE_DIR) -> Path:
+    """Run the main coroutine under the profilers.
+
+    The profiles are written even if `main` exits or fails.
+
+    Args:
+        main: Coroutine to run, e.g. shopr's main()
+        root: Directory the timestamped profile directory is created in
+
+    Returns:
+        Directory the profiles were written to
+    """
+    global active_profiler
+
+    directory = root / datetime.now().strftime("%Y%m%d-%H%M%S")
+    profiler = Profiler(directory)
+    active_profiler = profiler
+    try:
+        with asyncio.Runner() as runner:
+            runner.get_loop().set_task_factory(profiler.task_factory)
+            profiler.start()
+            try:
+                runner.run(main)
+            finally:
+                profiler.stop()
+    finally:
+        active_profiler = None
+        profiler.write()
+        logger.info(f"Profile written to {directory}")
+    return directory
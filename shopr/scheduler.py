@@ -0,0 +1,264 @@
+"""Rate-limit-aware request scheduling for the Trello client."""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from email.utils import parsedate_to_datetime
+from types import TracebackType
+
+import httpx
+
+
+logger = logging.getLogger("shopr:scheduler")
+
+# Trello allows 100 requests per 10 seconds per token (and 300 per key,
+# which a single-token client never reaches first).
+TOKEN_RATE_LIMIT = 100
+TOKEN_RATE_WINDOW = 10.0
+
+DEFAULT_INITIAL_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 30.0
+
+# Methods that are safe to resend after a server error
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE"}
+
+
+class SlidingWindow:
+    """Sliding window limiting how many requests start in any window of time.
+
+    Unlike a token bucket refilled at `limit / window` per second, which
+    lets a full burst plus the refill through within one window, this never
+    starts more than `limit` requests in any `window` seconds.
+    """
+
+    def __init__(
+        self,
+        limit: int = TOKEN_RATE_LIMIT,
+        window: float = TOKEN_RATE_WINDOW,
+    ):
+        """Initialize an empty window.
+
+        Args:
+            limit: Maximum requests started within any window
+            window: Window length in seconds
+        """
+        self.limit = limit
+        self.window = window
+        self._started: deque[float] = deque()
+        self._resume_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a request may start within the limit and count it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._resume_at:
+                    await asyncio.sleep(self._resume_at - now)
+                    continue
+
+                while self._started and self._started[0] <= now - self.window:
+                    self._started.popleft()
+                if len(self._started) < self.limit:
+                    self._started.append(now)
+                    return
+
+                await asyncio.sleep(self._started[0] + self.window - now)
+
+    def pause(self, delay: float) -> None:
+        """Start no requests for `delay` seconds.
+
+        Args:
+            delay: Seconds to pause for
+        """
+        self._resume_at = max(self._resume_at, time.monotonic() + delay)
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit.
+
+    The limit grows by roughly one for every `limit` successful requests
+    and is cut by `decrease` whenever the server pushes back, at most once
+    per congestion event.
+    """
+
+    def __init__(
+        self,
+        initial: int = DEFAULT_INITIAL_CONCURRENCY,
+        minimum: int = 1,
+        maximum: int = 32,
+        decrease: float = 0.5,
+    ):
+        """Initialize the limiter.
+
+        Args:
+            initial: Starting concurrency limit
+            minimum: Lowest the limit may drop to
+            maximum: Highest the limit may grow to
+            decrease: Factor the limit is multiplied by on back-off
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.in_flight = 0
+        # Requests are numbered as they start, so a back-off can tell
+        # whether its request started after the last decrease
+        self.started = 0
+        self._decreased_after = 0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self) -> int:
+        """Wait for a free slot.
+
+        Returns:
+            The request's number, to pass to `on_backoff`
+        """
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            self.started += 1
+            return self.started
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Release the slot."""
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self) -> None:
+        """Additively increase the limit after a healthy response."""
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def on_backoff(self, request: int) -> None:
+        """Multiplicatively decrease the limit after a 429 or 5xx.
+
+        One rate limit or outage typically fails every request in flight,
+        so only a request started after the last decrease decreases the
+        limit again.
+
+        Args:
+            request: Number the request got on entering the limiter
+        """
+        if request <= self._decreased_after:
+            return
+        self._decreased_after = self.started
+        self.limit = max(self.minimum, self.limit * self.decrease)
+        logger.debug(f"Backing off, concurrency limit now {int(self.limit)}")
+
+
+def retry_after(response: httpx.Response) -> float | None:
+    """Get the delay a response asks for in its Retry-After header.
+
+    Args:
+        response: Response to inspect
+
+    Returns:
+        Delay in seconds, or None if the header is missing or invalid
+    """
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestScheduler:
+    """Schedule requests under Trello's rate limits.
+
+    Requests wait for room in the rate window, run within the adaptive
+    concurrency limit, and are retried with back-off when Trello answers
+    with 429 (or a 5xx for idempotent methods).
+    """
+
+    def __init__(
+        self,
+        window: SlidingWindow | None = None,
+        limiter: AdaptiveLimiter | None = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_delay: float = DEFAULT_BASE_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY,
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            window: Sliding window for the request rate
+            limiter: Adaptive concurrency limiter
+            max_retries: Retries before giving up and returning the response
+            base_delay: First back-off delay when no Retry-After is given
+            max_delay: Upper bound for back-off delays
+        """
+        self.window = window or SlidingWindow()
+        self.limiter = limiter or AdaptiveLimiter()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+
+    def _should_retry(self, method: str, response: httpx.Response) -> bool:
+        """Check whether a response is a retryable back-off signal."""
+        if response.status_code == 429:
+            return True
+        return response.status_code >= 500 and method.upper() in IDEMPOTENT_METHODS
+
+    async def send(
+        self,
+        method: str,
+        send: Callable[[], Awaitable[httpx.Response]],
+    ) -> httpx.Response:
+        """Send a request, retrying while Trello asks us to back off.
+
+        Args:
+            method: HTTP method of the request
+            send: Callable performing the request
+
+        Returns:
+            The final response
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.window.acquire()
+            async with self.limiter as request:
+                response = await send()
+
+            if response.status_code != 429 and response.status_code < 500:
+                self.limiter.on_success()
+                return response
+
+            self.limiter.on_backoff(request)
+            if attempt == self.max_retries or not self._should_retry(method, response):
+                return response
+
+            delay = retry_after(response)
+            if delay is None:
+                delay = self.base_delay * 2**attempt
+            delay = min(self.max_delay, delay)
+
+            logger.info(
+                f"Trello responded {response.status_code}, retrying in {delay:.1f}s"
+            )
+            self.retries += 1
+            if response.status_code == 429:
+                # Rate limits apply to the whole token, so hold back every
+                # request rather than just this one
+                self.window.pause(delay)
+            else:
+                await asyncio.sleep(delay)
+
+        return response
@@ -0,0 +1,363 @@
+"""Long-running watch mode driven by Trello webhooks."""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from .main import (
+    SCORES_PATH,
+    Prefs,
+    describe_error,
+    load_scores,
+    lookup_candidates,
+    order_list,
+    populate_shopping_list,
+    train_phase,
+)
+from .trello import BoardSnapshot, TrelloClient
+
+
+logger = logging.getLogger("shopr:serve")
+
+WEBHOOK_PATH = "/webhook"
+# Largest callback body accepted; Trello actions are a few kilobytes
+MAX_BODY_SIZE = 1 << 20
+
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    401: "Unauthorized",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+}
+
+
+def webhook_signature(secret: str, body: bytes, callback_url: str) -> str:
+    """Compute the signature Trello sends in the X-Trello-Webhook header.
+
+    Args:
+        secret: Trello application secret
+        body: Raw request body
+        callback_url: Callback URL the webhook was registered with
+
+    Returns:
+        Base64 encoded HMAC-SHA1 of the body followed by the callback URL
+    """
+    digest = hmac.new(
+        secret.encode(), body + callback_url.encode(), hashlib.sha1
+    ).digest()
+    return base64.b64encode(digest).decode()
+
+
+def callback_url(prefs: Prefs) -> str:
+    """Get the URL Trello posts webhook callbacks to."""
+    if prefs.webhook_callback_url:
+        return prefs.webhook_callback_url
+    return f"http://{prefs.webhook_host}:{prefs.webhook_port}{WEBHOOK_PATH}"
+
+
+def action_phase(prefs: Prefs, action: dict[str, Any]) -> tuple[str, str] | None:
+    """Work out which phase a Trello action should trigger.
+
+    Only adding one of the configured labels to a card does anything;
+    every other action on the board is ignored.
+
+    Args:
+        prefs: Preferences
+        action: Action from a webhook callback
+
+    Returns:
+        Tuple of (phase, card ID), or None if the action triggers nothing
+    """
+    if action.get("type") != "addLabelToCard":
+        return None
+
+    data = action.get("data", {})
+    label_name = data.get("label", {}).get("name")
+    card_id = data.get("card", {}).get("id")
+    if card_id is None:
+        return None
+
+    labels = {
+        prefs.train_label: "train",
+        prefs.order_label: "order",
+        prefs.populate_label: "populate",
+    }
+    phase = labels.get(label_name)
+    if phase is None:
+        return None
+    return (phase, card_id)
+
+
+class Watcher:
+    """Run single phases for cards as their labels change.
+
+    Scores and the lemmatizer stay loaded between callbacks, and phases
+    run one at a time so training never races with ordering.
+    """
+
+    def __init__(
+        self,
+        client: TrelloClient,
+        prefs: Prefs,
+        scores_path: Path = SCORES_PATH,
+    ):
+        """Initialize the watcher and load scores.
+
+        Args:
+            client: Trello client
+            prefs: Preferences
+            scores_path: Scores file, reread only at startup
+        """
+        self.client = client
+        self.prefs = prefs
+        self.scores_path = scores_path
+        self.scores = load_scores(scores_path)
+        self.queue: asyncio.Queue[tuple[str, str]] = asyncio.Queue()
+        # Queued (phase, card ID) pairs, so repeated callbacks for the same
+        # change only run the phase once
+        self._pending: set[tuple[str, str]] = set()
+
+        # Load the lemmatizer dictionaries now rather than on the first callback
+        lookup_candidates("shopr")
+
+    def submit(self, phase: str, card_id: str) -> bool:
+        """Queue a phase for a card.
+
+        Args:
+            phase: "train", "order" or "populate"
+            card_id: Card whose label changed
+
+        Returns:
+            True if queued, False if the same work is already waiting
+        """
+        if (phase, card_id) in self._pending:
+            return False
+
+        self._pending.add((phase, card_id))
+        self.queue.put_nowait((phase, card_id))
+        return True
+
+    async def process(self, phase: str, card_id: str) -> None:
+        """Run one phase for a single card.
+
+        Args:
+            phase: "train", "order" or "populate"
+            card_id: Card to run the phase for
+        """
+        client, prefs = self.client, self.prefs
+
+        # Checklists may have been edited on Trello since the last callback
+        client.checklist_cache.clear()
+
+        card = await client.get_card(card_id)
+        label = {
+            "train": prefs.train_label,
+            "order": prefs.order_label,
+            "populate": prefs.populate_label,
+        }[phase]
+        if not card.has_label(label):
+            logger.debug(f"{card.name} no longer has the {label} label")
+            return
+
+        logger.info(f"Running {phase} for {card.name}")
+        if phase == "train":
+            self.scores = await train_phase(
+                client,
+                self.scores,
+                prefs,
+                BoardSnapshot([card]),
+                prefs.concurrency,
+                self.scores_path,
+            )
+        elif phase == "order":
+            await order_list(
+                client, self.scores, prefs, BoardSnapshot([card]), prefs.concurrency
+            )
+        else:
+            selected = await client.get_list_cards(prefs.selected_list)
+            snapshot = BoardSnapshot(
+                [card, *(recipe for recipe in selected if recipe.id != card.id)]
+            )
+            await populate_shopping_list(
+                client, self.scores, prefs, snapshot, prefs.concurrency
+            )
+
+    async def run(self) -> None:
+        """Process queued phases until cancelled."""
+        while True:
+            phase, card_id = await self.queue.get()
+            self._pending.discard((phase, card_id))
+            try:
+                await self.process(phase, card_id)
+            except Exception as error:
+                logger.error(
+                    f"Running {phase} for card {card_id} failed:"
+                    f" {describe_error(error)}"
+                )
+            finally:
+                self.queue.task_done()
+
+
+class WebhookReceiver:
+    """Minimal HTTP endpoint for Trello webhook callbacks."""
+
+    def __init__(
+        self,
+        watcher: Watcher,
+        secret: str | None = None,
+        callback_url: str = "",
+    ):
+        """Initialize the receiver.
+
+        Args:
+            watcher: Watcher the triggered phases are queued on
+            secret: Trello application secret; callbacks are not verified
+                if not given
+            callback_url: Callback URL the webhook was registered with
+        """
+        self.watcher = watcher
+        self.secret = secret
+        self.callback_url = callback_url
+
+    def _respond(
+        self,
+        method: str,
+        path: str,
+        headers: dict[str, str],
+        body: bytes,
+    ) -> int:
+        """Handle one request and get the status code to answer with."""
+        if path.split("?", 1)[0] != WEBHOOK_PATH:
+            return 404
+
+        # Trello checks the callback URL with a HEAD request before it
+        # creates the webhook
+        if method in ("HEAD", "GET"):
+            return 200
+        if method != "POST":
+            return 405
+
+        if self.secret is not None:
+            expected = webhook_signature(self.secret, body, self.callback_url)
+            if not hmac.compare_digest(headers.get("x-trello-webhook", ""), expected):
+                logger.warning("Rejected webhook callback with a bad signature")
+                return 401
+
+        try:
+            action = json.loads(body)["action"]
+        except (ValueError, KeyError, TypeError):
+            return 400
+
+        triggered = action_phase(self.watcher.prefs, action)
+        if triggered is not None:
+            self.watcher.submit(*triggered)
+        return 200
+
+    async def handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Serve one connection."""
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            if len(request_line) != 3:
+                return
+            method, path, _ = request_line
+
+            headers: dict[str, str] = {}
+            while line := (await reader.readline()).decode("latin-1").strip():
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            length = int(headers.get("content-length", 0))
+            if length > MAX_BODY_SIZE:
+                status = 413
+            else:
+                body = await reader.readexactly(length)
+                status = self._respond(method.upper(), path, headers, body)
+
+            writer.write(
+                f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                "Content-Length: 0\r\n"
+                "Connection: close\r\n\r\n".encode()
+            )
+            await writer.drain()
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError) as error:
+            logger.debug(f"Dropped webhook connection: {error}")
+        finally:
+            writer.close()
+
+    async def start(self, host: str, port: int) -> asyncio.Server:
+        """Start listening.
+
+        Args:
+            host: Interface to bind
+            port: Port to bind, 0 for any free port
+
+        Returns:
+            The running server
+        """
+        return await asyncio.start_server(self.handle, host, port)
+
+
+async def serve(client: TrelloClient, prefs: Prefs) -> None:
+    """Receive webhook callbacks and run phases until cancelled.
+
+    Args:
+        client: Trello client
+        prefs: Preferences
+    """
+    watcher = Watcher(client, prefs, prefs.scores_path)
+    receiver = WebhookReceiver(watcher, prefs.webhook_secret, callback_url(prefs))
+    server = await receiver.start(prefs.webhook_host, prefs.webhook_port)
+    logger.info(f"Listening for Trello webhooks on {callback_url(prefs)}")
+
+    async with server, asyncio.TaskGroup() as group:
+        group.create_task(watcher.run())
+        await server.serve_forever()
+
+
+async def send_stub_webhook(
+    url: str,
+    card_id: str,
+    label_name: str,
+    secret: str | None = None,
+) -> int:
+    """Post a Trello-style addLabelToCard callback, for testing `serve`.
+
+    Args:
+        url: Callback URL of the receiver
+        card_id: Card the label was added to
+        label_name: Name of the added label
+        secret: Trello application secret to sign the callback with
+
+    Returns:
+        Status code the receiver answered with
+    """
+    body = json.dumps({
+        "action": {
+            "type": "addLabelToCard",
+            "data": {
+                "card": {"id": card_id},
+                "label": {"name": label_name},
+            },
+        },
+    }).encode()
+
+    headers = {"Content-Type": "application/json"}
+    if secret is not None:
+        headers["X-Trello-Webhook"] = webhook_signature(secret, body, url)
+
+    async with httpx.AsyncClient() as client:
+        response = await client.post(url, content=body, headers=headers)
+    return response.status_code
@@ -0,0 +1,164 @@
+"""Persistent storage for learned scores."""
+
+import json
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+
+
+# Files with these suffixes are read and written as JSON; anything else
+# is a SQLite database
+JSON_SUFFIXES = {".json"}
+
+
+class ScoreStore(ABC):
+    """Where a score table is kept between runs.
+
+    Every store loads the whole table into memory; stores differ in how
+    much of it they write back on save.
+    """
+
+    @abstractmethod
+    def load(self) -> dict[str, float]:
+        """Load all scores, in the order they were first stored."""
+
+    @abstractmethod
+    def save(
+        self,
+        scores: Mapping[str, float],
+        changed: Iterable[str],
+        removed: Iterable[str] = (),
+    ) -> None:
+        """Save a score table.
+
+        Args:
+            scores: Full score table
+            changed: Keys set since the table was loaded or last saved
+            removed: Keys deleted since the table was loaded or last saved
+        """
+
+    def close(self) -> None:
+        """Release any resources held by the store."""
+
+
+class JsonScoreStore(ScoreStore):
+    """Scores in a single JSON object, rewritten in full on every save."""
+
+    def __init__(self, path: Path | str):
+        """Initialize the store.
+
+        Args:
+            path: JSON file
+        """
+        self.path = Path(path)
+
+    def load(self) -> dict[str, float]:
+        """Load all scores, or none if the file doesn't exist yet."""
+        if not self.path.exists():
+            return {}
+        return json.loads(self.path.read_text())
+
+    def save(
+        self,
+        scores: Mapping[str, float],
+        changed: Iterable[str],
+        removed: Iterable[str] = (),
+    ) -> None:
+        """Rewrite the file with the full table."""
+        # Write to a temporary file first so a crash never leaves half a table
+        temporary = self.path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(dict(scores), indent=2))
+        os.replace(temporary, self.path)
+
+
+class SqliteScoreStore(ScoreStore):
+    """Scores in a SQLite database, updated key by key.
+
+    Only the keys changed since the last save are written, in a single
+    transaction, so saving costs the same however large the table grows.
+    Loading still reads every row, so only writes are incremental.
+    The database runs in WAL mode so a crash mid-save leaves the previous
+    scores intact.
+    """
+
+    def __init__(self, path: Path | str):
+        """Initialize the store. The database is opened on first use.
+
+        Args:
+            path: Database file
+        """
+        self.path = Path(path)
+        self._connection: sqlite3.Connection | None = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Get the database connection, creating the schema if needed."""
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            # Rows are read back in rowid order, so keys keep the order they
+            # were first stored in, as they would in a JSON object
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS scores"
+                " (key TEXT PRIMARY KEY, score REAL NOT NULL)"
+            )
+        return self._connection
+
+    def load(self) -> dict[str, float]:
+        """Load all scores."""
+        return dict(self.connection.execute("SELECT key, score FROM scores ORDER BY rowid"))
+
+    def save(
+        self,
+        scores: Mapping[str, float],
+        changed: Iterable[str],
+        removed: Iterable[str] = (),
+    ) -> None:
+        """Write the changed and removed keys in one transaction."""
+        with self.connection as connection:
+            connection.executemany(
+                "DELETE FROM scores WHERE key = ?", ((key,) for key in removed)
+            )
+            connection.executemany(
+                "INSERT INTO scores (key, score) VALUES (?, ?)"
+                " ON CONFLICT (key) DO UPDATE SET score = excluded.score",
+                ((key, scores[key]) for key in changed),
+            )
+
+    def close(self) -> None:
+        """Close the database."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def open_score_store(path: Path | str) -> ScoreStore:
+    """Open the store for a scores file, picking the format by its suffix.
+
+    Args:
+        path: Scores file
+
+    Returns:
+        JsonScoreStore for .json files, otherwise SqliteScoreStore
+    """
+    if Path(path).suffix in JSON_SUFFIXES:
+        return JsonScoreStore(path)
+    return SqliteScoreStore(path)
+
+
+def copy_scores(source: ScoreStore, target: ScoreStore) -> int:
+    """Copy every score from one store to another, e.g. to import JSON.
+
+    Args:
+        source: Store to read
+        target: Store to write
+
+    Returns:
+        Number of scores copied
+    """
+    scores = source.load()
+    target.save(scores, scores)
+    return len(scores)
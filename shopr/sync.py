@@ -0,0 +1,211 @@
+"""Incremental sync driven by the board actions feed."""
+
+import asyncio
+import json
+import logging
+import os
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from .main import (
+    SCORES_PATH,
+    Prefs,
+    Scores,
+    describe_error,
+    gather_limited,
+    load_scores,
+    run_phases,
+)
+from .trello import BoardSnapshot, Card, TrelloBatchError, TrelloClient
+
+
+logger = logging.getLogger("shopr:sync")
+
+# Where the ID of the last processed action is kept between polls
+SYNC_STATE_PATH = Path(".shopr-sync.json")
+
+
+def load_since(path: Path = SYNC_STATE_PATH) -> str | None:
+    """Load the ID of the last action an earlier sync processed.
+
+    Args:
+        path: Sync state file
+
+    Returns:
+        Action ID, or None if the board has never been synced
+    """
+    try:
+        return json.loads(path.read_text())["since"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def load_retry(path: Path = SYNC_STATE_PATH) -> list[str]:
+    """Load the cards an earlier sync failed to order.
+
+    Args:
+        path: Sync state file
+
+    Returns:
+        Card IDs to process again, whether or not they changed since
+    """
+    try:
+        return json.loads(path.read_text()).get("retry", [])
+    except (OSError, ValueError):
+        return []
+
+
+def save_since(
+    action_id: str,
+    path: Path = SYNC_STATE_PATH,
+    retry: Iterable[str] = (),
+) -> None:
+    """Save the ID of the last processed action.
+
+    Args:
+        action_id: Newest action processed
+        path: Sync state file
+        retry: Cards that failed to order, so the next sync tries again
+            even though the actions feed has moved past them
+    """
+    # Write to a temporary file first so a crash never loses the mark
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(json.dumps({"since": action_id, "retry": list(retry)}))
+    os.replace(temporary, path)
+
+
+def touched_card_ids(actions: list[dict[str, Any]]) -> list[str]:
+    """Get the cards a list of actions touched.
+
+    Args:
+        actions: Board actions
+
+    Returns:
+        Card IDs, each once, in the order of the actions
+    """
+    card_ids: dict[str, None] = {}
+    for action in actions:
+        card_id = action.get("data", {}).get("card", {}).get("id")
+        if card_id is not None:
+            card_ids[card_id] = None
+    return list(card_ids)
+
+
+async def load_touched_cards(
+    client: TrelloClient,
+    card_ids: list[str],
+    concurrency: int,
+) -> list[Card]:
+    """Get the current state of touched cards, skipping deleted ones.
+
+    Args:
+        client: Trello client
+        card_ids: Card IDs to get
+        concurrency: Maximum number of requests in flight
+
+    Returns:
+        Cards that still exist
+    """
+    async def load_one(card_id: str) -> Card | None:
+        try:
+            return await client.get_card(card_id)
+        except (TrelloBatchError, httpx.HTTPStatusError) as error:
+            logger.debug(f"Skipping card {card_id}: {error}")
+            return None
+
+    cards = await gather_limited((load_one(id) for id in card_ids), concurrency)
+    return [card for card in cards if card is not None]
+
+
+async def sync(
+    client: TrelloClient,
+    prefs: Prefs,
+    scores: Scores | None = None,
+    state_path: Path = SYNC_STATE_PATH,
+    scores_path: Path = SCORES_PATH,
+) -> Scores | None:
+    """Process the cards touched since the previous sync.
+
+    The first sync has nothing to compare against, so it processes the
+    whole board and records where the actions feed stood. Cards that
+    fail to order are recorded too, and processed again by the next sync.
+
+    Args:
+        client: Trello client
+        prefs: Preferences
+        scores: Score storage, loaded from `scores_path` only once there
+            is something to process if not given
+        state_path: Sync state file
+        scores_path: Where the scores are loaded from and saved
+
+    Returns:
+        Trained scores, or the scores given if nothing changed
+    """
+    # Checklists may have been edited on Trello since the previous sync
+    client.checklist_cache.clear()
+
+    since = load_since(state_path)
+    if since is None:
+        latest = await client.get_board_actions(prefs.board, limit=1)
+        snapshot = await client.get_board_snapshot(prefs.board)
+        if scores is None:
+            scores = load_scores(scores_path)
+        scores, failed = await run_phases(
+            client, scores, prefs, snapshot, prefs.concurrency, scores_path
+        )
+        if latest:
+            save_since(latest[0]["id"], state_path, (card.id for card in failed))
+        return scores
+
+    actions = await client.get_board_actions(prefs.board, since=since)
+    retry = load_retry(state_path)
+    if not actions and not retry:
+        logger.debug("No board changes since the last sync")
+        return scores
+
+    card_ids = list(dict.fromkeys([*touched_card_ids(actions), *retry]))
+    logger.info(
+        f"{len(actions)} board changes touched {len(card_ids)} cards,"
+        f" {len(retry)} retried"
+    )
+
+    # Cards whose labels were already removed drop out in the phases, so
+    # the actions caused by our own writes cost a card fetch and no more
+    cards = await load_touched_cards(client, card_ids, prefs.concurrency)
+    if any(card.has_label(prefs.populate_label) for card in cards):
+        selected = await client.get_list_cards(prefs.selected_list)
+        touched = {card.id for card in cards}
+        cards.extend(card for card in selected if card.id not in touched)
+
+    if scores is None:
+        scores = load_scores(scores_path)
+    scores, failed = await run_phases(
+        client, scores, prefs, BoardSnapshot(cards), prefs.concurrency, scores_path
+    )
+    save_since(
+        actions[0]["id"] if actions else since,
+        state_path,
+        (card.id for card in failed),
+    )
+    return scores
+
+
+async def poll(client: TrelloClient, prefs: Prefs) -> None:
+    """Sync every `prefs.poll_interval` seconds until cancelled.
+
+    Args:
+        client: Trello client
+        prefs: Preferences
+    """
+    scores: Scores | None = None
+    while True:
+        try:
+            scores = await sync(
+                client, prefs, scores, scores_path=prefs.scores_path
+            )
+        except Exception as error:
+            logger.error(f"Sync failed: {describe_error(error)}")
+        await asyncio.sleep(prefs.poll_interval)
@@ -0,0 +1,107 @@
+"""Performance tracing of runs through Sentry."""
+
+import json
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+import sentry_sdk
+from sentry_sdk.envelope import Envelope
+from sentry_sdk.tracing import Span
+from sentry_sdk.transport import Transport
+
+
+# Fraction of runs sent to Sentry as traces unless SENTRY_TRACES_SAMPLE_RATE
+# says otherwise. Tracing is opt-in, since a traced run sends a span for
+# every Trello request it makes.
+DEFAULT_TRACES_SAMPLE_RATE = 0.0
+# Fraction of runs written to a traces file unless told otherwise; asking
+# for the file is opting in
+FILE_TRACES_SAMPLE_RATE = 1.0
+
+
+class FileTransport(Transport):
+    """Sentry transport appending finished transactions to a JSON lines file.
+
+    Lets runs be traced without a Sentry project; errors are dropped.
+    """
+
+    def __init__(self, path: Path | str):
+        """Initialize the transport.
+
+        Args:
+            path: File each transaction is appended to as one JSON line
+        """
+        super().__init__()
+        self.path = Path(path)
+
+    def capture_envelope(self, envelope: Envelope) -> None:
+        """Write the transactions in an envelope to the file."""
+        transactions = [
+            item.get_transaction_event() for item in envelope.items
+            if item.type == "transaction"
+        ]
+        if not transactions:
+            return
+        with self.path.open("a") as file:
+            for transaction in transactions:
+                file.write(json.dumps(transaction, default=str) + "\n")
+
+
+def init_sentry(
+    dsn: str | None,
+    environment: str,
+    traces_sample_rate: float | None = None,
+    traces_file: Path | str | None = None,
+) -> None:
+    """Set up Sentry for errors and traces, or for traces to a local file.
+
+    Does nothing if neither `dsn` nor `traces_file` is given.
+
+    Args:
+        dsn: Sentry DSN errors and traces are sent to
+        environment: Environment name reported with them
+        traces_sample_rate: Fraction of runs traced; by default none are
+            sent to Sentry and all are written to `traces_file`
+        traces_file: Where traces are written when there is no DSN
+    """
+    if dsn:
+        if traces_sample_rate is None:
+            traces_sample_rate = DEFAULT_TRACES_SAMPLE_RATE
+        sentry_sdk.init(
+            dsn=dsn,
+            environment=environment,
+            traces_sample_rate=traces_sample_rate,
+        )
+    elif traces_file:
+        if traces_sample_rate is None:
+            traces_sample_rate = FILE_TRACES_SAMPLE_RATE
+        sentry_sdk.init(
+            transport=FileTransport(traces_file),
+            environment=environment,
+            traces_sample_rate=traces_sample_rate,
+        )
+
+
+@contextmanager
+def span(op: str, name: str) -> Iterator[Span | None]:
+    """Trace a block as a child of the current span.
+
+    Each span gets a scope of its own, so spans started by concurrent
+    tasks nest under the span that started the tasks rather than under
+    each other. Outside a sampled transaction nothing is traced.
+
+    Args:
+        op: Kind of work, e.g. "http.client"
+        name: What in particular, e.g. the card being ordered
+
+    Yields:
+        The span, or None if the block is not traced
+    """
+    parent = sentry_sdk.get_current_span()
+    if parent is None or not parent.sampled:
+        yield None
+        return
+
+    with sentry_sdk.new_scope(), sentry_sdk.start_span(op=op, name=name) as child:
+        yield child
@@ -1,30 +1,57 @@
 """Trello API client for shopr."""
 
+import asyncio
+import hashlib
+import json
 import logging
-from typing import Any
+import os
+import time
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Self
+from urllib.parse import urlencode
 
 import httpx
 from pydantic import BaseModel, ConfigDict
 
+from .metrics import Metrics, endpoint
+from .scheduler import AdaptiveLimiter, RequestScheduler
+from .tracing import span
+
 
 logger = logging.getLogger("shopr:trello")
 
 ROOT = "https://api.trello.com"
 
+# Connection pool defaults. A run issues bursts of requests to a single
+# host, so keep enough connections alive to reuse them across phases.
+DEFAULT_MAX_CONNECTIONS = 10
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
 
-class Card(BaseModel):
-    """Trello card representation.
+# Trello's /1/batch endpoint resolves at most this many GET routes per call
+BATCH_MAX_URLS = 10
+# How long (in seconds) to wait for concurrent GETs to coalesce into a batch
+DEFAULT_BATCH_WINDOW = 0.005
 
-    Only includes fields actually used by the application.
-    Unknown fields from the API are ignored.
-    """
+# Responses kept in the on-disk cache before the least recently used go
+DEFAULT_CACHE_ENTRIES = 1000
 
-    model_config = ConfigDict(extra="ignore")
 
-    id: str
-    name: str
-    idChecklists: list[str] = []
-    labels: list[dict[str, Any]] = []
+class TrelloBatchError(Exception):
+    """A single route inside a /1/batch request failed."""
+
+    def __init__(self, route: str, status_code: int | None, message: str):
+        """Initialize the error.
+
+        Args:
+            route: Route that failed
+            status_code: HTTP status Trello reported for the route
+            message: Error message Trello reported for the route
+        """
+        super().__init__(f"{route}: {status_code} {message}")
+        self.route = route
+        self.status_code = status_code
+        self.message = message
 
 
 class ChecklistItem(BaseModel):
@@ -57,18 +84,367 @@ class Checklist(BaseModel):
     checkItems: list[ChecklistItem] = []
 
 
+class Card(BaseModel):
+    """Trello card representation.
+
+    Only includes fields actually used by the application.
+    Unknown fields from the API are ignored.
+    """
+
+    model_config = ConfigDict(extra="ignore")
+
+    id: str
+    name: str
+    idList: str = ""
+    idChecklists: list[str] = []
+    labels: list[dict[str, Any]] = []
+    # Only populated when requested as a nested resource (checklists=all)
+    checklists: list[Checklist] = []
+
+    def has_label(self, name: str) -> bool:
+        """Check whether the card carries a label with the given name."""
+        return any(label.get("name") == name for label in self.labels)
+
+
+def model_fields(model: type[BaseModel], *exclude: str) -> str:
+    """List a model's fields for a Trello ``fields`` query parameter.
+
+    The ``id`` field is always returned by Trello and is left out, along
+    with any nested resources named in `exclude`.
+    """
+    return ",".join(
+        field for field in model.model_fields if field not in {"id", *exclude}
+    )
+
+
+# Only request the fields the models use, rather than Trello's default
+# payloads with descriptions, badges, attachment metadata and more
+CARD_FIELDS = model_fields(Card, "checklists")
+CHECKLIST_FIELDS = model_fields(Checklist, "checkItems")
+CHECK_ITEM_FIELDS = model_fields(ChecklistItem)
+CARD_PARAMS = {"fields": CARD_FIELDS}
+CHECKLIST_PARAMS = {
+    "fields": CHECKLIST_FIELDS,
+    "checkItems": "all",
+    "checkItem_fields": CHECK_ITEM_FIELDS,
+}
+SNAPSHOT_PARAMS = {
+    **CARD_PARAMS,
+    "checklists": "all",
+    "checklist_fields": CHECKLIST_FIELDS,
+    "checkItem_fields": CHECK_ITEM_FIELDS,
+}
+
+# Board actions meaning a card's labels or checklists changed
+CARD_ACTIONS = (
+    "addLabelToCard,addChecklistToCard,createCheckItem,updateCheckItem,"
+    "updateCheckItemStateOnCard,deleteCheckItem"
+)
+# Most actions Trello returns per request
+ACTIONS_PAGE_SIZE = 1000
+
+
+class BoardSnapshot:
+    """All cards on a board, with labels and checklists, fetched at once.
+
+    Fetched once per run so the train, order and populate phases can read
+    the board without each refetching cards and checklists.
+    """
+
+    def __init__(self, cards: list[Card]):
+        """Initialize the snapshot from cards with nested checklists.
+
+        Args:
+            cards: Cards fetched with their checklists
+        """
+        self.cards = cards
+
+    def cards_with_label(self, name: str) -> list[Card]:
+        """Get cards carrying a label with the given name."""
+        return [card for card in self.cards if card.has_label(name)]
+
+    def list_cards(self, id_list: str) -> list[Card]:
+        """Get cards in a specific list."""
+        return [card for card in self.cards if card.idList == id_list]
+
+
+def batch_item_error(route: str, result: dict[str, Any]) -> TrelloBatchError:
+    """Build the error for a failed route in a /1/batch response.
+
+    Failed routes come back either keyed by their status code (e.g.
+    ``{"404": "not found"}``) or as an error object with ``statusCode``
+    and ``message``.
+
+    Args:
+        route: Route that failed
+        result: The route's entry in the batch response
+    """
+    if "statusCode" in result:
+        return TrelloBatchError(route, result["statusCode"], result.get("message", ""))
+
+    for status, message in result.items():
+        if status.isdigit():
+            return TrelloBatchError(route, int(status), str(message))
+
+    return TrelloBatchError(route, None, str(result))
+
+
+class ChecklistCache:
+    """Checklists keyed by ID, kept for the lifetime of a client.
+
+    Filled from board snapshots and checklist fetches, and invalidated
+    whenever the client writes to a checklist.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty cache."""
+        self._checklists: dict[str, Checklist] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, id: str) -> bool:
+        """Check whether a checklist is cached."""
+        return id in self._checklists
+
+    def get(self, id: str) -> Checklist | None:
+        """Get a cached checklist, counting the hit or miss."""
+        checklist = self._checklists.get(id)
+        if checklist is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return checklist
+
+    def put(self, checklist: Checklist) -> None:
+        """Cache a checklist."""
+        self._checklists[checklist.id] = checklist
+
+    def invalidate(self, id: str) -> None:
+        """Drop a checklist that has been written to."""
+        self._checklists.pop(id, None)
+
+    def clear(self) -> None:
+        """Drop all cached checklists."""
+        self._checklists.clear()
+
+    def stats(self) -> dict[str, float]:
+        """Get cache hit statistics."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class ResponseCache:
+    """On-disk cache of GET responses, revalidated instead of refetched.
+
+    Responses are stored per URL and query parameters together with their
+    ETag/Last-Modified validators, so later runs can send conditional
+    requests. Where Trello sends no validators, a response can instead be
+    tied to the ``dateLastActivity`` of the resource it belongs to. Beyond
+    `max_entries` responses, the least recently used are evicted.
+    """
+
+    def __init__(self, directory: Path | str, max_entries: int = DEFAULT_CACHE_ENTRIES):
+        """Initialize the cache.
+
+        Args:
+            directory: Directory the responses are stored in
+            max_entries: Most responses kept
+        """
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, url: str, params: dict[str, Any]) -> Path:
+        """Get the file a response is stored in."""
+        key = json.dumps([url, sorted(params.items())], default=str)
+        return self.directory / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    def load(self, url: str, params: dict[str, Any]) -> dict[str, Any] | None:
+        """Load a stored response entry, if any."""
+        path = self._path(url, params)
+        try:
+            entry = json.loads(path.read_text())
+            # Mark the entry as recently used, so it is evicted last
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def store(
+        self,
+        url: str,
+        params: dict[str, Any],
+        response: httpx.Response,
+        body: Any,
+        last_activity: str | None = None,
+    ) -> None:
+        """Store a response if it can be revalidated later.
+
+        Args:
+            url: Request URL
+            params: Request query parameters
+            response: Response received
+            body: Decoded response body
+            last_activity: dateLastActivity the body corresponds to
+        """
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag is None and last_modified is None and last_activity is None:
+            return
+
+        entry = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "last_activity": last_activity,
+            "body": body,
+        }
+        path = self._path(url, params)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so a crash never leaves half an entry
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(entry))
+        os.replace(temporary, path)
+        self.prune()
+
+    def prune(self) -> None:
+        """Evict the least recently used responses beyond `max_entries`."""
+        paths = list(self.directory.glob("*.json"))
+        if len(paths) <= self.max_entries:
+            return
+
+        def last_used(path: Path) -> float:
+            try:
+                return path.stat().st_mtime
+            except OSError:
+                return 0.0
+
+        paths.sort(key=last_used)
+        for path in paths[:len(paths) - self.max_entries]:
+            path.unlink(missing_ok=True)
+
+    @staticmethod
+    def has_validators(entry: dict[str, Any] | None) -> bool:
+        """Check whether a stored response has ETag/Last-Modified validators."""
+        return entry is not None and bool(entry["etag"] or entry["last_modified"])
+
+    def stats(self) -> dict[str, float]:
+        """Get cache hit statistics."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# Route, query parameters and the future awaiting its result
+QueuedGet = tuple[str, dict[str, Any], asyncio.Future[Any]]
+
+
 class TrelloClient:
-    """Client for interacting with the Trello API."""
+    """Client for interacting with the Trello API.
 
-    def __init__(self, key: str, token: str):
+    The client owns a single pooled HTTP connection for its lifetime, so
+    it should be used as an async context manager (or closed with
+    ``aclose``) to release the underlying connections.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        token: str,
+        limits: httpx.Limits | None = None,
+        http2: bool = False,
+        batch_window: float | None = DEFAULT_BATCH_WINDOW,
+        scheduler: RequestScheduler | None = None,
+        response_cache: ResponseCache | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
         """Initialize the Trello client.
 
         Args:
             key: Trello API key
             token: Trello API token
+            limits: Connection pool and keep-alive limits
+            http2: Whether to negotiate HTTP/2 (requires the ``h2`` package)
+            batch_window: Seconds to wait for concurrent GETs to coalesce
+                into one /1/batch request, or None to disable batching
+            scheduler: Rate-limit-aware scheduler all requests go through
+            response_cache: On-disk cache for GET responses, or None
+            transport: HTTP transport to send requests through instead of
+                the network, e.g. a fake Trello for load testing
         """
         self.key = key
         self.token = token
+        self.limits = limits or httpx.Limits(
+            max_connections=DEFAULT_MAX_CONNECTIONS,
+            max_keepalive_connections=DEFAULT_MAX_CONNECTIONS,
+            keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY,
+        )
+        self.http2 = http2
+        self.batch_window = batch_window
+        self.scheduler = scheduler or RequestScheduler(
+            limiter=AdaptiveLimiter(
+                maximum=self.limits.max_connections or DEFAULT_MAX_CONNECTIONS
+            )
+        )
+        self.checklist_cache = ChecklistCache()
+        self.response_cache = response_cache
+        self.transport = transport
+        self.metrics = Metrics()
+        self._client: httpx.AsyncClient | None = None
+        self._batch_queue: list[QueuedGet] = []
+        self._batch_timer: asyncio.TimerHandle | None = None
+        self._batch_tasks: set[asyncio.Task[None]] = set()
+
+    async def __aenter__(self) -> Self:
+        """Open the pooled HTTP client."""
+        self._get_client()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the pooled HTTP client."""
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client and its connections."""
+        self._flush_batch()
+        if self._batch_tasks:
+            await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict[str, Any]:
+        """Get the phase and request metrics, retries and cache statistics."""
+        caches = {"checklist": self.checklist_cache.stats()}
+        if self.response_cache is not None:
+            caches["response"] = self.response_cache.stats()
+        return {
+            **self.metrics.summary(),
+            "retries": self.scheduler.retries,
+            "caches": caches,
+        }
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the pooled HTTP client, creating it on first use."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=self.limits,
+                http2=self.http2,
+                transport=self.transport,
+            )
+        return self._client
 
     async def _request(
         self,
@@ -76,43 +452,224 @@ class TrelloClient:
         url: str,
         params: dict[str, Any] | None = None,
         data: Any = None,
+        last_activity: str | None = None,
+        cached: bool = True,
+        entry: dict[str, Any] | None = None,
     ) -> Any:
-        """Make an HTTP request."""
+        """Make an HTTP request.
+
+        GET requests go through the response cache when one is configured
+        and `cached` is set: a stored response is returned as-is if
+        `last_activity` matches the one it was stored with, and is
+        otherwise revalidated with a conditional request. Callers that
+        already loaded the stored response pass it as `entry`, so large
+        responses are not read from disk twice.
+        """
         all_params = {"key": self.key, "token": self.token, **(params or {})}
-        async with httpx.AsyncClient() as client:
-            response = await client.request(
-                method=method.upper(),
-                url=url,
-                params=all_params,
-                json=data,
+        cache = self.response_cache if cached and method.lower() == "get" else None
+        if cache is None:
+            entry = None
+        elif entry is None:
+            entry = cache.load(url, all_params)
+
+        headers: dict[str, str] = {}
+        if entry is not None:
+            if last_activity is not None and entry["last_activity"] == last_activity:
+                cache.hits += 1
+                self.metrics.record_cache_hit(method, url)
+                return entry["body"]
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        client = self._get_client()
+        start = time.perf_counter()
+        with span("http.client", endpoint(method, url)) as http_span:
+            response = await self.scheduler.send(
+                method,
+                lambda: client.request(
+                    method=method.upper(),
+                    url=url,
+                    params=all_params,
+                    json=data,
+                    headers=headers,
+                ),
             )
-            response.raise_for_status()
-            return response.json()
+            if http_span is not None:
+                http_span.set_http_status(response.status_code)
+                http_span.set_data("url", url)
+        self.metrics.record_request(
+            method,
+            url,
+            response.status_code,
+            time.perf_counter() - start,
+            len(response.request.content),
+            response.num_bytes_downloaded,
+        )
+
+        if entry is not None and response.status_code == 304:
+            cache.hits += 1
+            self.metrics.record_cache_hit(method, url)
+            return entry["body"]
+
+        response.raise_for_status()
+        body = response.json()
+        logger.debug(
+            f"{method.upper()} {url}: {response.num_bytes_downloaded} bytes "
+            f"received, {len(response.content)} decoded"
+        )
+        if cache is not None:
+            cache.misses += 1
+            cache.store(url, all_params, response, body, last_activity)
+        return body
+
+    async def _batched_get(
+        self,
+        route: str,
+        params: dict[str, Any] | None = None,
+    ) -> Any:
+        """Make a GET request that may be coalesced into a /1/batch call.
+
+        Concurrent calls made within `batch_window` of each other are sent
+        as one batch request, and each caller gets its own result back.
+
+        Args:
+            route: API route without the version prefix (e.g. "/cards/abc")
+            params: Query parameters for the route
+        """
+        if self.batch_window is None:
+            return await self._request("get", f"{ROOT}/1{route}", params)
+
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[Any] = loop.create_future()
+        self._batch_queue.append((route, params or {}, future))
+
+        if len(self._batch_queue) >= BATCH_MAX_URLS:
+            self._flush_batch()
+        elif self._batch_timer is None:
+            self._batch_timer = loop.call_later(self.batch_window, self._flush_batch)
+
+        return await future
+
+    def _flush_batch(self) -> None:
+        """Send all queued GETs as a batch."""
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+
+        queued, self._batch_queue = self._batch_queue, []
+        if not queued:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._send_batch(queued))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _send_batch(self, queued: list[QueuedGet]) -> None:
+        """Resolve queued GETs and hand each result to its caller."""
+        routes = [
+            f"{route}?{urlencode(params)}" if params else route
+            for route, params, _ in queued
+        ]
+        try:
+            if len(queued) == 1:
+                # Nothing to coalesce with; skip the batch envelope
+                route, params, _ = queued[0]
+                results = [
+                    {"200": await self._request("get", f"{ROOT}/1{route}", params)}
+                ]
+            else:
+                logger.debug(f"Batching {len(queued)} GET requests")
+                # The same routes rarely batch together twice, and the batch
+                # has no validators per route, so it is never worth storing
+                results = await self._request(
+                    "get", f"{ROOT}/1/batch", {"urls": ",".join(routes)}, cached=False
+                )
+        except Exception as error:
+            for _, _, future in queued:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        if not isinstance(results, list) or len(results) != len(queued):
+            # Callers of routes without a result would otherwise wait forever
+            for route, (_, _, future) in zip(routes, queued):
+                if not future.done():
+                    future.set_exception(
+                        TrelloBatchError(route, None, "No result in the batch response")
+                    )
+            return
+
+        for route, (_, _, future), result in zip(routes, queued, results):
+            if future.done():
+                continue
+            if "200" in result:
+                future.set_result(result["200"])
+            else:
+                future.set_exception(batch_item_error(route, result))
 
     async def get_board_checklists(self, id: str) -> list[Checklist]:
         """Get all checklists on a board."""
         result = await self._request(
-            "get", f"{ROOT}/1/boards/{id}/checklists", {"fields": "all"}
+            "get", f"{ROOT}/1/boards/{id}/checklists", CHECKLIST_PARAMS
         )
         return [Checklist.model_validate(item) for item in result]
 
     async def get_board_cards(self, id: str) -> list[Card]:
         """Get all cards on a board."""
-        result = await self._request("get", f"{ROOT}/1/boards/{id}/cards")
+        result = await self._request("get", f"{ROOT}/1/boards/{id}/cards", CARD_PARAMS)
         return [Card.model_validate(item) for item in result]
 
+    async def get_board_snapshot(self, id: str) -> BoardSnapshot:
+        """Get all cards on a board together with their checklists.
+
+        With a response cache, an unchanged board is served from disk: by
+        revalidating the stored response, or, when Trello sent no
+        validators for it, by comparing the board's dateLastActivity.
+        """
+        url = f"{ROOT}/1/boards/{id}/cards"
+        params = SNAPSHOT_PARAMS
+        last_activity = None
+        entry = None
+        if self.response_cache is not None:
+            entry = self.response_cache.load(
+                url, {"key": self.key, "token": self.token, **params}
+            )
+            if not self.response_cache.has_validators(entry):
+                board = await self._request(
+                    "get", f"{ROOT}/1/boards/{id}", {"fields": "dateLastActivity"}
+                )
+                last_activity = board.get("dateLastActivity")
+
+        result = await self._request(
+            "get", url, params, last_activity=last_activity, entry=entry
+        )
+        snapshot = BoardSnapshot([Card.model_validate(item) for item in result])
+        for card in snapshot.cards:
+            for checklist in card.checklists:
+                self.checklist_cache.put(checklist)
+        return snapshot
+
     async def get_card(self, id: str) -> Card:
         """Get a card by ID."""
-        result = await self._request("get", f"{ROOT}/1/cards/{id}")
+        result = await self._batched_get(f"/cards/{id}", CARD_PARAMS)
         return Card.model_validate(result)
 
     async def get_checklist(self, id: str) -> Checklist:
-        """Get a checklist by ID."""
-        result = await self._request("get", f"{ROOT}/1/checklists/{id}")
-        return Checklist.model_validate(result)
+        """Get a checklist by ID, from the cache if it is unchanged."""
+        cached = self.checklist_cache.get(id)
+        if cached is not None:
+            return cached
+
+        result = await self._batched_get(f"/checklists/{id}", CHECKLIST_PARAMS)
+        checklist = Checklist.model_validate(result)
+        self.checklist_cache.put(checklist)
+        return checklist
 
     async def update_checklist(self, id: str, data: Checklist) -> dict[str, Any]:
         """Update a checklist."""
+        self.checklist_cache.invalidate(id)
         return await self._request(
             "put", f"{ROOT}/1/checklists/{id}", data=data.model_dump()
         )
@@ -125,6 +682,7 @@ class TrelloClient:
         data: ChecklistItem,
     ) -> dict[str, Any]:
         """Update a checklist item."""
+        self.checklist_cache.invalidate(id_checklist)
         return await self._request(
             "put",
             f"{ROOT}/1/cards/{id_card}/checklist/{id_checklist}/checkItem/{id_check_item}",
@@ -138,6 +696,7 @@ class TrelloClient:
         pos: int | None = None,
     ) -> ChecklistItem:
         """Add a checklist item to a checklist."""
+        self.checklist_cache.invalidate(id_checklist)
         data: dict[str, Any] = {"name": name}
         if pos is not None:
             data["pos"] = pos
@@ -148,7 +707,7 @@ class TrelloClient:
 
     async def get_list_cards(self, id_list: str) -> list[Card]:
         """Get cards in a specific list."""
-        result = await self._request("get", f"{ROOT}/1/lists/{id_list}/cards")
+        result = await self._request("get", f"{ROOT}/1/lists/{id_list}/cards", CARD_PARAMS)
         return [Card.model_validate(item) for item in result]
 
     async def move_card_to_list(self, id_card: str, id_list: str) -> dict[str, Any]:
@@ -163,6 +722,50 @@ class TrelloClient:
             "delete", f"{ROOT}/1/cards/{id_card}/idLabels/{id_label}"
         )
 
+    async def get_board_actions(
+        self,
+        id: str,
+        since: str | None = None,
+        limit: int | None = None,
+        filter: str = CARD_ACTIONS,
+    ) -> list[dict[str, Any]]:
+        """Get actions on a board, newest first.
+
+        Pages back through the feed until `since` (or `limit`) is reached.
+        Actions are not cached, since every poll asks for a different range.
+
+        Args:
+            id: Board ID
+            since: Only get actions after this action ID
+            limit: Maximum number of actions to get; all of them if not given
+            filter: Comma-separated action types to get
+        """
+        actions: list[dict[str, Any]] = []
+        params: dict[str, Any] = {
+            "filter": filter,
+            "fields": "type,data",
+            "memberCreator": "false",
+        }
+        if since is not None:
+            params["since"] = since
+
+        while limit is None or len(actions) < limit:
+            page_size = ACTIONS_PAGE_SIZE
+            if limit is not None:
+                page_size = min(page_size, limit - len(actions))
+            page = await self._request(
+                "get",
+                f"{ROOT}/1/boards/{id}/actions",
+                {**params, "limit": page_size},
+                cached=False,
+            )
+            actions.extend(page)
+            if len(page) < page_size:
+                break
+            params["before"] = page[-1]["id"]
+
+        return actions
+
     async def get_board_lists(self, id_board: str) -> list[dict[str, Any]]:
         """Get all lists on a board."""
         return await self._request("get", f"{ROOT}/1/boards/{id_board}/lists")
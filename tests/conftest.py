@@ -0,0 +1,32 @@
+"""Fixtures shared by the test modules."""
+
+from collections.abc import AsyncIterator
+
+import pytest
+
+from shopr.main import Prefs
+from shopr.trello import TrelloClient
+
+
+CREDENTIALS = {"key": "test_key", "token": "test_token"}
+
+
+@pytest.fixture
+def prefs() -> Prefs:
+    """Create test preferences."""
+    return Prefs({
+        **CREDENTIALS,
+        "board": "board123",
+        "trainLabel": "train",
+        "orderLabel": "order",
+        "populateLabel": "populate",
+        "availableList": "available123",
+        "selectedList": "selected123",
+    })
+
+
+@pytest.fixture
+async def trello_client() -> AsyncIterator[TrelloClient]:
+    """Create a TrelloClient for testing."""
+    async with TrelloClient(**CREDENTIALS) as client:
+        yield client
@@ -0,0 +1,71 @@
+"""Tests for the benchmark suite."""
+
+from shopr.bench import Corpus, compare, run_benchmarks, run_end_to_end
+
+
+class TestCorpus:
+    """Tests for the synthetic item corpus."""
+
+    def test_is_reproducible(self) -> None:
+        """Test that the same seed generates the same items."""
+        assert Corpus(seed=7).names(50) == Corpus(seed=7).names(50)
+
+    def test_builds_tables_and_checklists_of_requested_size(self) -> None:
+        """Test that generated tables and checklists have the requested size."""
+        corpus = Corpus()
+
+        assert len(corpus.scores(300)) >= 300
+        assert len(corpus.checklist(20).checkItems) == 20
+
+
+class TestRunBenchmarks:
+    """Tests for run_benchmarks function."""
+
+    def test_reports_every_benchmark(self) -> None:
+        """Test that each function is measured for each size."""
+        reported: list[str] = []
+
+        results = run_benchmarks((100,), (5,), lambda name, _: reported.append(name))
+
+        assert list(results) == reported
+        assert "lookup_candidates[cold]" in results
+        assert "lookup_many[keys=100,items=5]" in results
+        assert "train[python,keys=100,items=5]" in results
+        assert all(
+            result["ops_per_sec"] > 0 and result["peak_bytes"] >= 0
+            for result in results.values()
+        )
+
+
+class TestRunEndToEnd:
+    """Tests for run_end_to_end function."""
+
+    async def test_runs_every_phase_against_fake_board(self) -> None:
+        """Test that a full run is timed and its requests counted by route."""
+        board = Corpus().board(8)
+
+        result = await run_end_to_end(board, latency=0.0, jitter=0.0)
+
+        assert result["seconds"] > 0
+        assert result["requests"] == sum(result["routes"].values())
+        assert result["routes"]["GET /1/boards/{board}/cards"] == 1
+        assert "POST /1/checklists/{checklist}/checkItems" in result["routes"]
+        assert not any(card.labels for card in board.cards.values())
+
+
+class TestCompare:
+    """Tests for compare function."""
+
+    def test_flags_only_drops_beyond_tolerance(self) -> None:
+        """Test that small slowdowns and new benchmarks are not regressions."""
+        baseline = {
+            "lookup": {"ops_per_sec": 100.0, "peak_bytes": 0},
+            "update": {"ops_per_sec": 100.0, "peak_bytes": 0},
+        }
+        results = {
+            "lookup": {"ops_per_sec": 85.0, "peak_bytes": 0},
+            "update": {"ops_per_sec": 70.0, "peak_bytes": 0},
+            "train": {"ops_per_sec": 1.0, "peak_bytes": 0},
+        }
+
+        assert compare(results, baseline, tolerance=0.2) == ["update"]
@@ -0,0 +1,113 @@
+"""Tests for the in-process fake Trello API."""
+
+import asyncio
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+import pytest
+
+from shopr.fake_trello import FakeBoard, FakeTrello
+from shopr.main import Prefs, run
+from shopr.trello import TrelloBatchError, TrelloClient
+
+
+@pytest.fixture
+def board() -> FakeBoard:
+    """Create a board with a recipe, a list to order and a list to populate."""
+    board = FakeBoard()
+    available = board.add_list("Recipes")
+    selected = board.add_list("Selected recipes")
+    shopping = board.add_list("Shopping lists")
+
+    recipe = board.add_card("Pancakes", selected)
+    board.add_checklist(recipe.id, ["Milk", "Egg", "Flour"])
+    board.add_card("Soup", available)
+    ordered = board.add_card("Weekly", shopping, ["order"])
+    board.add_checklist(ordered.id, ["Bread", "Milk"])
+    board.add_card("Shopping list", shopping, ["populate"])
+    return board
+
+
+@pytest.fixture
+async def trello_client(board: FakeBoard) -> AsyncIterator[TrelloClient]:
+    """Create a TrelloClient talking to the fake."""
+    async with TrelloClient(
+        key="test_key", token="test_token", transport=FakeTrello(board)
+    ) as client:
+        yield client
+
+
+class TestFakeTrello:
+    """Tests for FakeTrello transport."""
+
+    async def test_serves_full_run(
+        self,
+        board: FakeBoard,
+        trello_client: TrelloClient,
+        tmp_path: Path,
+    ) -> None:
+        """Test that a run orders, populates and resets labels on the fake board."""
+        prefs = Prefs(board.prefs(cacheDir=None, scoresFile=str(tmp_path / "scores.json")))
+
+        await run(trello_client, prefs)
+
+        cards = {card.name: card for card in board.cards.values()}
+        assert not any(card.labels for card in cards.values())
+        assert cards["Pancakes"].idList == prefs.available_list
+        populated = board.checklists[cards["Shopping list"].idChecklists[0]]
+        assert sorted(item.name for item in populated.checkItems) == [
+            "Egg [unsorted]", "Flour [unsorted]", "Milk [unsorted]",
+        ]
+
+    async def test_resolves_batched_gets(
+        self,
+        board: FakeBoard,
+        trello_client: TrelloClient,
+    ) -> None:
+        """Test that concurrent GETs arrive as one batch with per-route results."""
+        fake = trello_client.transport
+        card_id = next(iter(board.cards))
+
+        card, missing = await asyncio.gather(
+            trello_client.get_card(card_id),
+            trello_client.get_card("missing"),
+            return_exceptions=True,
+        )
+
+        assert card.name == "Pancakes"
+        assert isinstance(missing, TrelloBatchError)
+        assert missing.status_code == 404
+        assert fake.requests == {"GET /1/batch": 1}
+        assert fake.batched == {"GET /1/cards/{card}": 2}
+
+    async def test_records_changes_in_actions_feed(
+        self,
+        board: FakeBoard,
+        trello_client: TrelloClient,
+    ) -> None:
+        """Test that writes show up as card actions, newest first."""
+        card_id = next(iter(board.cards))
+        latest = await trello_client.get_board_actions(board.id, limit=1)
+        assert latest == []
+
+        checklist = await trello_client.create_checklist(card_id)
+        await trello_client.add_checklist_item(checklist.id, "Butter")
+
+        actions = await trello_client.get_board_actions(board.id)
+        assert [action["type"] for action in actions] == [
+            "createCheckItem", "addChecklistToCard",
+        ]
+        assert all(action["data"]["card"]["id"] == card_id for action in actions)
+
+    async def test_rate_limits_and_client_retries(self, board: FakeBoard) -> None:
+        """Test that requests over the limit get 429 until the window passes."""
+        fake = FakeTrello(board, rate_limit=1, rate_window=0.05)
+
+        async with TrelloClient("test_key", "test_token", transport=fake) as client:
+            await client.get_board_lists(board.id)
+            lists = await client.get_board_lists(board.id)
+
+        assert len(lists) == 3
+        assert fake.rate_limited == 1
+        assert client.scheduler.retries == 1
+        assert fake.requests == {"GET /1/boards/{board}/lists": 3}
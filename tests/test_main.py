@@ -1,32 +1,47 @@
 """Tests for the main shopr business logic."""
 
+import asyncio
 import json
+import random
 
+import httpx
 import pytest
 from pytest_httpx import HTTPXMock
 
+from shopr.fake_trello import FakeBoard, FakeTrello
 from shopr.main import (
     DEFAULT_SCORE,
+    candidate_cache_info,
+    describe_error,
     make_scores,
     lookup_candidates,
     lookup,
+    lookup_many,
     update,
     train,
+    gather_limited,
     get_train_set,
     order_list,
+    plan_moves,
+    reset_label,
     populate_shopping_list,
     parse_item_quantity,
     format_item_with_quantity,
     Prefs,
+    Scores,
 )
 from shopr.trello import (
     Card,
     Checklist,
     ChecklistItem,
     TrelloClient,
+    CHECKLIST_PARAMS,
     ROOT,
+    SNAPSHOT_PARAMS,
 )
 
+from .conftest import CREDENTIALS
+
 
 class TestMakeScores:
     """Tests for make_scores function."""
@@ -47,6 +62,54 @@ class TestMakeScores:
         assert scores["bread"] == DEFAULT_SCORE
 
 
+class TestScores:
+    """Tests for the interned Scores mapping."""
+
+    def test_behaves_like_a_dict(self) -> None:
+        """Test the mapping API over interned keys."""
+        scores = make_scores({"milk": 1.0, "low,milk": 2.0})
+        scores["egg"] = 3.0
+
+        assert list(scores.items()) == [("milk", 1.0), ("low,milk", 2.0), ("egg", 3.0)]
+        assert "low,milk" in scores
+        assert "bread" not in scores
+        assert scores.get("bread") is None
+        assert len(scores) == 3
+        assert scores.popitem() == ("egg", 3.0)
+        assert scores.pop("bread", 5.0) == 5.0
+        assert dict(scores.copy()) == {"milk": 1.0, "low,milk": 2.0}
+
+    def test_copy_is_independent(self) -> None:
+        """Test that a copy keeps keys, order and index but shares nothing."""
+        scores = make_scores({"broth,chicken": 100.0, "chicken,thigh": 700.0})
+        copy = scores.copy()
+        copy["chicken,thigh"] = 1.0
+        copy["broth,chicken,stock"] = 2.0
+        del copy["broth,chicken"]
+
+        assert dict(scores) == {"broth,chicken": 100.0, "chicken,thigh": 700.0}
+        assert scores.index.best_overlap({"broth", "chicken"}) == "broth,chicken"
+        assert list(copy) == ["chicken,thigh", "broth,chicken,stock"]
+        assert copy.index.best_overlap({"broth", "chicken"}) == "broth,chicken,stock"
+
+    def test_interns_words_once(self) -> None:
+        """Test that words shared between keys are stored once."""
+        scores = make_scores({"milk": 1.0, "low,milk": 2.0, "fat,low,milk": 3.0})
+
+        assert scores.words.words == ["milk", "low", "fat"]
+        assert len(scores.score_array) == 3
+
+    def test_reuses_deleted_slots(self) -> None:
+        """Test that a deleted key's slot is reused and ordered as new."""
+        scores = make_scores({"broth,chicken": 100.0, "chicken,thigh": 700.0})
+        del scores["broth,chicken"]
+        scores["broth,chicken"] = 100.0
+
+        assert len(scores.score_array) == 2
+        assert list(scores) == ["chicken,thigh", "broth,chicken"]
+        assert scores.index.best_overlap({"chicken", "stock"}) == "chicken,thigh"
+
+
 class TestParseItemQuantity:
     """Tests for parse_item_quantity function."""
 
@@ -95,32 +158,32 @@ class TestLookupCandidates:
 
     def test_simple_name(self) -> None:
         """Test simple single-word name."""
-        assert lookup_candidates("Milk") == ["milk"]
+        assert lookup_candidates("Milk") == ("milk",)
 
     def test_multi_word(self) -> None:
         """Test multi-word name returns sorted words."""
-        assert lookup_candidates("Whole Milk") == ["milk", "whole"]
+        assert lookup_candidates("Whole Milk") == ("milk", "whole")
 
     def test_strips_unsorted_tag(self) -> None:
         """Test that [unsorted] tag is removed."""
-        assert lookup_candidates("Milk [unsorted]") == ["milk"]
+        assert lookup_candidates("Milk [unsorted]") == ("milk",)
 
     def test_strips_numbers_and_parens(self) -> None:
         """Test that numbers, units, and parentheses are removed."""
-        assert lookup_candidates("Milk (2L)") == ["milk"]
+        assert lookup_candidates("Milk (2L)") == ("milk",)
 
     def test_normalizes_whitespace(self) -> None:
         """Test that extra whitespace is normalized."""
-        assert lookup_candidates("  Whole   Milk  ") == ["milk", "whole"]
+        assert lookup_candidates("  Whole   Milk  ") == ("milk", "whole")
 
     def test_strips_unit_with_no_space(self) -> None:
         """Test that a unit glued to a number doesn't survive as a word."""
-        assert lookup_candidates("Yogurt (500g)") == ["yogurt"]
+        assert lookup_candidates("Yogurt (500g)") == ("yogurt",)
 
     def test_strips_descriptor_stopwords(self) -> None:
         """Test that non-identifying descriptors are filtered out."""
-        assert lookup_candidates("Fresh Basil") == ["basil"]
-        assert lookup_candidates("Fresh Cilantro") == ["cilantro"]
+        assert lookup_candidates("Fresh Basil") == ("basil",)
+        assert lookup_candidates("Fresh Cilantro") == ("cilantro",)
 
     def test_singularizes_plurals(self) -> None:
         """Test that plural and singular forms normalize to the same word."""
@@ -131,16 +194,27 @@ class TestLookupCandidates:
         gets wrong (e.g. "gulrøtter" does not just drop an "-er")."""
         assert lookup_candidates("Gulrøtter") == lookup_candidates("Gulrot")
         assert lookup_candidates("Poteter") == lookup_candidates("Potet")
-        assert lookup_candidates("Eggs") == ["egg"]
+        assert lookup_candidates("Eggs") == ("egg",)
 
     def test_does_not_mangle_us_and_ss_endings(self) -> None:
         """Test that words like "asparagus" and "swiss" aren't truncated."""
-        assert lookup_candidates("Asparagus") == ["asparagus"]
-        assert lookup_candidates("Swiss Cheese") == ["cheese", "swiss"]
+        assert lookup_candidates("Asparagus") == ("asparagus",)
+        assert lookup_candidates("Swiss Cheese") == ("cheese", "swiss")
 
     def test_strips_extra_punctuation(self) -> None:
         """Test that hyphens and commas are treated as separators."""
-        assert lookup_candidates("Low-Fat Milk") == ["fat", "low", "milk"]
+        assert lookup_candidates("Low-Fat Milk") == ("fat", "low", "milk")
+
+    def test_repeated_names_hit_cache(self) -> None:
+        """Test that looking up the same name again is served from cache."""
+        lookup_candidates("Brunost")
+        before = candidate_cache_info()["lookup_candidates"]
+
+        assert lookup_candidates("Brunost") == ("brunost",)
+
+        after = candidate_cache_info()["lookup_candidates"]
+        assert after["hits"] == before["hits"] + 1
+        assert after["misses"] == before["misses"]
 
 
 class TestLookup:
@@ -191,6 +265,79 @@ class TestLookup:
         assert lookup(scores, "Chicken Stock") == 300.0
 
 
+    def test_best_overlap_ties_go_to_earliest_key(self) -> None:
+        """Test that equally similar keys resolve in table order."""
+        scores = make_scores({"broth,chicken": 100.0, "chicken,thigh": 700.0})
+        assert lookup(scores, "Chicken Stock") == 100.0
+
+        scores = make_scores({"chicken,thigh": 700.0, "broth,chicken": 100.0})
+        assert lookup(scores, "Chicken Stock") == 700.0
+
+    def test_index_matches_full_scan(self) -> None:
+        """Test that the word index picks the same key as scanning every key."""
+        words = ["milk", "whole", "low", "fat", "chicken", "thigh", "broth", "egg"]
+        data = {
+            ",".join(sorted({words[i % 8], words[(i * 3) % 8], words[(i * 5 + 1) % 8]})): float(i)
+            for i in range(40)
+        }
+        scores = make_scores(data)
+
+        def scan(query: set[str]) -> str | None:
+            best_key, best_similarity = None, 0.0
+            for key in scores:
+                if "," not in key:
+                    continue
+                key_words = set(key.split(","))
+                if not query & key_words:
+                    continue
+                similarity = len(query & key_words) / len(query | key_words)
+                if similarity > best_similarity:
+                    best_key, best_similarity = key, similarity
+            return best_key
+
+        for i in range(len(words)):
+            for j in range(i, len(words)):
+                query = {words[i], words[j], "unknown"}
+                assert scores.index.best_overlap(query) == scan(query)
+
+    def test_index_follows_deletes(self) -> None:
+        """Test that removed keys no longer match."""
+        scores = make_scores({"broth,chicken": 100.0})
+        del scores["broth,chicken"]
+
+        assert scores.index.best_overlap({"chicken"}) is None
+
+
+class TestLookupMany:
+    """Tests for lookup_many function."""
+
+    def test_matches_lookup_and_flags_exact_hits(self) -> None:
+        """Test that scores match lookup and only full-key hits are exact."""
+        scores = make_scores({"milk": 500.0, "chicken,thigh": 700.0, "chicken": 300.0})
+        names = ["Milk", "Chicken Thigh", "Chicken Stock", "Saffron", "2 kg"]
+
+        results = lookup_many(scores, names)
+
+        assert [score for score, _ in results] == [lookup(scores, name) for name in names]
+        assert [exact for _, exact in results] == [True, True, False, False, False]
+
+    def test_searches_each_distinct_miss_once(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that names normalizing alike share one best-overlap search."""
+        scores = make_scores({"broth,chicken": 100.0})
+        searched: list[set[str]] = []
+        best_overlap = scores.index.best_overlap
+
+        def counting_best_overlap(query_words: set[str]) -> str | None:
+            searched.append(query_words)
+            return best_overlap(query_words)
+
+        monkeypatch.setattr(scores.index, "best_overlap", counting_best_overlap)
+        results = lookup_many(scores, ["Chicken Stock", "chicken stock 2", "Broth Chicken"])
+
+        assert results == [(100.0, False), (100.0, False), (100.0, True)]
+        assert searched == [{"chicken", "stock"}]
+
+
 class TestUpdate:
     """Tests for update function."""
 
@@ -278,25 +425,52 @@ class TestTrain:
         assert "bread" in new_scores
 
 
-@pytest.fixture
-def prefs() -> Prefs:
-    """Create test preferences."""
-    return Prefs({
-        "key": "test_key",
-        "token": "test_token",
-        "board": "board123",
-        "trainLabel": "train",
-        "orderLabel": "order",
-        "populateLabel": "populate",
-        "availableList": "available123",
-        "selectedList": "selected123",
-    })
+    @pytest.mark.parametrize("seed", range(5))
+    def test_numpy_engine_matches_python_engine(self, seed: int) -> None:
+        """Test that the vectorized engine produces the same scores."""
+        pytest.importorskip("numpy")
+        rng = random.Random(seed)
+        words = ["milk", "bread", "egg", "cheese", "ham", "apple", "salt", "rice"]
+        checklist = Checklist(
+            id="c",
+            checkItems=[
+                ChecklistItem(
+                    id=str(i),
+                    idChecklist="c",
+                    # Repeated names and positions exercise the shared
+                    # running totals and the equal-position skip
+                    name=" ".join(rng.sample(words, rng.randint(1, 2))),
+                    pos=rng.randint(0, 15),
+                )
+                for i in range(30)
+            ],
+        )
+        old_scores = make_scores({"milk": 900.0, "bread,egg": 1100.0})
+
+        python_scores = train(checklist, old_scores, engine="python")
+        numpy_scores = train(checklist, old_scores, engine="numpy")
+
+        assert dict(numpy_scores) == pytest.approx(dict(python_scores))
+
+    def test_rejects_unknown_engine(self) -> None:
+        """Test that an unknown engine name is an error."""
+        with pytest.raises(ValueError):
+            train(Checklist(id="c"), make_scores(), engine="fortran")
+
+
+BOARD_URL = httpx.URL(
+    f"{ROOT}/1/boards/board123/cards",
+    params={**CREDENTIALS, **SNAPSHOT_PARAMS},
+)
 
 
 @pytest.fixture
-def trello_client() -> TrelloClient:
-    """Create a TrelloClient for testing."""
-    return TrelloClient(key="test_key", token="test_token")
+def recipe_scores() -> Scores:
+    """Create scores for the ingredients used in the recipe tests."""
+    scores = make_scores()
+    for i, name in enumerate(["Cheese", "Pasta", "Tomatoes", "Garlic", "Milk", "Eggs"]):
+        update(scores, name, 1000.0 + 10 * i)
+    return scores
 
 
 class TestGetTrainSet:
@@ -332,12 +506,11 @@ class TestGetTrainSet:
         )
 
         httpx_mock.add_response(
-            url=f"{ROOT}/1/boards/board123/cards?key=test_key&token=test_token",
-            json=[card_with_label.model_dump(), card_without_label.model_dump()],
-        )
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/checklists/checklist1?key=test_key&token=test_token",
-            json=checklist.model_dump(),
+            url=BOARD_URL,
+            json=[
+                {**card_with_label.model_dump(), "checklists": [checklist.model_dump()]},
+                card_without_label.model_dump(),
+            ],
         )
 
         result = await get_train_set(trello_client, prefs)
@@ -361,7 +534,7 @@ class TestGetTrainSet:
         )
 
         httpx_mock.add_response(
-            url=f"{ROOT}/1/boards/board123/cards?key=test_key&token=test_token",
+            url=BOARD_URL,
             json=[card.model_dump()],
         )
 
@@ -370,6 +543,91 @@ class TestGetTrainSet:
         assert result == []
 
 
+    async def test_preserves_checklist_order(
+        self,
+        prefs: Prefs,
+        httpx_mock: HTTPXMock,
+    ) -> None:
+        """Test that concurrently fetched checklists keep the card order."""
+        cards = [
+            Card(
+                id=f"card{i}",
+                name=f"Card {i}",
+                idChecklists=[f"checklist{i}"],
+                labels=[{"id": "l1", "name": "train"}],
+            )
+            for i in range(5)
+        ]
+        httpx_mock.add_response(
+            url=BOARD_URL,
+            json=[card.model_dump() for card in cards],
+        )
+        for i in range(5):
+            httpx_mock.add_response(
+                url=httpx.URL(
+                    f"{ROOT}/1/checklists/checklist{i}",
+                    params={**CREDENTIALS, **CHECKLIST_PARAMS},
+                ),
+                json=Checklist(id=f"checklist{i}", idCard=f"card{i}").model_dump(),
+            )
+
+        # Fetch checklists one by one so each has its own mocked URL
+        async with TrelloClient(key="test_key", token="test_token", batch_window=None) as client:
+            result = await get_train_set(client, prefs, concurrency=2)
+
+        assert [c.id for c in result] == [f"checklist{i}" for i in range(5)]
+
+
+class TestGatherLimited:
+    """Tests for gather_limited function."""
+
+    async def test_limits_concurrency_and_preserves_order(self) -> None:
+        """Test that no more than `limit` awaitables run at once."""
+        running = 0
+        peak = 0
+
+        async def work(value: int) -> int:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01 * (5 - value))
+            running -= 1
+            return value
+
+        result = await gather_limited((work(i) for i in range(5)), limit=2)
+
+        assert result == [0, 1, 2, 3, 4]
+        assert peak == 2
+
+
+class TestResetLabel:
+    """Tests for reset_label function."""
+
+    async def test_removes_label_without_fetching_cards(
+        self,
+        trello_client: TrelloClient,
+        httpx_mock: HTTPXMock,
+    ) -> None:
+        """Test that labels are removed using the loaded cards only."""
+        cards = [
+            Card(id="card1", name="One", labels=[{"id": "l1", "name": "train"}]),
+            Card(id="card2", name="Two", labels=[{"id": "l1", "name": "train"}, {"id": "l2", "name": "x"}]),
+            Card(id="card3", name="Three", labels=[{"id": "l2", "name": "x"}]),
+        ]
+        for card_id in ("card1", "card2"):
+            httpx_mock.add_response(
+                url=f"{ROOT}/1/cards/{card_id}/idLabels/l1?key=test_key&token=test_token",
+                method="DELETE",
+                json={},
+            )
+
+        await reset_label(trello_client, "train", cards)
+
+        requests = httpx_mock.get_requests()
+        assert len(requests) == 2
+        assert all(r.method == "DELETE" for r in requests)
+
+
 class TestOrderList:
     """Tests for order_list function."""
 
@@ -399,27 +657,14 @@ class TestOrderList:
         )
 
         httpx_mock.add_response(
-            url=f"{ROOT}/1/boards/board123/cards?key=test_key&token=test_token",
-            json=[card.model_dump()],
-        )
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/checklists/checklist1?key=test_key&token=test_token",
-            json=checklist.model_dump(),
-        )
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/cards/card1/checklist/checklist1/checkItem/item1?key=test_key&token=test_token",
-            method="PUT",
-            json={"id": "item1"},
+            url=BOARD_URL,
+            json=[{**card.model_dump(), "checklists": [checklist.model_dump()]}],
         )
         httpx_mock.add_response(
             url=f"{ROOT}/1/cards/card1/checklist/checklist1/checkItem/item2?key=test_key&token=test_token",
             method="PUT",
             json={"id": "item2"},
         )
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/cards/card1?key=test_key&token=test_token",
-            json=card.model_dump(),
-        )
         httpx_mock.add_response(
             url=f"{ROOT}/1/cards/card1/idLabels/l1?key=test_key&token=test_token",
             method="DELETE",
@@ -428,10 +673,11 @@ class TestOrderList:
 
         await order_list(trello_client, scores, prefs)
 
-        # Verify the update calls were made
+        # Only Milk needs to move, to before Bread
         requests = httpx_mock.get_requests()
         put_requests = [r for r in requests if r.method == "PUT"]
-        assert len(put_requests) == 2
+        assert len(put_requests) == 1
+        assert json.loads(put_requests[0].content)["pos"] < 1000
 
     async def test_adds_unsorted_tag_to_unknown_items(
         self,
@@ -458,22 +704,14 @@ class TestOrderList:
         )
 
         httpx_mock.add_response(
-            url=f"{ROOT}/1/boards/board123/cards?key=test_key&token=test_token",
-            json=[card.model_dump()],
-        )
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/checklists/checklist1?key=test_key&token=test_token",
-            json=checklist.model_dump(),
+            url=BOARD_URL,
+            json=[{**card.model_dump(), "checklists": [checklist.model_dump()]}],
         )
         httpx_mock.add_response(
             url=f"{ROOT}/1/cards/card1/checklist/checklist1/checkItem/item1?key=test_key&token=test_token",
             method="PUT",
             json={"id": "item1"},
         )
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/cards/card1?key=test_key&token=test_token",
-            json=card.model_dump(),
-        )
         httpx_mock.add_response(
             url=f"{ROOT}/1/cards/card1/idLabels/l1?key=test_key&token=test_token",
             method="DELETE",
@@ -491,12 +729,146 @@ class TestOrderList:
         assert "[unsorted]" in body["name"]
 
 
+    async def test_failed_card_keeps_label_without_affecting_others(
+        self,
+        trello_client: TrelloClient,
+        prefs: Prefs,
+        httpx_mock: HTTPXMock,
+        caplog: pytest.LogCaptureFixture,
+    ) -> None:
+        """Test that one card failing to order does not stop the rest."""
+        scores = make_scores({"bread": 200.0, "milk": 100.0})
+        cards = []
+        for name in ("good", "bad"):
+            checklist = Checklist(
+                id=f"{name}_checklist",
+                checkItems=[
+                    ChecklistItem(id=f"{name}1", idChecklist=f"{name}_checklist", name="Bread", pos=1000),
+                    ChecklistItem(id=f"{name}2", idChecklist=f"{name}_checklist", name="Milk", pos=2000),
+                ],
+            )
+            cards.append({
+                **Card(
+                    id=name,
+                    name=f"{name} list",
+                    idChecklists=[checklist.id],
+                    labels=[{"id": f"l_{name}", "name": "order"}],
+                ).model_dump(),
+                "checklists": [checklist.model_dump()],
+            })
+
+        httpx_mock.add_response(url=BOARD_URL, json=cards)
+        httpx_mock.add_response(
+            url=f"{ROOT}/1/cards/good/checklist/good_checklist/checkItem/good2?key=test_key&token=test_token",
+            method="PUT",
+            json={},
+        )
+        httpx_mock.add_response(
+            url=f"{ROOT}/1/cards/bad/checklist/bad_checklist/checkItem/bad2?key=test_key&token=test_token",
+            method="PUT",
+            status_code=404,
+        )
+        httpx_mock.add_response(
+            url=f"{ROOT}/1/cards/good/idLabels/l_good?key=test_key&token=test_token",
+            method="DELETE",
+            json={},
+        )
+
+        failed = await order_list(trello_client, scores, prefs)
+
+        deletes = [r for r in httpx_mock.get_requests() if r.method == "DELETE"]
+        assert [str(r.url.path) for r in deletes] == ["/1/cards/good/idLabels/l_good"]
+        assert [card.id for card in failed] == ["bad"]
+        # The error the card failed with is logged, not just its group
+        assert "Ordering bad list failed: Client error '404 Not Found'" in caplog.text
+
+
+class TestDescribeError:
+    """Tests for describe_error function."""
+
+    def test_lists_errors_in_nested_groups(self) -> None:
+        """Test that the errors of nested groups are all described."""
+        error = ExceptionGroup("outer", [
+            ValueError("bad value"),
+            ExceptionGroup("inner", [KeyError("missing")]),
+        ])
+
+        assert describe_error(error) == "bad value; 'missing'"
+
+    def test_plain_error(self) -> None:
+        """Test that other errors are described by their message."""
+        assert describe_error(RuntimeError("failed")) == "failed"
+
+
+class TestPlanMoves:
+    """Tests for plan_moves function."""
+
+    @staticmethod
+    def items(*positions: float) -> list[ChecklistItem]:
+        """Create checklist items named by index at the given positions."""
+        return [
+            ChecklistItem(id=str(i), idChecklist="c", name=str(i), pos=pos)
+            for i, pos in enumerate(positions)
+        ]
+
+    @staticmethod
+    def apply(items: list[ChecklistItem], moves: dict[str, float]) -> list[str]:
+        """Get item IDs in list order after applying the moves."""
+        return [
+            item.id
+            for item in sorted(items, key=lambda item: moves.get(item.id, item.pos))
+        ]
+
+    def test_sorted_list_needs_no_moves(self) -> None:
+        """Test that an already ordered list is left alone."""
+        items = self.items(100, 200, 300)
+        ideal = {"0": 5, "1": 6, "2": 7}
+
+        assert plan_moves(items, ideal) == {}
+
+    def test_moves_only_out_of_place_item(self) -> None:
+        """Test that a single misplaced item is the only write."""
+        items = self.items(100, 200, 300, 400)
+        # Item 3 belongs first
+        ideal = {"0": 10, "1": 20, "2": 30, "3": 5}
+
+        moves = plan_moves(items, ideal)
+
+        assert list(moves) == ["3"]
+        assert self.apply(items, moves) == ["3", "0", "1", "2"]
+
+    def test_uses_ideal_position_when_it_fits(self) -> None:
+        """Test that a moved item lands on its ideal position if possible."""
+        items = self.items(100, 200, 300)
+        ideal = {"0": 100, "1": 300, "2": 120}
+
+        assert plan_moves(items, ideal) == {"2": 120}
+
+    def test_reversed_list(self) -> None:
+        """Test that a reversed list keeps one item and moves the rest."""
+        items = self.items(*range(100, 600, 100))
+        ideal = {str(i): 10 - i for i in range(5)}
+
+        moves = plan_moves(items, ideal)
+
+        assert len(moves) == 4
+        assert self.apply(items, moves) == ["4", "3", "2", "1", "0"]
+
+    def test_ties_keep_current_order(self) -> None:
+        """Test that equally scored items are not shuffled."""
+        items = self.items(300, 100, 200)
+        ideal = {"0": 1, "1": 1, "2": 1}
+
+        assert plan_moves(items, ideal) == {}
+
+
 class TestPopulateShoppingList:
     """Tests for populate_shopping_list function."""
 
     async def test_populates_from_selected_recipes(
         self,
         trello_client: TrelloClient,
+        recipe_scores: Scores,
         prefs: Prefs,
         httpx_mock: HTTPXMock,
     ) -> None:
@@ -512,6 +884,7 @@ class TestPopulateShoppingList:
             id="recipe1",
             idBoard="board123",
             name="Pasta Recipe",
+            idList="selected123",
             idChecklists=["recipe_checklist"],
             labels=[],
         )
@@ -527,16 +900,11 @@ class TestPopulateShoppingList:
         new_item2 = ChecklistItem(id="new_item2", idChecklist="target_checklist", name="Tomatoes", pos=2)
 
         httpx_mock.add_response(
-            url=f"{ROOT}/1/boards/board123/cards?key=test_key&token=test_token",
-            json=[populate_card.model_dump()],
-        )
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/lists/selected123/cards?key=test_key&token=test_token",
-            json=[recipe_card.model_dump()],
-        )
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/checklists/recipe_checklist?key=test_key&token=test_token",
-            json=recipe_checklist.model_dump(),
+            url=BOARD_URL,
+            json=[
+                populate_card.model_dump(),
+                {**recipe_card.model_dump(), "checklists": [recipe_checklist.model_dump()]},
+            ],
         )
         httpx_mock.add_response(
             url=f"{ROOT}/1/checklists/target_checklist/checkItems?key=test_key&token=test_token",
@@ -548,27 +916,18 @@ class TestPopulateShoppingList:
             method="POST",
             json=new_item2.model_dump(),
         )
-        # Mock getting checklist again for resetting checkmarks
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/checklists/recipe_checklist?key=test_key&token=test_token",
-            json=recipe_checklist.model_dump(),
-        )
         httpx_mock.add_response(
             url=f"{ROOT}/1/cards/recipe1?key=test_key&token=test_token",
             method="PUT",
             json={"id": "recipe1"},
         )
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/cards/populate_card?key=test_key&token=test_token",
-            json=populate_card.model_dump(),
-        )
         httpx_mock.add_response(
             url=f"{ROOT}/1/cards/populate_card/idLabels/l1?key=test_key&token=test_token",
             method="DELETE",
             json={},
         )
 
-        await populate_shopping_list(trello_client, prefs)
+        await populate_shopping_list(trello_client, recipe_scores, prefs)
 
         requests = httpx_mock.get_requests()
         post_requests = [r for r in requests if r.method == "POST"]
@@ -578,9 +937,82 @@ class TestPopulateShoppingList:
         assert "Pasta" in posted_names
         assert "Tomatoes" in posted_names
 
+    async def test_inserts_items_in_score_order(
+        self,
+        trello_client: TrelloClient,
+        prefs: Prefs,
+        httpx_mock: HTTPXMock,
+    ) -> None:
+        """Test that items are positioned by score and unknown ones tagged."""
+        scores = make_scores({"bread": 300.0, "milk": 100.0, "egg": 100.0})
+        populate_card = Card(
+            id="populate_card",
+            name="Shopping List",
+            idChecklists=["target_checklist"],
+            labels=[{"id": "l1", "name": "populate"}],
+        )
+        recipe_card = Card(
+            id="recipe1",
+            name="Recipe",
+            idList="selected123",
+            idChecklists=["recipe_checklist"],
+        )
+        recipe_checklist = Checklist(
+            id="recipe_checklist",
+            checkItems=[
+                ChecklistItem(id="i1", idChecklist="recipe_checklist", name="Bread", pos=1),
+                ChecklistItem(id="i2", idChecklist="recipe_checklist", name="Milk", pos=2),
+                ChecklistItem(id="i3", idChecklist="recipe_checklist", name="Eggs", pos=3),
+                ChecklistItem(id="i4", idChecklist="recipe_checklist", name="Saffron", pos=4),
+            ],
+        )
+
+        httpx_mock.add_response(
+            url=BOARD_URL,
+            json=[
+                populate_card.model_dump(),
+                {**recipe_card.model_dump(), "checklists": [recipe_checklist.model_dump()]},
+            ],
+        )
+        httpx_mock.add_callback(
+            lambda request: httpx.Response(
+                200,
+                json={"id": "new", "idChecklist": "target_checklist", **json.loads(request.content)},
+            ),
+            url=f"{ROOT}/1/checklists/target_checklist/checkItems?key=test_key&token=test_token",
+            method="POST",
+            is_reusable=True,
+        )
+        httpx_mock.add_response(
+            url=f"{ROOT}/1/cards/recipe1?key=test_key&token=test_token",
+            method="PUT",
+            json={"id": "recipe1"},
+        )
+        httpx_mock.add_response(
+            url=f"{ROOT}/1/cards/populate_card/idLabels/l1?key=test_key&token=test_token",
+            method="DELETE",
+            json={},
+        )
+
+        await populate_shopping_list(trello_client, scores, prefs)
+
+        posted = sorted(
+            (json.loads(r.content) for r in httpx_mock.get_requests() if r.method == "POST"),
+            key=lambda body: body["pos"],
+        )
+        assert [body["name"] for body in posted] == [
+            "Milk",
+            "Eggs",
+            "Bread",
+            "Saffron [unsorted]",
+        ]
+        # Equal scores still get distinct positions
+        assert len({body["pos"] for body in posted}) == 4
+
     async def test_merges_duplicate_items(
         self,
         trello_client: TrelloClient,
+        recipe_scores: Scores,
         prefs: Prefs,
         httpx_mock: HTTPXMock,
     ) -> None:
@@ -596,6 +1028,7 @@ class TestPopulateShoppingList:
             id="recipe1",
             idBoard="board123",
             name="Recipe 1",
+            idList="selected123",
             idChecklists=["checklist1"],
             labels=[],
         )
@@ -603,6 +1036,7 @@ class TestPopulateShoppingList:
             id="recipe2",
             idBoard="board123",
             name="Recipe 2",
+            idList="selected123",
             idChecklists=["checklist2"],
             labels=[],
         )
@@ -623,35 +1057,18 @@ class TestPopulateShoppingList:
         new_item = ChecklistItem(id="new_item", idChecklist="target_checklist", name="milk 2", pos=1)
 
         httpx_mock.add_response(
-            url=f"{ROOT}/1/boards/board123/cards?key=test_key&token=test_token",
-            json=[populate_card.model_dump()],
-        )
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/lists/selected123/cards?key=test_key&token=test_token",
-            json=[recipe1.model_dump(), recipe2.model_dump()],
-        )
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/checklists/checklist1?key=test_key&token=test_token",
-            json=checklist1.model_dump(),
-        )
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/checklists/checklist2?key=test_key&token=test_token",
-            json=checklist2.model_dump(),
+            url=BOARD_URL,
+            json=[
+                populate_card.model_dump(),
+                {**recipe1.model_dump(), "checklists": [checklist1.model_dump()]},
+                {**recipe2.model_dump(), "checklists": [checklist2.model_dump()]},
+            ],
         )
         httpx_mock.add_response(
             url=f"{ROOT}/1/checklists/target_checklist/checkItems?key=test_key&token=test_token",
             method="POST",
             json=new_item.model_dump(),
         )
-        # Mock getting checklists again for resetting checkmarks
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/checklists/checklist1?key=test_key&token=test_token",
-            json=checklist1.model_dump(),
-        )
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/checklists/checklist2?key=test_key&token=test_token",
-            json=checklist2.model_dump(),
-        )
         httpx_mock.add_response(
             url=f"{ROOT}/1/cards/recipe1?key=test_key&token=test_token",
             method="PUT",
@@ -662,17 +1079,13 @@ class TestPopulateShoppingList:
             method="PUT",
             json={"id": "recipe2"},
         )
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/cards/populate_card?key=test_key&token=test_token",
-            json=populate_card.model_dump(),
-        )
         httpx_mock.add_response(
             url=f"{ROOT}/1/cards/populate_card/idLabels/l1?key=test_key&token=test_token",
             method="DELETE",
             json={},
         )
 
-        await populate_shopping_list(trello_client, prefs)
+        await populate_shopping_list(trello_client, recipe_scores, prefs)
 
         # Only one item should have been added with merged quantity
         # The casing should match the first occurrence ("Milk")
@@ -685,6 +1098,7 @@ class TestPopulateShoppingList:
     async def test_merges_items_with_explicit_quantities(
         self,
         trello_client: TrelloClient,
+        recipe_scores: Scores,
         prefs: Prefs,
         httpx_mock: HTTPXMock,
     ) -> None:
@@ -700,6 +1114,7 @@ class TestPopulateShoppingList:
             id="recipe1",
             idBoard="board123",
             name="Recipe 1",
+            idList="selected123",
             idChecklists=["checklist1"],
             labels=[],
         )
@@ -707,6 +1122,7 @@ class TestPopulateShoppingList:
             id="recipe2",
             idBoard="board123",
             name="Recipe 2",
+            idList="selected123",
             idChecklists=["checklist2"],
             labels=[],
         )
@@ -727,35 +1143,18 @@ class TestPopulateShoppingList:
         new_item = ChecklistItem(id="new_item", idChecklist="target_checklist", name="eggs 3", pos=1)
 
         httpx_mock.add_response(
-            url=f"{ROOT}/1/boards/board123/cards?key=test_key&token=test_token",
-            json=[populate_card.model_dump()],
-        )
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/lists/selected123/cards?key=test_key&token=test_token",
-            json=[recipe1.model_dump(), recipe2.model_dump()],
-        )
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/checklists/checklist1?key=test_key&token=test_token",
-            json=checklist1.model_dump(),
-        )
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/checklists/checklist2?key=test_key&token=test_token",
-            json=checklist2.model_dump(),
+            url=BOARD_URL,
+            json=[
+                populate_card.model_dump(),
+                {**recipe1.model_dump(), "checklists": [checklist1.model_dump()]},
+                {**recipe2.model_dump(), "checklists": [checklist2.model_dump()]},
+            ],
         )
         httpx_mock.add_response(
             url=f"{ROOT}/1/checklists/target_checklist/checkItems?key=test_key&token=test_token",
             method="POST",
             json=new_item.model_dump(),
         )
-        # Mock getting checklists again for resetting checkmarks
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/checklists/checklist1?key=test_key&token=test_token",
-            json=checklist1.model_dump(),
-        )
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/checklists/checklist2?key=test_key&token=test_token",
-            json=checklist2.model_dump(),
-        )
         httpx_mock.add_response(
             url=f"{ROOT}/1/cards/recipe1?key=test_key&token=test_token",
             method="PUT",
@@ -766,17 +1165,13 @@ class TestPopulateShoppingList:
             method="PUT",
             json={"id": "recipe2"},
         )
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/cards/populate_card?key=test_key&token=test_token",
-            json=populate_card.model_dump(),
-        )
         httpx_mock.add_response(
             url=f"{ROOT}/1/cards/populate_card/idLabels/l1?key=test_key&token=test_token",
             method="DELETE",
             json={},
         )
 
-        await populate_shopping_list(trello_client, prefs)
+        await populate_shopping_list(trello_client, recipe_scores, prefs)
 
         # Only one item should have been added with merged quantity (1 + 2 = 3)
         requests = httpx_mock.get_requests()
@@ -788,6 +1183,7 @@ class TestPopulateShoppingList:
     async def test_creates_checklist_if_none_exists(
         self,
         trello_client: TrelloClient,
+        recipe_scores: Scores,
         prefs: Prefs,
         httpx_mock: HTTPXMock,
     ) -> None:
@@ -802,29 +1198,21 @@ class TestPopulateShoppingList:
         new_checklist = Checklist(id="new_checklist", name="Shopping List", checkItems=[])
 
         httpx_mock.add_response(
-            url=f"{ROOT}/1/boards/board123/cards?key=test_key&token=test_token",
+            url=BOARD_URL,
             json=[populate_card.model_dump()],
         )
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/lists/selected123/cards?key=test_key&token=test_token",
-            json=[],  # No recipes
-        )
         httpx_mock.add_response(
             url=f"{ROOT}/1/cards/populate_card/checklists?key=test_key&token=test_token",
             method="POST",
             json=new_checklist.model_dump(),
         )
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/cards/populate_card?key=test_key&token=test_token",
-            json=populate_card.model_dump(),
-        )
         httpx_mock.add_response(
             url=f"{ROOT}/1/cards/populate_card/idLabels/l1?key=test_key&token=test_token",
             method="DELETE",
             json={},
         )
 
-        await populate_shopping_list(trello_client, prefs)
+        await populate_shopping_list(trello_client, recipe_scores, prefs)
 
         requests = httpx_mock.get_requests()
         post_requests = [r for r in requests if r.method == "POST"]
@@ -836,6 +1224,7 @@ class TestPopulateShoppingList:
     async def test_skips_checked_items_and_resets_checkmarks(
         self,
         trello_client: TrelloClient,
+        recipe_scores: Scores,
         prefs: Prefs,
         httpx_mock: HTTPXMock,
     ) -> None:
@@ -851,6 +1240,7 @@ class TestPopulateShoppingList:
             id="recipe1",
             idBoard="board123",
             name="Recipe",
+            idList="selected123",
             idChecklists=["recipe_checklist"],
             labels=[],
         )
@@ -869,18 +1259,11 @@ class TestPopulateShoppingList:
 
         # Mock getting board cards
         httpx_mock.add_response(
-            url=f"{ROOT}/1/boards/board123/cards?key=test_key&token=test_token",
-            json=[populate_card.model_dump()],
-        )
-        # Mock getting selected recipes
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/lists/selected123/cards?key=test_key&token=test_token",
-            json=[recipe_card.model_dump()],
-        )
-        # Mock getting recipe checklist (first time for gathering items)
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/checklists/recipe_checklist?key=test_key&token=test_token",
-            json=recipe_checklist.model_dump(),
+            url=BOARD_URL,
+            json=[
+                populate_card.model_dump(),
+                {**recipe_card.model_dump(), "checklists": [recipe_checklist.model_dump()]},
+            ],
         )
         # Mock adding unchecked items to target checklist
         httpx_mock.add_response(
@@ -893,11 +1276,6 @@ class TestPopulateShoppingList:
             method="POST",
             json=new_item2.model_dump(),
         )
-        # Mock getting recipe checklist again (for resetting checkmarks)
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/checklists/recipe_checklist?key=test_key&token=test_token",
-            json=recipe_checklist.model_dump(),
-        )
         # Mock updating checked items to reset them
         httpx_mock.add_response(
             url=f"{ROOT}/1/cards/recipe1/checklist/recipe_checklist/checkItem/i2?key=test_key&token=test_token",
@@ -915,18 +1293,13 @@ class TestPopulateShoppingList:
             method="PUT",
             json={"id": "recipe1"},
         )
-        # Mock getting card and removing label
-        httpx_mock.add_response(
-            url=f"{ROOT}/1/cards/populate_card?key=test_key&token=test_token",
-            json=populate_card.model_dump(),
-        )
         httpx_mock.add_response(
             url=f"{ROOT}/1/cards/populate_card/idLabels/l1?key=test_key&token=test_token",
             method="DELETE",
             json={},
         )
 
-        await populate_shopping_list(trello_client, prefs)
+        await populate_shopping_list(trello_client, recipe_scores, prefs)
 
         # Verify only unchecked items were added (Pasta and Cheese, not Tomatoes or Garlic)
         requests = httpx_mock.get_requests()
@@ -946,9 +1319,33 @@ class TestPopulateShoppingList:
             body = json.loads(r.content)
             assert body["state"] == "incomplete"
 
+    async def test_uses_selected_recipes_once(self, recipe_scores: Scores) -> None:
+        """Test that a second populate card does not get the same recipes again."""
+        board = FakeBoard()
+        available = board.add_list("Recipes")
+        selected = board.add_list("Selected recipes")
+        shopping = board.add_list("Shopping lists")
+        recipe = board.add_card("Pasta", selected)
+        board.add_checklist(recipe.id, ["Pasta", "Cheese"])
+        first = board.add_card("First list", shopping, ["populate"])
+        board.add_checklist(first.id)
+        second = board.add_card("Second list", shopping, ["populate"])
+        board.add_checklist(second.id)
+        fake = FakeTrello(board)
+
+        async with TrelloClient(**CREDENTIALS, transport=fake) as client:
+            await populate_shopping_list(client, recipe_scores, Prefs(board.prefs()))
+
+        assert [
+            len(board.checklists[card.idChecklists[0]].checkItems) for card in (first, second)
+        ] == [2, 0]
+        assert fake.requests["PUT /1/cards/{card}"] == 1
+        assert recipe.idList == available
+
     async def test_does_nothing_without_populate_label(
         self,
         trello_client: TrelloClient,
+        recipe_scores: Scores,
         prefs: Prefs,
         httpx_mock: HTTPXMock,
     ) -> None:
@@ -962,11 +1359,11 @@ class TestPopulateShoppingList:
         )
 
         httpx_mock.add_response(
-            url=f"{ROOT}/1/boards/board123/cards?key=test_key&token=test_token",
+            url=BOARD_URL,
             json=[card.model_dump()],
         )
 
-        await populate_shopping_list(trello_client, prefs)
+        await populate_shopping_list(trello_client, recipe_scores, prefs)
 
         # Only the board cards request should have been made
         requests = httpx_mock.get_requests()
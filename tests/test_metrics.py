@@ -0,0 +1,93 @@
+"""Tests for run metrics."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from shopr.bench import Corpus
+from shopr.fake_trello import FakeTrello
+from shopr.main import Prefs, run
+from shopr.metrics import Histogram, Metrics, endpoint, prometheus_text
+from shopr.trello import ROOT, TrelloClient
+
+
+class TestEndpoint:
+    """Tests for endpoint function."""
+
+    def test_leaves_out_ids(self) -> None:
+        """Test that IDs in the path are replaced, keeping resource names."""
+        assert endpoint("put", f"{ROOT}/1/cards/c1/checklist/l1/checkItem/i1") == (
+            "PUT /1/cards/{id}/checklist/{id}/checkItem/{id}"
+        )
+        assert endpoint("get", f"{ROOT}/1/boards/b1/cards") == "GET /1/boards/{id}/cards"
+        assert endpoint("get", f"{ROOT}/1/batch") == "GET /1/batch"
+
+
+class TestHistogram:
+    """Tests for Histogram."""
+
+    def test_counts_cumulatively(self) -> None:
+        """Test that each bound counts the values at or below it."""
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+
+        assert histogram.cumulative() == {"0.1": 2, "1.0": 3, "+Inf": 4}
+        assert histogram.count == 4
+        assert histogram.sum == pytest.approx(3.65)
+
+
+class TestMetrics:
+    """Tests for Metrics."""
+
+    def test_counts_requests_towards_phase(self) -> None:
+        """Test that requests are counted by endpoint and by the phase they ran in."""
+        metrics = Metrics()
+        with metrics.phase("order"):
+            metrics.record_request("put", f"{ROOT}/1/cards/c1", 200, 0.2, 10, 100)
+            metrics.record_request("put", f"{ROOT}/1/cards/c2", 429, 0.3, 10, 50)
+        metrics.record_request("get", f"{ROOT}/1/boards/b1/cards", 200, 0.1, 0, 900)
+
+        summary = metrics.summary()
+
+        assert summary["phases"]["order"]["requests"] == 2
+        assert summary["phases"]["order"]["seconds"] >= 0
+        cards = summary["endpoints"]["PUT /1/cards/{id}"]
+        assert cards["requests"] == 2
+        assert cards["statuses"] == {"200": 1, "429": 1}
+        assert cards["bytes_sent"] == 20
+        assert cards["bytes_received"] == 150
+
+
+class TestRunMetrics:
+    """Tests for the metrics a run emits."""
+
+    async def test_writes_prometheus_file(self, tmp_path: Path) -> None:
+        """Test that a run records every phase and writes the metrics text file."""
+        board = Corpus().board(4)
+        prefs = Prefs(board.prefs(
+            cacheDir=None,
+            scoresFile=str(tmp_path / "scores.json"),
+            prometheusFile=str(tmp_path / "shopr.prom"),
+        ))
+
+        async with TrelloClient("key", "token", transport=FakeTrello(board)) as client:
+            await run(client, prefs)
+            stats = client.stats()
+
+        assert list(stats["phases"]) == ["snapshot", "train", "order", "populate"]
+        assert stats["phases"]["snapshot"]["requests"] == 1
+        assert sum(phase["requests"] for phase in stats["phases"].values()) == sum(
+            metrics["requests"] for metrics in stats["endpoints"].values()
+        )
+        assert json.loads(json.dumps(stats)) == stats
+
+        text = (tmp_path / "shopr.prom").read_text()
+        assert text == prometheus_text(stats)
+        assert 'shopr_phase_requests_total{phase="snapshot"} 1' in text
+        assert (
+            'shopr_request_duration_seconds_count{endpoint="GET /1/boards/{id}/cards"} 1'
+            in text
+        )
+        assert 'shopr_cache_hits_total{cache="checklist"}' in text
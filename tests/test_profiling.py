@@ -0,0 +1,64 @@
+"""Tests for the profiling mode."""
+
+import asyncio
+import json
+import pstats
+from pathlib import Path
+
+from shopr.bench import Corpus
+from shopr.fake_trello import FakeTrello
+from shopr.main import Prefs, run
+from shopr.profiling import TaskStats, TimedCoroutine, run_profiled
+from shopr.trello import TrelloClient
+
+
+class TestTimedCoroutine:
+    """Tests for TimedCoroutine."""
+
+    def test_separates_waiting_from_running(self) -> None:
+        """Test that time spent suspended counts as waiting, not running."""
+        stats = TaskStats()
+
+        async def sleeper() -> str:
+            await asyncio.sleep(0.05)
+            return "done"
+
+        async def main() -> str:
+            return await asyncio.get_running_loop().create_task(
+                TimedCoroutine(sleeper(), stats)
+            )
+
+        assert asyncio.run(main()) == "done"
+        summary = stats.summary()
+        assert summary["count"] == 1
+        assert summary["waiting"] >= 0.04
+        assert summary["running"] < summary["waiting"]
+
+
+class TestRunProfiled:
+    """Tests for run_profiled function."""
+
+    def test_writes_profiles_per_phase(self, tmp_path: Path) -> None:
+        """Test that a profiled run writes CPU, task, memory and phase profiles."""
+        board = Corpus().board(4)
+        prefs = Prefs(board.prefs(cacheDir=None, scoresFile=str(tmp_path / "scores.json")))
+
+        async def main() -> None:
+            async with TrelloClient("key", "token", transport=FakeTrello(board)) as client:
+                await run(client, prefs)
+
+        directory = run_profiled(main(), tmp_path / "profiles")
+
+        assert directory.parent == tmp_path / "profiles"
+        phases = json.loads((directory / "phases.json").read_text())
+        assert [phase["phase"] for phase in phases] == [
+            "snapshot", "train", "order", "populate",
+        ]
+        tasks = json.loads((directory / "tasks.json").read_text())
+        assert any(
+            task["phase"] == "order" and task["coroutine"] == "gather_limited.<locals>.run_one"
+            for task in tasks
+        )
+        assert "== populate: largest allocations" in (directory / "memory.txt").read_text()
+        assert pstats.Stats(str(directory / "cpu.prof")).total_calls > 0
+        assert "cumulative" in (directory / "cpu.txt").read_text()
@@ -0,0 +1,200 @@
+"""Tests for the webhook watch mode."""
+
+import json
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+from shopr.main import Prefs
+from shopr.serve import (
+    WEBHOOK_PATH,
+    Watcher,
+    WebhookReceiver,
+    action_phase,
+    send_stub_webhook,
+    webhook_signature,
+)
+from shopr.trello import (
+    Card,
+    Checklist,
+    ChecklistItem,
+    TrelloClient,
+    CARD_PARAMS,
+    CHECKLIST_PARAMS,
+    ROOT,
+)
+
+from .conftest import CREDENTIALS
+
+
+def label_action(card_id: str, label_name: str) -> dict:
+    """Create an addLabelToCard action like Trello sends."""
+    return {
+        "type": "addLabelToCard",
+        "data": {"card": {"id": card_id}, "label": {"name": label_name}},
+    }
+
+
+class TestWebhookSignature:
+    """Tests for webhook_signature function."""
+
+    def test_matches_trello_signature_scheme(self) -> None:
+        """Test that the signature covers the body followed by the callback URL."""
+        # base64(HMAC-SHA1("secret", '{"a":1}' + "http://x/webhook"))
+        signature = webhook_signature("secret", b'{"a":1}', "http://x/webhook")
+
+        assert signature == "HrXlm/PoZGp06LOel6tjyg/gp80="
+
+
+class TestActionPhase:
+    """Tests for action_phase function."""
+
+    def test_maps_configured_labels_to_phases(self, prefs: Prefs) -> None:
+        """Test that each configured label triggers its phase."""
+        assert action_phase(prefs, label_action("c1", "train")) == ("train", "c1")
+        assert action_phase(prefs, label_action("c1", "order")) == ("order", "c1")
+        assert action_phase(prefs, label_action("c1", "populate")) == ("populate", "c1")
+
+    def test_ignores_other_actions(self, prefs: Prefs) -> None:
+        """Test that unrelated labels and action types trigger nothing."""
+        assert action_phase(prefs, label_action("c1", "urgent")) is None
+        assert action_phase(prefs, {"type": "updateCard", "data": {}}) is None
+
+
+class TestWatcher:
+    """Tests for the Watcher phase runner."""
+
+    def test_deduplicates_pending_work(
+        self,
+        trello_client: TrelloClient,
+        prefs: Prefs,
+        tmp_path: Path,
+    ) -> None:
+        """Test that repeated callbacks for the same change queue it once."""
+        watcher = Watcher(trello_client, prefs, tmp_path / "scores.json")
+
+        assert watcher.submit("order", "card1")
+        assert not watcher.submit("order", "card1")
+        assert watcher.submit("train", "card1")
+        assert watcher.queue.qsize() == 2
+
+    async def test_orders_only_the_touched_card(
+        self,
+        trello_client: TrelloClient,
+        prefs: Prefs,
+        tmp_path: Path,
+        httpx_mock: HTTPXMock,
+    ) -> None:
+        """Test that an order callback orders one card without scanning the board."""
+        scores_path = tmp_path / "scores.json"
+        scores_path.write_text(json.dumps({"bread": 200.0, "milk": 100.0}))
+
+        card = Card(
+            id="card1",
+            name="Shopping List",
+            idChecklists=["checklist1"],
+            labels=[{"id": "l1", "name": "order"}],
+        )
+        checklist = Checklist(
+            id="checklist1",
+            checkItems=[
+                ChecklistItem(id="item1", idChecklist="checklist1", name="Bread", pos=1000),
+                ChecklistItem(id="item2", idChecklist="checklist1", name="Milk", pos=2000),
+            ],
+        )
+        httpx_mock.add_response(
+            url=httpx.URL(f"{ROOT}/1/cards/card1", params={**CREDENTIALS, **CARD_PARAMS}),
+            json=card.model_dump(),
+        )
+        httpx_mock.add_response(
+            url=httpx.URL(
+                f"{ROOT}/1/checklists/checklist1",
+                params={**CREDENTIALS, **CHECKLIST_PARAMS},
+            ),
+            json=checklist.model_dump(),
+        )
+        httpx_mock.add_response(method="PUT", json={})
+        httpx_mock.add_response(
+            url=f"{ROOT}/1/cards/card1/idLabels/l1?key=test_key&token=test_token",
+            method="DELETE",
+            json={},
+        )
+
+        watcher = Watcher(trello_client, prefs, scores_path)
+        await watcher.process("order", "card1")
+
+        requests = httpx_mock.get_requests()
+        assert [r.method for r in requests] == ["GET", "GET", "PUT", "DELETE"]
+        assert not any("/boards/" in r.url.path for r in requests)
+
+    async def test_skips_card_that_lost_its_label(
+        self,
+        trello_client: TrelloClient,
+        prefs: Prefs,
+        tmp_path: Path,
+        httpx_mock: HTTPXMock,
+    ) -> None:
+        """Test that a card already handled by an earlier callback is left alone."""
+        httpx_mock.add_response(
+            url=httpx.URL(f"{ROOT}/1/cards/card1", params={**CREDENTIALS, **CARD_PARAMS}),
+            json=Card(id="card1", name="Done", idChecklists=["c"]).model_dump(),
+        )
+
+        watcher = Watcher(trello_client, prefs, tmp_path / "scores.json")
+        await watcher.process("order", "card1")
+
+        assert len(httpx_mock.get_requests()) == 1
+
+
+class TestWebhookReceiver:
+    """Tests for the webhook HTTP endpoint, driven by the stub sender."""
+
+    @pytest.fixture
+    async def receiver(
+        self,
+        trello_client: TrelloClient,
+        prefs: Prefs,
+        tmp_path: Path,
+    ) -> AsyncIterator[tuple[Watcher, str]]:
+        """Start a receiver on a free local port."""
+        watcher = Watcher(trello_client, prefs, tmp_path / "scores.json")
+        receiver = WebhookReceiver(watcher, "secret")
+        server = await receiver.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        url = f"http://127.0.0.1:{port}{WEBHOOK_PATH}"
+        receiver.callback_url = url
+        async with server:
+            yield watcher, url
+
+    async def test_queues_phase_for_signed_callback(
+        self,
+        receiver: tuple[Watcher, str],
+    ) -> None:
+        """Test that a signed callback queues the phase for its card."""
+        watcher, url = receiver
+
+        status = await send_stub_webhook(url, "card1", "populate", "secret")
+
+        assert status == 200
+        assert watcher.queue.get_nowait() == ("populate", "card1")
+
+    async def test_rejects_bad_signature(self, receiver: tuple[Watcher, str]) -> None:
+        """Test that callbacks not signed with the app secret are refused."""
+        watcher, url = receiver
+
+        status = await send_stub_webhook(url, "card1", "order", "wrong")
+
+        assert status == 401
+        assert watcher.queue.empty()
+
+    async def test_answers_trello_verification(self, receiver: tuple[Watcher, str]) -> None:
+        """Test that the HEAD request Trello verifies the callback with succeeds."""
+        _, url = receiver
+
+        async with httpx.AsyncClient() as client:
+            response = await client.head(url)
+
+        assert response.status_code == 200
@@ -0,0 +1,147 @@
+"""Tests for persistent score storage."""
+
+import json
+import sqlite3
+from pathlib import Path
+
+from shopr.main import Scores, load_scores, make_scores, save_scores, train
+from shopr.store import (
+    JsonScoreStore,
+    SqliteScoreStore,
+    copy_scores,
+    open_score_store,
+)
+from shopr.trello import Checklist, ChecklistItem
+
+
+class TestOpenScoreStore:
+    """Tests for open_score_store function."""
+
+    def test_picks_format_by_suffix(self, tmp_path: Path) -> None:
+        """Test that .json files use JSON and anything else SQLite."""
+        assert isinstance(open_score_store(tmp_path / "scores.json"), JsonScoreStore)
+        assert isinstance(open_score_store(tmp_path / "scores.db"), SqliteScoreStore)
+
+
+class TestSqliteScoreStore:
+    """Tests for SqliteScoreStore."""
+
+    def test_round_trips_in_insertion_order(self, tmp_path: Path) -> None:
+        """Test that keys load back in the order they were first stored."""
+        store = SqliteScoreStore(tmp_path / "scores.db")
+        store.save({"milk": 1.0, "bread": 2.0}, ["milk", "bread"])
+        store.save({"apple": 3.0, "milk": 4.0}, ["apple", "milk"])
+
+        assert list(store.load().items()) == [("milk", 4.0), ("bread", 2.0), ("apple", 3.0)]
+        store.close()
+
+    def test_writes_only_changed_and_removed_keys(self, tmp_path: Path) -> None:
+        """Test that unchanged keys are left as they are in the database."""
+        store = SqliteScoreStore(tmp_path / "scores.db")
+        store.save({"milk": 1.0, "bread": 2.0, "egg": 3.0}, ["milk", "bread", "egg"])
+
+        store.save({"milk": 10.0, "bread": 20.0}, changed=["bread"], removed=["egg"])
+
+        assert store.load() == {"milk": 1.0, "bread": 20.0}
+        store.close()
+
+    def test_uses_write_ahead_log(self, tmp_path: Path) -> None:
+        """Test that the database is switched to WAL mode."""
+        store = SqliteScoreStore(tmp_path / "scores.db")
+        store.load()
+        store.close()
+
+        connection = sqlite3.connect(tmp_path / "scores.db")
+        assert connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+        connection.close()
+
+
+class TestJsonScoreStore:
+    """Tests for JsonScoreStore."""
+
+    def test_rewrites_whole_table(self, tmp_path: Path) -> None:
+        """Test that the file always holds the full table."""
+        store = JsonScoreStore(tmp_path / "scores.json")
+        assert store.load() == {}
+
+        store.save({"milk": 1.0, "bread": 2.0}, changed=["bread"])
+
+        assert json.loads((tmp_path / "scores.json").read_text()) == {"milk": 1.0, "bread": 2.0}
+        assert list(tmp_path.iterdir()) == [tmp_path / "scores.json"]
+
+
+class TestCopyScores:
+    """Tests for copy_scores function."""
+
+    def test_imports_json_into_sqlite(self, tmp_path: Path) -> None:
+        """Test that JSON scores can be moved into a database and back out."""
+        (tmp_path / "in.json").write_text(json.dumps({"milk": 1.0, "bread": 2.0}))
+        database = SqliteScoreStore(tmp_path / "scores.db")
+
+        assert copy_scores(JsonScoreStore(tmp_path / "in.json"), database) == 2
+        copy_scores(database, JsonScoreStore(tmp_path / "out.json"))
+        database.close()
+
+        assert json.loads((tmp_path / "out.json").read_text()) == {"milk": 1.0, "bread": 2.0}
+
+
+class TestScoreChanges:
+    """Tests for change tracking on Scores."""
+
+    def test_tracks_changes_since_load(self) -> None:
+        """Test that set and deleted keys are tracked until marked saved."""
+        scores = make_scores({"milk": 1.0, "bread": 2.0})
+        scores.mark_saved()
+
+        scores["milk"] = 5.0
+        del scores["bread"]
+        scores.pop("missing", None)
+
+        assert scores.changed == {"milk"}
+        assert scores.removed == {"bread"}
+
+        scores.mark_saved()
+        assert scores.changed == set()
+        assert scores.removed == set()
+
+    def test_loads_without_tracking_changes(self) -> None:
+        """Test that a table built from saved scores starts with no changes."""
+        data = {"milk": 1.0, "low,milk": 2.0, "bread": 3.0}
+        scores = Scores.from_saved(data)
+
+        assert scores.changed == set()
+        assert scores.removed == set()
+        assert list(scores.items()) == list(data.items())
+        assert scores.index.best_overlap({"fat", "low", "milk"}) == "low,milk"
+
+        scores["egg"] = 4.0
+        assert scores.changed == {"egg"}
+        assert list(scores) == ["milk", "low,milk", "bread", "egg"]
+
+    def test_saves_only_trained_keys(self, tmp_path: Path) -> None:
+        """Test that save_scores hands only the changed keys to the store."""
+        path = tmp_path / "scores.db"
+        save_scores(make_scores({"milk": 1.0, "bread": 2.0}), path)
+
+        scores = load_scores(path)
+        scores["bread"] = 3.0
+        assert scores.changed == {"bread"}
+        save_scores(scores, path)
+
+        assert dict(load_scores(path)) == {"milk": 1.0, "bread": 3.0}
+
+    def test_training_tracks_only_trained_keys(self) -> None:
+        """Test that a trained copy carries over just the keys training set."""
+        scores = make_scores({"bread": 1.0, "milk": 2.0, "egg": 3.0})
+        scores.mark_saved()
+        checklist = Checklist(
+            id="c1",
+            checkItems=[
+                ChecklistItem(id="i1", idChecklist="c1", name="Milk", pos=1),
+                ChecklistItem(id="i2", idChecklist="c1", name="Egg", pos=2),
+            ],
+        )
+
+        trained = train(checklist, scores)
+
+        assert trained.changed == {"milk", "egg"}
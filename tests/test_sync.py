@@ -0,0 +1,281 @@
+"""Tests for incremental sync from the board actions feed."""
+
+import json
+from collections.abc import AsyncIterator
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlencode
+
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+from shopr.fake_trello import NOT_FOUND, FakeBoard, FakeTrello, FakeTrelloError, Params
+from shopr.main import Prefs, make_scores
+from shopr.sync import load_retry, load_since, save_since, sync, touched_card_ids
+from shopr.trello import (
+    ACTIONS_PAGE_SIZE,
+    CARD_ACTIONS,
+    Card,
+    Checklist,
+    ChecklistItem,
+    TrelloClient,
+    CARD_PARAMS,
+    CHECKLIST_PARAMS,
+    ROOT,
+    SNAPSHOT_PARAMS,
+)
+
+from .conftest import CREDENTIALS
+
+
+ACTIONS_PARAMS = {
+    **CREDENTIALS,
+    "filter": CARD_ACTIONS,
+    "fields": "type,data",
+    "memberCreator": "false",
+}
+
+
+def actions_url(**params: str | int) -> httpx.URL:
+    """Get the URL board actions are fetched from."""
+    return httpx.URL(
+        f"{ROOT}/1/boards/board123/actions",
+        params={**ACTIONS_PARAMS, **params},
+    )
+
+
+def card_action(id: str, card_id: str, type: str = "addLabelToCard") -> dict:
+    """Create a board action touching a card."""
+    return {"id": id, "type": type, "data": {"card": {"id": card_id}}}
+
+
+class TestTouchedCardIds:
+    """Tests for touched_card_ids function."""
+
+    def test_returns_each_card_once_in_action_order(self) -> None:
+        """Test that cards touched several times are listed once."""
+        actions = [
+            card_action("a3", "card2"),
+            card_action("a2", "card1", "updateCheckItem"),
+            card_action("a1", "card2", "createCheckItem"),
+            {"id": "a0", "type": "addLabelToCard", "data": {}},
+        ]
+
+        assert touched_card_ids(actions) == ["card2", "card1"]
+
+
+class TestSyncState:
+    """Tests for the persisted high-water mark."""
+
+    def test_round_trips_last_action(self, tmp_path: Path) -> None:
+        """Test that the saved action ID is loaded back."""
+        path = tmp_path / "sync.json"
+        assert load_since(path) is None
+
+        save_since("a42", path)
+
+        assert load_since(path) == "a42"
+        assert load_retry(path) == []
+
+    def test_round_trips_cards_to_retry(self, tmp_path: Path) -> None:
+        """Test that the cards to retry are loaded back."""
+        path = tmp_path / "sync.json"
+        assert load_retry(path) == []
+
+        save_since("a42", path, ["card1", "card2"])
+
+        assert load_retry(path) == ["card1", "card2"]
+
+
+class TestSync:
+    """Tests for sync function."""
+
+    async def test_processes_only_touched_cards(
+        self,
+        trello_client: TrelloClient,
+        prefs: Prefs,
+        tmp_path: Path,
+        httpx_mock: HTTPXMock,
+    ) -> None:
+        """Test that only cards in the actions feed are fetched and ordered."""
+        state_path = tmp_path / "sync.json"
+        save_since("a1", state_path)
+
+        ordered = Card(
+            id="card1",
+            name="Shopping List",
+            idChecklists=["checklist1"],
+            labels=[{"id": "l1", "name": "order"}],
+        )
+        untouched = Card(id="card2", name="Done", idChecklists=["checklist2"])
+        checklist = Checklist(
+            id="checklist1",
+            checkItems=[
+                ChecklistItem(id="item1", idChecklist="checklist1", name="Bread", pos=1000),
+                ChecklistItem(id="item2", idChecklist="checklist1", name="Milk", pos=2000),
+            ],
+        )
+
+        httpx_mock.add_response(
+            url=actions_url(since="a1", limit=ACTIONS_PAGE_SIZE),
+            json=[card_action("a3", "card1"), card_action("a2", "card2", "updateCheckItem")],
+        )
+        httpx_mock.add_response(
+            url=httpx.URL(
+                f"{ROOT}/1/batch",
+                params={
+                    **CREDENTIALS,
+                    "urls": ",".join([
+                        f"/cards/card1?{urlencode(CARD_PARAMS)}",
+                        f"/cards/card2?{urlencode(CARD_PARAMS)}",
+                    ]),
+                },
+            ),
+            json=[{"200": ordered.model_dump()}, {"200": untouched.model_dump()}],
+        )
+        httpx_mock.add_response(
+            url=httpx.URL(
+                f"{ROOT}/1/checklists/checklist1",
+                params={**CREDENTIALS, **CHECKLIST_PARAMS},
+            ),
+            json=checklist.model_dump(),
+        )
+        httpx_mock.add_response(method="PUT", json={})
+        httpx_mock.add_response(
+            url=f"{ROOT}/1/cards/card1/idLabels/l1?key=test_key&token=test_token",
+            method="DELETE",
+            json={},
+        )
+
+        scores = make_scores({"bread": 200.0, "milk": 100.0})
+        await sync(trello_client, prefs, scores, state_path, tmp_path / "scores.json")
+
+        assert load_since(state_path) == "a3"
+        assert not any(
+            "/boards/board123/cards" in r.url.path for r in httpx_mock.get_requests()
+        )
+
+    async def test_does_nothing_without_changes(
+        self,
+        trello_client: TrelloClient,
+        prefs: Prefs,
+        tmp_path: Path,
+        httpx_mock: HTTPXMock,
+    ) -> None:
+        """Test that a poll with no new actions makes no other requests."""
+        state_path = tmp_path / "sync.json"
+        save_since("a1", state_path)
+        httpx_mock.add_response(url=actions_url(since="a1", limit=ACTIONS_PAGE_SIZE), json=[])
+
+        await sync(trello_client, prefs, make_scores(), state_path, tmp_path / "scores.json")
+
+        assert len(httpx_mock.get_requests()) == 1
+        assert load_since(state_path) == "a1"
+
+    async def test_first_sync_processes_whole_board(
+        self,
+        trello_client: TrelloClient,
+        prefs: Prefs,
+        tmp_path: Path,
+        httpx_mock: HTTPXMock,
+    ) -> None:
+        """Test that the first sync scans the board and records the feed position."""
+        state_path = tmp_path / "sync.json"
+        httpx_mock.add_response(url=actions_url(limit=1), json=[card_action("a9", "card1")])
+        httpx_mock.add_response(
+            url=httpx.URL(
+                f"{ROOT}/1/boards/board123/cards",
+                params={**CREDENTIALS, **SNAPSHOT_PARAMS},
+            ),
+            json=[],
+        )
+
+        await sync(trello_client, prefs, make_scores(), state_path, tmp_path / "scores.json")
+
+        assert load_since(state_path) == "a9"
+        assert json.loads((tmp_path / "scores.json").read_text()) == {}
+
+
+class TestSyncFakeBoard:
+    """Tests for repeated syncs against the fake Trello API."""
+
+    @pytest.fixture
+    def board(self) -> FakeBoard:
+        """Create a board with a shopping list."""
+        board = FakeBoard()
+        board.add_list("Recipes")
+        board.add_list("Selected recipes")
+        shopping = board.add_card("Weekly", board.add_list("Shopping lists"))
+        board.add_checklist(shopping.id, ["Bread", "Milk"])
+        board.record("createCheckItem", shopping.id)
+        return board
+
+    @pytest.fixture
+    async def fake_client(self, board: FakeBoard) -> AsyncIterator[TrelloClient]:
+        """Create a TrelloClient talking to the fake."""
+        async with TrelloClient(
+            key="test_key", token="test_token", transport=FakeTrello(board)
+        ) as client:
+            yield client
+
+    async def test_sees_checklists_edited_between_syncs(
+        self,
+        board: FakeBoard,
+        fake_client: TrelloClient,
+        tmp_path: Path,
+    ) -> None:
+        """Test that a sync does not order from checklists cached by the previous one."""
+        prefs = Prefs(board.prefs(cacheDir=None))
+        state_path = tmp_path / "sync.json"
+        scores = make_scores({"bread": 200.0, "milk": 100.0})
+        await sync(fake_client, prefs, scores, state_path, tmp_path / "scores.json")
+
+        [card] = [card for card in board.cards.values() if card.name == "Weekly"]
+        checklist = board.checklists[card.idChecklists[0]]
+        checklist.checkItems.append(checklist.checkItems[0].model_copy(
+            update={"id": board.new_id(), "name": "Saffron", "pos": 99999}
+        ))
+        board.record("createCheckItem", card.id)
+        card.labels.append(dict(board.label("order")))
+        board.record("addLabelToCard", card.id)
+
+        await sync(fake_client, prefs, scores, state_path, tmp_path / "scores.json")
+
+        assert "Saffron [unsorted]" in [item.name for item in checklist.checkItems]
+        assert not card.labels
+
+    async def test_retries_cards_that_failed_to_order(
+        self,
+        board: FakeBoard,
+        tmp_path: Path,
+    ) -> None:
+        """Test that a card that failed to order is ordered by a later sync."""
+        prefs = Prefs(board.prefs(cacheDir=None))
+        state_path = tmp_path / "sync.json"
+        [card] = [card for card in board.cards.values() if card.name == "Weekly"]
+        card.labels.append(dict(board.label("order")))
+
+        class FailingWrites(FakeTrello):
+            failing = True
+
+            def update_item(self, ids: Params, params: Params, data: Any) -> Any:
+                if self.failing:
+                    raise FakeTrelloError(404, NOT_FOUND)
+                return super().update_item(ids, params, data)
+
+        transport = FailingWrites(board)
+        async with TrelloClient(
+            key="test_key", token="test_token", transport=transport
+        ) as client:
+            await sync(client, prefs, make_scores(), state_path, tmp_path / "scores.json")
+
+            assert card.labels
+            assert load_retry(state_path) == [card.id]
+
+            # Recovered without anything new in the actions feed
+            transport.failing = False
+            await sync(client, prefs, make_scores(), state_path, tmp_path / "scores.json")
+
+        assert not card.labels
+        assert load_retry(state_path) == []
@@ -0,0 +1,101 @@
+"""Tests for performance tracing."""
+
+import json
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+import sentry_sdk
+
+from shopr.bench import Corpus
+from shopr.fake_trello import FakeTrello
+from shopr.main import Prefs, run
+from shopr.tracing import FileTransport, init_sentry, span
+from shopr.trello import TrelloClient
+
+
+@pytest.fixture
+def sentry_cleanup() -> Iterator[None]:
+    """Shut down whatever Sentry client a test sets up."""
+    yield
+    sentry_sdk.get_client().close()
+    sentry_sdk.get_global_scope().set_client(None)
+
+
+@pytest.fixture
+def traces_path(tmp_path: Path, sentry_cleanup: None) -> Path:
+    """Trace every transaction to a file for the duration of a test."""
+    path = tmp_path / "traces.jsonl"
+    sentry_sdk.init(
+        transport=FileTransport(path),
+        traces_sample_rate=1.0,
+        default_integrations=False,
+    )
+    return path
+
+
+class TestInitSentry:
+    """Tests for init_sentry function."""
+
+    def test_does_not_trace_to_sentry_by_default(self, sentry_cleanup: None) -> None:
+        """Test that runs are only traced to Sentry when asked to."""
+        init_sentry("https://key@sentry.example.com/1", "test")
+
+        assert sentry_sdk.get_client().options["traces_sample_rate"] == 0.0
+
+    def test_traces_every_run_to_file_by_default(
+        self,
+        sentry_cleanup: None,
+        tmp_path: Path,
+    ) -> None:
+        """Test that asking for a traces file traces every run."""
+        init_sentry(None, "test", traces_file=tmp_path / "traces.jsonl")
+
+        assert sentry_sdk.get_client().options["traces_sample_rate"] == 1.0
+
+
+class TestSpan:
+    """Tests for span function."""
+
+    def test_does_nothing_outside_transaction(self) -> None:
+        """Test that blocks outside a traced run are not traced."""
+        with span("shopr.train", "checklist") as traced:
+            assert traced is None
+
+
+class TestRunTracing:
+    """Tests for the transaction a run is traced as."""
+
+    async def test_traces_run_to_file(self, traces_path: Path, tmp_path: Path) -> None:
+        """Test that a run is written as a transaction with nested spans."""
+        board = Corpus().board(4)
+        prefs = Prefs(board.prefs(cacheDir=None, scoresFile=str(tmp_path / "scores.json")))
+
+        async with TrelloClient("key", "token", transport=FakeTrello(board)) as client:
+            await run(client, prefs)
+
+        [transaction] = [json.loads(line) for line in traces_path.read_text().splitlines()]
+        assert transaction["transaction"] == "run"
+        spans = {span["span_id"]: span for span in transaction["spans"]}
+        ops = {span["op"] for span in spans.values()}
+        assert {
+            "shopr.phase",
+            "shopr.get_train_set",
+            "shopr.train",
+            "shopr.order_card",
+            "shopr.populate_recipe",
+            "http.client",
+        } <= ops
+
+        # Cards are ordered concurrently, yet each nests under the phase
+        # and owns its own requests
+        [order_phase] = [
+            span for span in spans.values()
+            if span["op"] == "shopr.phase" and span["description"] == "order"
+        ]
+        cards = [span for span in spans.values() if span["op"] == "shopr.order_card"]
+        assert all(card["parent_span_id"] == order_phase["span_id"] for card in cards)
+        assert any(
+            span["op"] == "http.client" and span["parent_span_id"] == cards[0]["span_id"]
+            for span in spans.values()
+        )
@@ -0,0 +1,656 @@
+"""Tests for the Trello API client."""
+
+import asyncio
+import os
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlencode
+
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+from shopr.scheduler import (
+    AdaptiveLimiter,
+    RequestScheduler,
+    SlidingWindow,
+    retry_after,
+)
+from shopr.trello import (
+    CARD_ACTIONS,
+    DEFAULT_MAX_CONNECTIONS,
+    BoardSnapshot,
+    Card,
+    Checklist,
+    ResponseCache,
+    TrelloBatchError,
+    TrelloClient,
+    CARD_PARAMS,
+    CHECKLIST_PARAMS,
+    ROOT,
+    SNAPSHOT_PARAMS,
+)
+
+from .conftest import CREDENTIALS
+
+
+SNAPSHOT_URL = httpx.URL(
+    f"{ROOT}/1/boards/board123/cards",
+    params={**CREDENTIALS, **SNAPSHOT_PARAMS},
+)
+
+
+def checklist_url(id: str) -> httpx.URL:
+    """Get the URL a single checklist is fetched from."""
+    return httpx.URL(f"{ROOT}/1/checklists/{id}", params={**CREDENTIALS, **CHECKLIST_PARAMS})
+
+
+def route(path: str, params: dict[str, str]) -> str:
+    """Get a route with its query, as sent inside a /1/batch request."""
+    return f"{path}?{urlencode(params)}"
+
+
+class TestConnectionPool:
+    """Tests for the pooled HTTP client owned by TrelloClient."""
+
+    async def test_reuses_one_http_client_across_requests(
+        self,
+        httpx_mock: HTTPXMock,
+    ) -> None:
+        """Test that consecutive requests share the same pooled client."""
+        httpx_mock.add_response(
+            url=f"{ROOT}/1/boards/board123/lists?key=test_key&token=test_token",
+            json=[],
+            is_reusable=True,
+        )
+
+        async with TrelloClient(key="test_key", token="test_token") as client:
+            pooled = client._get_client()
+            await client.get_board_lists("board123")
+            await client.get_board_lists("board123")
+
+            assert client._get_client() is pooled
+
+        assert pooled.is_closed
+        assert len(httpx_mock.get_requests()) == 2
+
+    async def test_aclose_releases_client(self) -> None:
+        """Test that closing the client allows it to be reopened."""
+        client = TrelloClient(key="test_key", token="test_token")
+        first = client._get_client()
+
+        await client.aclose()
+
+        assert first.is_closed
+        assert client._get_client() is not first
+        await client.aclose()
+
+    def test_default_limits(self) -> None:
+        """Test that the default pool keeps connections alive."""
+        client = TrelloClient(key="test_key", token="test_token")
+
+        assert client.limits.max_connections == DEFAULT_MAX_CONNECTIONS
+        assert client.limits.max_keepalive_connections == DEFAULT_MAX_CONNECTIONS
+
+    def test_custom_limits(self) -> None:
+        """Test that custom pool limits are kept."""
+        limits = httpx.Limits(max_connections=2, max_keepalive_connections=1)
+        client = TrelloClient(key="test_key", token="test_token", limits=limits)
+
+        assert client.limits is limits
+
+
+class TestBoardSnapshot:
+    """Tests for the board snapshot."""
+
+    async def test_fetches_cards_with_nested_checklists(
+        self,
+        httpx_mock: HTTPXMock,
+    ) -> None:
+        """Test that one request returns cards, labels and checklists."""
+        httpx_mock.add_response(
+            url=SNAPSHOT_URL,
+            json=[
+                {
+                    "id": "card1",
+                    "name": "Shopping",
+                    "idList": "list1",
+                    "idChecklists": ["checklist1"],
+                    "labels": [{"id": "l1", "name": "order"}],
+                    "checklists": [{"id": "checklist1", "idCard": "card1", "checkItems": []}],
+                },
+            ],
+        )
+
+        async with TrelloClient(key="test_key", token="test_token") as client:
+            snapshot = await client.get_board_snapshot("board123")
+
+        assert [card.id for card in snapshot.cards] == ["card1"]
+        assert snapshot.cards[0].checklists[0].idCard == "card1"
+        assert "checklist1" in client.checklist_cache
+
+    def test_filters_by_label_and_list(self) -> None:
+        """Test selecting cards by label name and by list."""
+        snapshot = BoardSnapshot([
+            Card(id="a", name="A", idList="list1", labels=[{"id": "l1", "name": "order"}]),
+            Card(id="b", name="B", idList="list2", labels=[]),
+            Card(id="c", name="C", idList="list1", labels=[{"id": "l2", "name": "train"}]),
+        ])
+
+        assert [card.id for card in snapshot.cards_with_label("order")] == ["a"]
+        assert [card.id for card in snapshot.list_cards("list1")] == ["a", "c"]
+
+
+class TestBatching:
+    """Tests for coalescing concurrent GETs into /1/batch calls."""
+
+    async def test_coalesces_concurrent_gets(self, httpx_mock: HTTPXMock) -> None:
+        """Test that concurrent GETs share one batch request."""
+        httpx_mock.add_response(
+            url=httpx.URL(
+                f"{ROOT}/1/batch",
+                params={
+                    "key": "test_key",
+                    "token": "test_token",
+                    "urls": ",".join([
+                        route("/checklists/a", CHECKLIST_PARAMS),
+                        route("/cards/b", CARD_PARAMS),
+                    ]),
+                },
+            ),
+            json=[
+                {"200": {"id": "a", "idCard": "b", "checkItems": []}},
+                {"200": {"id": "b", "name": "Card"}},
+            ],
+        )
+
+        async with TrelloClient(key="test_key", token="test_token") as client:
+            checklist, card = await asyncio.gather(
+                client.get_checklist("a"),
+                client.get_card("b"),
+            )
+
+        assert checklist.id == "a"
+        assert card.name == "Card"
+        assert len(httpx_mock.get_requests()) == 1
+
+    async def test_single_get_skips_batch(self, httpx_mock: HTTPXMock) -> None:
+        """Test that a lone GET is sent directly."""
+        httpx_mock.add_response(
+            url=checklist_url("a"),
+            json={"id": "a"},
+        )
+
+        async with TrelloClient(key="test_key", token="test_token") as client:
+            checklist = await client.get_checklist("a")
+
+        assert checklist.id == "a"
+
+    async def test_failed_route_only_fails_its_caller(
+        self,
+        httpx_mock: HTTPXMock,
+    ) -> None:
+        """Test per-route error handling within a batch."""
+        httpx_mock.add_response(
+            url=httpx.URL(
+                f"{ROOT}/1/batch",
+                params={
+                    "key": "test_key",
+                    "token": "test_token",
+                    "urls": ",".join([
+                        route("/checklists/a", CHECKLIST_PARAMS),
+                        route("/checklists/missing", CHECKLIST_PARAMS),
+                    ]),
+                },
+            ),
+            json=[
+                {"200": {"id": "a"}},
+                {"name": "NotFoundError", "message": "not found", "statusCode": 404},
+            ],
+        )
+
+        async with TrelloClient(key="test_key", token="test_token") as client:
+            ok, failed = await asyncio.gather(
+                client.get_checklist("a"),
+                client.get_checklist("missing"),
+                return_exceptions=True,
+            )
+
+        assert isinstance(ok, Checklist)
+        assert isinstance(failed, TrelloBatchError)
+        assert failed.status_code == 404
+        assert failed.route == route("/checklists/missing", CHECKLIST_PARAMS)
+
+    @pytest.mark.parametrize("body", [[{"200": {"id": "a"}}], {"error": "oops"}])
+    async def test_malformed_response_fails_all_callers(
+        self,
+        httpx_mock: HTTPXMock,
+        body: object,
+    ) -> None:
+        """Test that callers fail instead of hanging when results are missing."""
+        httpx_mock.add_response(json=body)
+
+        async with TrelloClient(key="test_key", token="test_token") as client:
+            results = await asyncio.wait_for(
+                asyncio.gather(
+                    client.get_checklist("a"),
+                    client.get_checklist("b"),
+                    return_exceptions=True,
+                ),
+                timeout=1,
+            )
+
+        assert all(isinstance(result, TrelloBatchError) for result in results)
+
+    async def test_splits_at_batch_limit(self, httpx_mock: HTTPXMock) -> None:
+        """Test that more than ten GETs are split over several batches."""
+        def respond(request: httpx.Request) -> httpx.Response:
+            routes = request.url.params["urls"].split(",")
+            return httpx.Response(
+                200,
+                json=[
+                    {"200": {"id": path.split("?")[0].rsplit("/", 1)[1]}}
+                    for path in routes
+                ],
+            )
+
+        httpx_mock.add_callback(respond, is_reusable=True)
+
+        async with TrelloClient(key="test_key", token="test_token") as client:
+            checklists = await asyncio.gather(
+                *(client.get_checklist(str(i)) for i in range(12))
+            )
+
+        assert [c.id for c in checklists] == [str(i) for i in range(12)]
+        sizes = [
+            len(r.url.params["urls"].split(",")) for r in httpx_mock.get_requests()
+        ]
+        assert sizes == [10, 2]
+
+    async def test_request_failure_fails_all_callers(
+        self,
+        httpx_mock: HTTPXMock,
+    ) -> None:
+        """Test that a failed batch request propagates to every caller."""
+        httpx_mock.add_response(status_code=401)
+
+        async with TrelloClient(key="test_key", token="test_token") as client:
+            with pytest.raises(httpx.HTTPStatusError):
+                await asyncio.gather(client.get_checklist("a"), client.get_checklist("b"))
+
+
+class TestRequestScheduler:
+    """Tests for rate-limit-aware request scheduling."""
+
+    async def test_retries_after_rate_limit(self, httpx_mock: HTTPXMock) -> None:
+        """Test that a 429 is retried once Retry-After has passed."""
+        url = f"{ROOT}/1/boards/board123/lists?key=test_key&token=test_token"
+        httpx_mock.add_response(url=url, status_code=429, headers={"Retry-After": "0"})
+        httpx_mock.add_response(url=url, json=[{"id": "list1"}])
+
+        async with TrelloClient(key="test_key", token="test_token") as client:
+            lists = await client.get_board_lists("board123")
+
+        assert lists == [{"id": "list1"}]
+        assert client.scheduler.retries == 1
+
+    async def test_does_not_retry_non_idempotent_server_error(
+        self,
+        httpx_mock: HTTPXMock,
+    ) -> None:
+        """Test that a POST failing with a 5xx is not resent."""
+        httpx_mock.add_response(method="POST", status_code=503)
+
+        async with TrelloClient(key="test_key", token="test_token") as client:
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.add_checklist_item("checklist1", "Milk")
+
+        assert len(httpx_mock.get_requests()) == 1
+
+    async def test_gives_up_after_max_retries(self, httpx_mock: HTTPXMock) -> None:
+        """Test that persistent rate limiting eventually surfaces."""
+        httpx_mock.add_response(status_code=429, headers={"Retry-After": "0"}, is_reusable=True)
+        scheduler = RequestScheduler(max_retries=2)
+
+        async with TrelloClient(key="test_key", token="test_token", scheduler=scheduler) as client:
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.get_board_lists("board123")
+
+        assert len(httpx_mock.get_requests()) == 3
+
+
+class TestAdaptiveLimiter:
+    """Tests for AIMD concurrency limiting."""
+
+    async def test_halves_on_backoff_and_grows_on_success(self) -> None:
+        """Test multiplicative decrease and additive increase."""
+        limiter = AdaptiveLimiter(initial=8, maximum=16)
+
+        async with limiter as request:
+            pass
+        limiter.on_backoff(request)
+        assert limiter.limit == 4
+
+        for _ in range(4):
+            limiter.on_success()
+        assert 4.9 < limiter.limit < 5.0
+
+    async def test_respects_bounds(self) -> None:
+        """Test that the limit stays within its bounds."""
+        limiter = AdaptiveLimiter(initial=2, minimum=1, maximum=2)
+
+        for _ in range(5):
+            async with limiter as request:
+                pass
+            limiter.on_backoff(request)
+        assert limiter.limit == 1
+
+        for _ in range(10):
+            limiter.on_success()
+        assert limiter.limit == 2
+
+    async def test_decreases_once_per_congestion_event(self) -> None:
+        """Test that requests failing together decrease the limit once."""
+        limiter = AdaptiveLimiter(initial=8, maximum=16)
+        held = asyncio.Event()
+
+        async def rate_limited() -> None:
+            async with limiter as request:
+                await held.wait()
+            limiter.on_backoff(request)
+
+        tasks = [asyncio.create_task(rate_limited()) for _ in range(8)]
+        await asyncio.sleep(0)
+        held.set()
+        await asyncio.gather(*tasks)
+        assert limiter.limit == 4
+
+        # A request started after the decrease can decrease it again
+        async with limiter as request:
+            pass
+        limiter.on_backoff(request)
+        assert limiter.limit == 2
+
+    async def test_limits_in_flight(self) -> None:
+        """Test that no more than `limit` holders run at once."""
+        limiter = AdaptiveLimiter(initial=2)
+        peak = 0
+
+        async def hold() -> None:
+            nonlocal peak
+            async with limiter:
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(hold() for _ in range(6)))
+
+        assert peak == 2
+
+
+class TestSlidingWindow:
+    """Tests for the request rate sliding window."""
+
+    async def test_waits_once_window_is_full(self) -> None:
+        """Test that the window allows a burst and then waits for room."""
+        window = SlidingWindow(limit=2, window=0.05)
+        loop = asyncio.get_running_loop()
+
+        start = loop.time()
+        await window.acquire()
+        await window.acquire()
+        burst = loop.time() - start
+        await window.acquire()
+        paced = loop.time() - start
+
+        assert burst < 0.01
+        assert paced >= 0.045
+
+    async def test_never_exceeds_limit_in_any_window(self) -> None:
+        """Test that no window of time sees more than the limit of requests."""
+        window = SlidingWindow(limit=5, window=0.05)
+        loop = asyncio.get_running_loop()
+        started: list[float] = []
+
+        async def request() -> None:
+            await window.acquire()
+            started.append(loop.time())
+
+        await asyncio.gather(*(request() for _ in range(15)))
+
+        assert len(started) == 15
+        # Any 6 consecutive starts span at least a window
+        assert all(
+            later - earlier >= 0.049
+            for earlier, later in zip(started, started[5:])
+        )
+
+    async def test_pause_holds_back_requests(self) -> None:
+        """Test that no request starts while the window is paused."""
+        window = SlidingWindow(limit=5, window=0.05)
+        loop = asyncio.get_running_loop()
+
+        start = loop.time()
+        window.pause(0.03)
+        await window.acquire()
+
+        assert loop.time() - start >= 0.025
+
+
+class TestRetryAfter:
+    """Tests for Retry-After parsing."""
+
+    def test_seconds(self) -> None:
+        """Test a delay given in seconds."""
+        response = httpx.Response(429, headers={"Retry-After": "3"})
+        assert retry_after(response) == 3.0
+
+    def test_missing_or_invalid(self) -> None:
+        """Test that missing or garbage headers give no delay."""
+        assert retry_after(httpx.Response(429)) is None
+        assert retry_after(httpx.Response(429, headers={"Retry-After": "soon"})) is None
+
+
+class TestChecklistCache:
+    """Tests for the per-client checklist cache."""
+
+    async def test_serves_repeat_gets_from_cache(self, httpx_mock: HTTPXMock) -> None:
+        """Test that a checklist is only fetched once."""
+        httpx_mock.add_response(
+            url=checklist_url("a"),
+            json={"id": "a"},
+        )
+
+        async with TrelloClient(key="test_key", token="test_token") as client:
+            first = await client.get_checklist("a")
+            second = await client.get_checklist("a")
+
+        assert first is second
+        assert client.checklist_cache.hits == 1
+        assert client.checklist_cache.misses == 1
+
+    async def test_writes_invalidate(self, httpx_mock: HTTPXMock) -> None:
+        """Test that writing to a checklist makes the next get refetch it."""
+        url = checklist_url("a")
+        httpx_mock.add_response(url=url, json={"id": "a", "checkItems": []})
+        httpx_mock.add_response(
+            url=f"{ROOT}/1/checklists/a/checkItems?key=test_key&token=test_token",
+            method="POST",
+            json={"id": "i1", "idChecklist": "a", "name": "Milk"},
+        )
+        httpx_mock.add_response(
+            url=url,
+            json={"id": "a", "checkItems": [{"id": "i1", "idChecklist": "a", "name": "Milk"}]},
+        )
+
+        async with TrelloClient(key="test_key", token="test_token") as client:
+            await client.get_checklist("a")
+            await client.add_checklist_item("a", "Milk")
+            checklist = await client.get_checklist("a")
+
+        assert [item.name for item in checklist.checkItems] == ["Milk"]
+
+
+class TestResponseCache:
+    """Tests for the on-disk response cache."""
+
+    async def test_revalidates_with_etag(self, tmp_path: Path, httpx_mock: HTTPXMock) -> None:
+        """Test that an unchanged resource is served from disk after a 304."""
+        url = f"{ROOT}/1/boards/board123/lists?key=test_key&token=test_token"
+        httpx_mock.add_response(url=url, json=[{"id": "list1"}], headers={"ETag": '"v1"'})
+        httpx_mock.add_response(url=url, status_code=304, match_headers={"If-None-Match": '"v1"'})
+        cache = ResponseCache(tmp_path)
+
+        for _ in range(2):
+            async with TrelloClient(key="test_key", token="test_token", response_cache=cache) as client:
+                lists = await client.get_board_lists("board123")
+            assert lists == [{"id": "list1"}]
+
+        assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+    async def test_snapshot_falls_back_to_last_activity(
+        self,
+        tmp_path: Path,
+        httpx_mock: HTTPXMock,
+    ) -> None:
+        """Test that a board without validators is reused while it is idle."""
+        activity_url = f"{ROOT}/1/boards/board123?key=test_key&token=test_token&fields=dateLastActivity"
+        cards_url = SNAPSHOT_URL
+        httpx_mock.add_response(url=activity_url, json={"dateLastActivity": "t1"})
+        httpx_mock.add_response(url=cards_url, json=[{"id": "card1", "name": "Old"}])
+        httpx_mock.add_response(url=activity_url, json={"dateLastActivity": "t1"})
+        httpx_mock.add_response(url=activity_url, json={"dateLastActivity": "t2"})
+        httpx_mock.add_response(url=cards_url, json=[{"id": "card1", "name": "New"}])
+        cache = ResponseCache(tmp_path)
+
+        names = []
+        for _ in range(3):
+            async with TrelloClient(key="test_key", token="test_token", response_cache=cache) as client:
+                snapshot = await client.get_board_snapshot("board123")
+            names.append(snapshot.cards[0].name)
+
+        assert names == ["Old", "Old", "New"]
+        cards_requests = [r for r in httpx_mock.get_requests() if r.url.path.endswith("/cards")]
+        assert len(cards_requests) == 2
+
+    async def test_snapshot_loads_stored_response_once(
+        self,
+        tmp_path: Path,
+        httpx_mock: HTTPXMock,
+    ) -> None:
+        """Test that revalidating a snapshot reads its stored response once."""
+        httpx_mock.add_response(
+            url=f"{ROOT}/1/boards/board123?key=test_key&token=test_token&fields=dateLastActivity",
+            json={"dateLastActivity": "t1"},
+        )
+        httpx_mock.add_response(
+            url=SNAPSHOT_URL, json=[{"id": "card1", "name": "Old"}], headers={"ETag": '"v1"'}
+        )
+        httpx_mock.add_response(url=SNAPSHOT_URL, status_code=304)
+
+        class CountingCache(ResponseCache):
+            loads = 0
+
+            def load(self, url: str, params: dict[str, Any]) -> dict[str, Any] | None:
+                self.loads += 1
+                return super().load(url, params)
+
+        cache = CountingCache(tmp_path)
+        async with TrelloClient(key="test_key", token="test_token", response_cache=cache) as client:
+            await client.get_board_snapshot("board123")
+            cache.loads = 0
+            snapshot = await client.get_board_snapshot("board123")
+
+        assert snapshot.cards[0].name == "Old"
+        assert cache.loads == 1
+
+    async def test_does_not_store_without_validators(
+        self,
+        tmp_path: Path,
+        httpx_mock: HTTPXMock,
+    ) -> None:
+        """Test that responses that cannot be revalidated are not stored."""
+        httpx_mock.add_response(json=[])
+        cache = ResponseCache(tmp_path)
+
+        async with TrelloClient(key="test_key", token="test_token", response_cache=cache) as client:
+            await client.get_board_lists("board123")
+
+        assert list(tmp_path.iterdir()) == []
+
+
+    async def test_does_not_store_batches(self, tmp_path: Path, httpx_mock: HTTPXMock) -> None:
+        """Test that batched GETs bypass the cache even with validators."""
+        httpx_mock.add_response(
+            json=[{"200": {"id": "a"}}, {"200": {"id": "b"}}], headers={"ETag": '"v1"'}
+        )
+        cache = ResponseCache(tmp_path)
+
+        async with TrelloClient(key="test_key", token="test_token", response_cache=cache) as client:
+            await asyncio.gather(client.get_checklist("a"), client.get_checklist("b"))
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_evicts_least_recently_used(self, tmp_path: Path) -> None:
+        """Test that the cache keeps the `max_entries` most recently used responses."""
+        cache = ResponseCache(tmp_path, max_entries=2)
+        response = httpx.Response(200, headers={"ETag": '"v1"'})
+        for age, url in enumerate(["used", "unused"]):
+            cache.store(url, {}, response, url)
+            # Stored a minute apart, oldest first
+            os.utime(cache._path(url, {}), (age * 60, age * 60))
+
+        assert cache.load("used", {}) is not None
+        cache.store("new", {}, response, "new")
+
+        assert cache.load("unused", {}) is None
+        assert cache.load("used", {})["body"] == "used"
+        assert cache.load("new", {})["body"] == "new"
+
+
+class TestFieldProjection:
+    """Tests for requesting only the fields the models use."""
+
+    def test_fields_follow_models(self) -> None:
+        """Test that the projected fields cover every model field."""
+        assert CARD_PARAMS == {"fields": "name,idList,idChecklists,labels"}
+        assert CHECKLIST_PARAMS["checkItem_fields"] == "idChecklist,name,pos,state"
+        assert SNAPSHOT_PARAMS["checklists"] == "all"
+
+
+class TestBoardActions:
+    """Tests for reading the board actions feed."""
+
+    async def test_pages_back_until_since(
+        self,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+        httpx_mock: HTTPXMock,
+    ) -> None:
+        """Test that full pages are followed and actions bypass the cache."""
+        monkeypatch.setattr("shopr.trello.ACTIONS_PAGE_SIZE", 2)
+        params = {
+            **CREDENTIALS,
+            "filter": CARD_ACTIONS,
+            "fields": "type,data",
+            "memberCreator": "false",
+            "since": "a0",
+            "limit": 2,
+        }
+        url = f"{ROOT}/1/boards/board123/actions"
+        httpx_mock.add_response(
+            url=httpx.URL(url, params=params),
+            json=[{"id": "a4"}, {"id": "a3"}],
+            headers={"ETag": '"v1"'},
+        )
+        httpx_mock.add_response(
+            url=httpx.URL(url, params={**params, "before": "a3"}),
+            json=[{"id": "a2"}],
+        )
+
+        async with TrelloClient(
+            key="test_key", token="test_token", response_cache=ResponseCache(tmp_path)
+        ) as client:
+            actions = await client.get_board_actions("board123", since="a0")
+
+        assert [action["id"] for action in actions] == ["a4", "a3", "a2"]
+        assert list(tmp_path.iterdir()) == []